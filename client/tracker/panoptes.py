@@ -197,7 +197,8 @@ class PanoptesTracker(object):
 			'mac':        self._mac_address,
 			'os_type':    self.get_os_slug(),
 			'os_version': self.get_os_version(),
-			'user':       self._username
+			'user':       self._username,
+			'event_id':   uuid.uuid4().hex
 		}
 
 		#  Notify the tracking API that we're starting a new session, aborting if we
@@ -240,7 +241,8 @@ class PanoptesTracker(object):
 			connection = self._connect_to_server()
 			params = {
 				'apps': self._apps.format_for_post(),
-				'mac': self._mac_address
+				'mac': self._mac_address,
+				'event_id': uuid.uuid4().hex
 			}
 			response = self._make_api_call(connection, self.END_SESSION_METHOD, params)
 			if response:
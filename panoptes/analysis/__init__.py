@@ -1,18 +1,24 @@
 
+from django.core.cache import cache
 from django.db.models import Q
 from django.template.loader import render_to_string
+from django.utils.hashcompat import md5_constructor
 
 from panoptes.analysis.axes import AxisBase
-from panoptes.analysis.axes.pairs import axis_pair_is_valid
+from panoptes.analysis.axes.pairs import axis_pair_is_comparable, axis_pair_is_valid
 from panoptes.analysis.exceptions import InvalidAxisPair
-from panoptes.core.models import Session
+from panoptes.core.models import Session, UsageRollup
+import panoptes.settings as _settings
 
+from array import array
+
+import datetime
 import math
 
 class FilteredSessions(object):
 	"""An object that managers filters applied to session data."""
 
-	def __init__(self, location=None, start_date=None, end_date=None, start_time=None, end_time=None, weekdays=[], x_detail=None):
+	def __init__(self, location=None, start_date=None, end_date=None, start_time=None, end_time=None, weekdays=[], x_detail=None, compared_locations=[]):
 		"""Initialize the session filters for the all-optional kwargs.
 
 		Arguments:
@@ -23,6 +29,8 @@ class FilteredSessions(object):
 		end_time -- a time instance for the time filter end
 		weekdays -- an iterable of ISO-format weekday numbers
 		x_detail -- an instance of a datetime provided by an x-axis
+		compared_locations -- an iterable of other Location instances whose
+		                      sessions are compared with those of `location`
 
 		"""
 
@@ -37,6 +45,8 @@ class FilteredSessions(object):
 		self.weekdays   = weekdays
 		self.x_detail   = x_detail
 
+		self.compared_locations = list(compared_locations)
+
 	def _axis_class(self, axis):
 		"""Return the class of the given axis, or None if the axis is None.
 
@@ -85,11 +95,43 @@ class FilteredSessions(object):
 			start_time=self.start_time,
 			end_time=self.end_time,
 			weekdays=self.weekdays,
-			x_detail=self.x_detail
+			x_detail=self.x_detail,
+			compared_locations=self.compared_locations
 		)
 		new_sessions.set_axes(x_axis, y_axis)
 		return new_sessions
 
+	def for_location(self, location):
+		"""
+		Create a copy of the filtered sessions using the same axes that is
+		restricted to the given Location instance, without any comparison.
+		"""
+		new_sessions = FilteredSessions(
+			location=location,
+			start_date=self.start_date,
+			end_date=self.end_date,
+			start_time=self.start_time,
+			end_time=self.end_time,
+			weekdays=self.weekdays,
+			x_detail=self.x_detail
+		)
+		new_sessions.set_axes(self.x_axis, self.y_axis)
+		return new_sessions
+
+	@property
+	def locations(self):
+		"""A list of the filtered location followed by any being compared with it."""
+		locations = [self.location]
+		for location in self.compared_locations:
+			if location not in locations:
+				locations.append(location)
+		return locations
+
+	@property
+	def is_comparison(self):
+		"""True if the sessions of several locations are being compared."""
+		return bool(self.location) and len(self.locations) > 1
+
 	def all_sessions(self):
 		"""Return a queryset of Session instances matching the user's filters.
 
@@ -107,61 +149,211 @@ class FilteredSessions(object):
 			weekdays=self.weekdays,
 			related_fields=self.x_axis.provide_related_fields() + self.y_axis.provide_related_fields())
 
+	def comparison_sessions(self):
+		"""Return a queryset of the Session instances of every location compared.
+
+		This applies the same filters as all_sessions() to each location given
+		by the `locations` attribute.
+		"""
+		return Session.objects.filter_sessions(
+			start_date=self.start_date,
+			end_date=self.end_date,
+			start_time=self.start_time,
+			end_time=self.end_time,
+			weekdays=self.weekdays,
+			related_fields=self.x_axis.provide_related_fields() + self.y_axis.provide_related_fields()
+		).filter(location__in=[location.pk for location in self.locations])
+
+	def rollups(self):
+		"""Return a queryset of UsageRollup instances matching the user's filters.
+
+		If the rollups cannot stand in for the sessions matching the filters, such
+		as when the filters use times that are not on the hour, None is returned,
+		and an axis should use the sessions themselves.
+		"""
+		return UsageRollup.objects.for_filters(
+			location=self.location,
+			start_date=self.start_date,
+			end_date=self.end_date,
+			start_time=self.start_time,
+			end_time=self.end_time,
+			weekdays=self.weekdays)
+
 	def create_plot(self):
 		"""Create a plot of the data using the axes provided as a Plot instance."""
+		x_values, y_values = self.plot_values()
+		return Plot(self.x_axis, self.y_axis, x_values, y_values)
+
+	def plot_values(self):
+		"""Return the raw values of the plot of the data using the axes provided.
+
+		This gives the values without rendering them as a Plot, for callers that
+		only need to serialize each point, and shares the plot cache used by
+		create_plot().
+
+		Returns: a two-tuple of the form (x_values, y_values), whose members are
+		         lists of equal length
+
+		"""
 
 		if not self.x_axis or not self.y_axis:
 			raise ValueError("You can only call create_plot() on a FilteredSessions instance that has had axes set via the set_axes() method")
 
-		sessions = self.all_sessions()
-		x_values = self.x_axis.generate_values(sessions, self)
-		y_values = self.y_axis.generate_values(self.x_axis, x_values, sessions, self)
+		key = self._plot_cache_key([self.location])
+		values = cache.get(key) if key else None
+		if values is None:
+			sessions = self.all_sessions()
+			x_values = self.x_axis.generate_values(sessions, self)
+			y_values = self.y_axis.generate_values(self.x_axis, x_values, sessions, self)
+			values = (x_values, y_values)
+			if key:
+				cache.set(key, values, self._plot_cache_timeout())
+		return values
+
+	def create_comparison(self):
+		"""Create a comparison of the data of each location as a Comparison instance."""
+		x_values, series = self.comparison_values()
+		return Comparison(self.x_axis, self.y_axis, self.locations, x_values, series)
+
+	def comparison_values(self):
+		"""Return the raw values of the plot of each location being compared.
+
+		If the y-axis can generate the values of every location at once for the
+		x-axis, this uses a single query grouped by location.  Otherwise, the
+		values of each location are generated in turn, as they would be for a
+		plot of that location alone, so that every lens can compare locations.
+
+		Returns: a two-tuple of the form (x_values, series), where `series` is a
+		         list of the y-values of each location in the `locations`
+		         attribute, each as long as the list of x-values
 
-		return Plot(self.x_axis, self.y_axis, x_values, y_values)
+		"""
+
+		if not self.x_axis or not self.y_axis:
+			raise ValueError("You can only call create_comparison() on a FilteredSessions instance that has had axes set via the set_axes() method")
+		if not axis_pair_is_comparable(self.x_axis, self.y_axis):
+			raise InvalidAxisPair
+
+		key = self._plot_cache_key(self.locations, "comparison")
+		values = cache.get(key) if key else None
+		if values is None:
+			x_values = self.x_axis.generate_values(self.all_sessions(), self)
+			by_location = self.y_axis.generate_comparison_values(self.x_axis, x_values, self.comparison_sessions(), self)
+			if by_location is not None:
+				series = [by_location[location.pk] for location in self.locations]
+			else:
+				series = []
+				for location in self.locations:
+					location_sessions = self.for_location(location)
+					series.append(location_sessions.y_axis.generate_values(
+						location_sessions.x_axis, x_values, location_sessions.all_sessions(), location_sessions))
+			values = (x_values, series)
+			if key:
+				cache.set(key, values, self._plot_cache_timeout())
+		return values
+
+	def _plot_cache_key(self, locations, kind="plot"):
+		"""Return the cache key of a plot of the filtered sessions.
+
+		The key is a hash of the filters and axes in a canonical form, combined
+		with the change version of each location plotted, so that a plot is no
+		longer used once a session starts or ends at a location or its layout
+		changes.  A plot of days that have all passed only counts sessions that
+		closed on those days, so it uses the history version of each location
+		instead, which changes with the layout and when a session closes on an
+		earlier day, and is kept while today's sessions are being recorded.  None
+		is returned if no location is being filtered, as there is then no version.
+
+		Arguments:
+		locations -- a list of the Location instances plotted
+		kind -- the string name of the kind of plot
+
+		"""
+		if not self.location:
+			return None
+
+		parts = [kind]
+		for location in locations:
+			if self._is_past():
+				parts.extend([location.pk, "history", location.history_version])
+			else:
+				parts.extend([location.pk, location.version])
+		parts += [self.start_date, self.end_date, self.start_time, self.end_time,
+			u",".join([unicode(weekday) for weekday in sorted(self.weekdays)]),
+			getattr(self.x_detail, 'pk', self.x_detail),
+			self.x_axis.slug, self.y_axis.slug]
+		digest = md5_constructor(u"|".join([unicode(part) for part in parts]).encode('utf-8')).hexdigest()
+		return "panoptes:%s:%d:%s" % (kind, self.location.pk, digest)
+
+	def _plot_cache_timeout(self):
+		"""Return the number of seconds for which the plot should be cached.
+
+		A plot of days that have all passed is cached for much longer than one
+		including today, whose sessions are still being recorded.
+		"""
+		if self._is_past():
+			return _settings.PLOT_CACHE_TIMEOUT
+		return _settings.PLOT_CACHE_CURRENT_TIMEOUT
+
+	def _is_past(self):
+		"""Return whether the filtered dates end before today."""
+		return bool(self.end_date and self.end_date < datetime.date.today())
+
+def _max_y_value(y_values):
+	"""Return the maximum of the y-values as an integer, or zero if there is none."""
+	try:
+		return int(max(y_values))
+	except (ValueError, TypeError):
+		return 0
 
 class Plot(object):
-	"""A container for a plot of x- and y-values."""
+	"""
+	A container for a plot of x- and y-values.
+
+	The y-values and their percentages of the maximum y-value are held in
+	compact arrays, and each point of the plot is only rendered when it is
+	requested, so that plots of many points remain cheap to build.
+	"""
 
 	_KEYPOINT_COUNT = 5
 	_Y_VALUE_POINTS = 3
 
-	def __init__(self, x_axis, y_axis, x_values, y_values):
-		"""Create a plot for the given data on the given Axis instances."""
+	def __init__(self, x_axis, y_axis, x_values, y_values, max_y=None):
+		"""Create a plot for the given data on the given Axis instances.
+
+		The optional `max_y` is the integer y-value treated as the maximum, which
+		allows several plots to share a scale, and defaults to that of the data.
+		"""
 
 		self.x_axis   = x_axis
 		self.y_axis   = y_axis
-		self.x_values = x_values
-		self.y_values = y_values
+		self.x_values = list(x_values)
+		self.y_values = self._make_column(y_values)
 
-		self._length = len(x_values)
-		self._index  = -1
+		self._length = len(self.x_values)
+		self._x_index = None
 
-		try:
-			max_y = int(max(self.y_values))
-		except (ValueError, TypeError):
-			max_y = 0
+		if max_y is None:
+			max_y = _max_y_value(self.y_values)
 
 		#  Generate data on the percentage of each y-value relative to the maximum
 		#  y-val contained in the set, making sure to provide an intensity of at least
 		#  1% if the y-value has data but has a percentage less than 1%, since the int
 		#  version of the percentage is used for all display calculations.
 		if max_y:
-			self.y_percentages = []
-			for y_value in self.y_values:
-				try:
-					intensity = int(math.ceil((float(y_value) / float(max_y)) * 100))
-				except (ValueError, ZeroDivisionError):
-					intensity = 0
-				self.y_percentages.append(intensity)
+			scale = 100.0 / max_y
+			try:
+				self.y_percentages = array('B', [min(int(math.ceil(float(y_value) * scale)), 100) if y_value > 0 else 0
+					for y_value in self.y_values])
+			except TypeError:
+				self.y_percentages = array('B', [0] * len(self.y_values))
 		else:
-			self.y_percentages = [0] * len(self.y_values)
+			self.y_percentages = array('B', [0] * len(self.y_values))
 
-		#  Assemble a keypoint lookup table
-		self._keypoints = []
+		#  Points are keypoints at evenly spaced intervals along the x-axis
+		self._keypoint_step = 0
 		if self._KEYPOINT_COUNT:
-			x_values_length = len(self.x_values)
-			keypoint_step = max(x_values_length / self._KEYPOINT_COUNT, 1)
-			self._keypoints = [not i % keypoint_step for i in xrange(0, x_values_length)]
+			self._keypoint_step = max(self._length / self._KEYPOINT_COUNT, 1)
 
 		#  Assemble a list of evenly spaced rendered y-values that can be used in
 		#  visualizing the data, as long as the y-values are simple integers
@@ -177,13 +369,31 @@ class Plot(object):
 				self.y_labels.append(rendered_y)
 				current_y -= 1
 
+	def _make_column(self, values):
+		"""
+		Return the values as an array of integers or floats if they are all of
+		one of these types, and otherwise as a list.
+		"""
+		values = list(values)
+		for typecode, types in (('l', (int, long)), ('d', (int, long, float))):
+			if all([isinstance(value, types) and not isinstance(value, bool) for value in values]):
+				try:
+					return array(typecode, values)
+				except OverflowError:
+					pass
+		return values
+
 	@property
 	def max_y_value(self):
 		"""The maximum y-value in the plot."""
 		return max(self.y_values)
 
+	def __len__(self):
+		return self._length
+
 	def __iter__(self):
-		return self
+		"""Return a new iterator over the PlotPoint instances of the plot."""
+		return (PlotPoint(self, i) for i in xrange(self._length))
 
 	def __getitem__(self, key):
 		"""Return a PlotPoint instance for the point at the given x-value.
@@ -194,61 +404,134 @@ class Plot(object):
 		Returns: a PlotPoint instance for the found x-value, or raises a KeyError
 
 		"""
-		try:
-			point = self._make_plot_point(self.x_values.index(key))
-		except ValueError:
-			raise KeyError
-		else:
-			if not point:
-				raise KeyError
-			return point
+		if self._x_index is None:
+			self._x_index = {}
+			for i, x_value in enumerate(self.x_values):
+				self._x_index.setdefault(x_value, i)
+		return PlotPoint(self, self._x_index[key])
 
 	def _is_keypoint(self, i):
 		"""Return True if the point whose x-index is at `i` is a keypoint."""
-		try:
-			return self._keypoints[i]
-		except IndexError:
-			return False
-
-	def _make_plot_point(self, i):
-		"""Return a PlotPoint instance to plot the values at the x-index `i`."""
-		try:
-			return PlotPoint(
-				self.x_values[i],
-				self.x_axis.render_value(self.x_values[i]),
-				self.x_axis.serialize_value(self.x_values[i]),
-				self.y_values[i],
-				self.y_axis.render_value(self.y_values[i]),
-				self.y_axis.serialize_value(self.y_values[i]),
-				self.y_percentages[i],
-				u"%(y)s %(x)s" % {
-								'x': self.x_axis.verbose_value(self.x_values[i]),
-								'y': self.y_axis.verbose_value(self.y_values[i])},
-				self._is_keypoint(i))
-		except IndexError:
-			return None
-
-	def next(self):
-		"""Cycle to the next x-value."""
-		self._index += 1
-		point = self._make_plot_point(self._index)
-		if point:
-			return point
-		else:
-			self._index = -1
-			raise StopIteration
+		return bool(self._keypoint_step) and not i % self._keypoint_step
 
 class PlotPoint(object):
-	"""A point on a plot, describing the raw values and their rendered form."""
-
-	def __init__(self, x_value, x_label, x_serialized, y_value, y_label, y_serialized, y_percent, y_verbose, is_keypoint):
-		"""Store the values and labels for the point."""
-		self.x_value      = x_value
-		self.x_label      = x_label
-		self.x_serialized = x_serialized
-		self.y_value      = y_value
-		self.y_label      = y_label
-		self.y_serialized = y_serialized
-		self.y_percent    = y_percent
-		self.y_verbose    = y_verbose
-		self.is_keypoint  = is_keypoint
+	"""
+	A point on a plot, describing the raw values and their rendered form.
+
+	The rendered forms are only generated when they are accessed.
+	"""
+
+	__slots__ = ('_plot', '_i')
+
+	def __init__(self, plot, i):
+		"""Create the point at the x-index `i` of the Plot instance `plot`."""
+		self._plot = plot
+		self._i    = i
+
+	@property
+	def x_value(self):
+		return self._plot.x_values[self._i]
+
+	@property
+	def x_label(self):
+		return self._plot.x_axis.render_value(self.x_value)
+
+	@property
+	def x_serialized(self):
+		return self._plot.x_axis.serialize_value(self.x_value)
+
+	@property
+	def y_value(self):
+		return self._plot.y_values[self._i]
+
+	@property
+	def y_label(self):
+		return self._plot.y_axis.render_value(self.y_value)
+
+	@property
+	def y_serialized(self):
+		return self._plot.y_axis.serialize_value(self.y_value)
+
+	@property
+	def y_percent(self):
+		return self._plot.y_percentages[self._i]
+
+	@property
+	def y_verbose(self):
+		return u"%(y)s %(x)s" % {
+			'x': self._plot.x_axis.verbose_value(self.x_value),
+			'y': self._plot.y_axis.verbose_value(self.y_value)}
+
+	@property
+	def is_keypoint(self):
+		return self._plot._is_keypoint(self._i)
+
+class Comparison(object):
+	"""
+	A container for the plots of several locations on the same axes, which
+	share the x-values and the scale of the y-values.
+	"""
+
+	def __init__(self, x_axis, y_axis, locations, x_values, series):
+		"""Create a comparison for the given data on the given Axis instances.
+
+		Arguments:
+		x_axis -- an XAxis instance
+		y_axis -- a YAxis instance
+		locations -- a list of the Location instances being compared
+		x_values -- a list of the x-values shared by every location
+		series -- a list of the y-values of each location in `locations`
+
+		"""
+
+		self.x_axis    = x_axis
+		self.y_axis    = y_axis
+		self.locations = locations
+
+		max_y = max([_max_y_value(y_values) for y_values in series] + [0])
+		self.plots  = [Plot(x_axis, y_axis, x_values, y_values, max_y=max_y) for y_values in series]
+		self.series = zip(locations, self.plots)
+
+		self.y_labels = self.plots[0].y_labels if self.plots else []
+		self._length = len(x_values)
+
+	def __len__(self):
+		return self._length
+
+	def __iter__(self):
+		"""Return a new iterator over the ComparisonGroup instances of the comparison."""
+		return (ComparisonGroup(self, i) for i in xrange(self._length))
+
+class ComparisonGroup(object):
+	"""
+	The points of every location being compared at a single x-value, with the
+	x-value's rendered forms generated when they are accessed.
+	"""
+
+	__slots__ = ('_comparison', '_i')
+
+	def __init__(self, comparison, i):
+		"""Create the group at the x-index `i` of the Comparison instance `comparison`."""
+		self._comparison = comparison
+		self._i          = i
+
+	@property
+	def x_value(self):
+		return self._comparison.plots[0].x_values[self._i]
+
+	@property
+	def x_label(self):
+		return self._comparison.x_axis.render_value(self.x_value)
+
+	@property
+	def x_serialized(self):
+		return self._comparison.x_axis.serialize_value(self.x_value)
+
+	@property
+	def is_keypoint(self):
+		return self._comparison.plots[0]._is_keypoint(self._i)
+
+	@property
+	def points(self):
+		"""A list of two-tuples of each Location instance and its PlotPoint at the x-value."""
+		return [(location, PlotPoint(plot, self._i)) for location, plot in self._comparison.series]
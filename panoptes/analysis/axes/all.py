@@ -1,3 +1,3 @@
 
 from panoptes.analysis.axes.x import applications, days, hours, workstations
-from panoptes.analysis.axes.y import app_use, avg_session, sessions
+from panoptes.analysis.axes.y import app_time, app_use, avg_session, occupancy, sessions
@@ -28,10 +28,36 @@ def get_y_generator_method(x_axis, y_axis):
 
 	return y_method
 
+def get_y_comparison_method(x_axis, y_axis):
+	"""Return the y-value generator method for comparing locations on the x-axis.
+
+	A y-axis can provide a method that generates the y-values of many locations
+	at once, whose name is that of its y-value generator for the x-axis with a
+	suffix of "_by_location".  If it does not, the locations can still be
+	compared by generating the y-values of each in turn.
+
+	Arguments:
+	x_axis -- an instance of an XAxis class
+	y_axis -- an instance of a YAxis class
+
+	Returns:
+	A reference to the comparison generator if it was found, and otherwise None.
+
+	"""
+	try:
+		method_name = AXIS_PAIRS[x_axis.slug][y_axis.slug]
+	except KeyError:
+		return None
+	return getattr(y_axis, "%s_by_location" % method_name, None)
+
 def axis_pair_is_valid(x_axis, y_axis):
 	"""Return True if the XAxis and YAxis classes passed can be used together."""
 	return x_axis.slug in AXIS_PAIRS and y_axis.slug in AXIS_PAIRS[x_axis.slug]
 
+def axis_pair_is_comparable(x_axis, y_axis):
+	"""Return True if the axes can be used to compare many locations."""
+	return axis_pair_is_valid(x_axis, y_axis) and x_axis.comparable
+
 #  The keys are the slugs of an x-axis class, the value of the keys are dicts
 #  whose keys are y-axis class slugs and whose value is a single string that is
 #  the name of a method on the y-axis class that generates values for the x-axis
@@ -39,6 +65,7 @@ def axis_pair_is_valid(x_axis, y_axis):
 AXIS_PAIRS = {
 
 	'apps': {
+		'app-time': 'application_values',
 		'app-use': 'application_values'
 	},
 
@@ -48,10 +75,12 @@ AXIS_PAIRS = {
 	},
 
 	'hours': {
+		'occupancy': 'hour_values',
 		'session-count': 'hour_values'
 	},
 
 	'workstations': {
+		'app-time': 'workstation_values',
 		'app-use': 'workstation_values',
 		'avg-session-length': 'workstation_values',
 		'session-count': 'workstation_values'
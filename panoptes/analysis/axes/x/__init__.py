@@ -4,6 +4,10 @@ from panoptes.analysis.axes import BaseAxis
 class XAxis(BaseAxis):
 	"""Abstract base class for an x-axis."""
 
+	#  Whether the axis generates the same values for every location, which
+	#  allows locations to be compared along it
+	comparable = True
+
 	def generate_values(self, sessions, filters):
 		"""
 		This method, which must be implemented by a child class, returns a list
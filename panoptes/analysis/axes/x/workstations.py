@@ -10,6 +10,8 @@ class Axis(XAxis):
 	name = _("workstation")
 	slug = "workstations"
 
+	comparable = False
+
 	def generate_values(self, sessions, filters):
 		"""Return a list of Workstation instances for the location, ordered by name."""
 		return list(Workstation.objects.all_for_location(filters.location))
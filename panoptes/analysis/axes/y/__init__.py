@@ -1,6 +1,8 @@
 
+from django.db.models import Sum
+
 from panoptes.analysis.axes import BaseAxis
-from panoptes.analysis.axes.pairs import get_y_generator_method
+from panoptes.analysis.axes.pairs import get_y_comparison_method, get_y_generator_method
 
 class YAxis(BaseAxis):
 	"""Abstract base class for a y-axis."""
@@ -25,6 +27,46 @@ class YAxis(BaseAxis):
 
 		return y_method(x_values, sessions, filters)
 
+	def generate_comparison_values(self, x_axis, x_values, sessions, filters):
+		"""
+		Return a dict whose keys are the primary keys of the locations being
+		compared by the FilteredSessions instance `filters` and whose values are
+		lists of the y-values of each location, mapped to the list of x-values
+		given in `x_values`, for the Session queryset `sessions` spanning all of
+		the locations.
+
+		If the axis cannot generate the values of every location at once for the
+		x-axis, None is returned, and the values of each location should be
+		generated in turn.
+		"""
+		y_method = get_y_comparison_method(x_axis, self)
+		if not y_method:
+			return None
+		return y_method(x_values, sessions, filters)
+
+	def _series_by_location(self, totals, x_keys, filters):
+		"""
+		Return a dict whose keys are the primary keys of the locations being
+		compared and whose values are lists of the totals of each location.
+
+		Arguments:
+		totals -- a dict keyed by two-tuples of the form (location_id, x_key)
+		x_keys -- a list of the x-keys for which to generate data
+		filters -- the FilteredSessions instance comparing the locations
+
+		"""
+		return dict([(location.pk, [totals.get((location.pk, x_key), 0) for x_key in x_keys])
+			for location in filters.locations])
+
+	def _sum_rollups(self, rollups, field_name, sum_field):
+		"""
+		Return a dict whose keys are the values of the UsageRollup field named
+		`field_name` and whose values are the totals of the field named
+		`sum_field` grouped by that field.
+		"""
+		totals = rollups.values(field_name).order_by().annotate(total=Sum(sum_field))
+		return dict([(total[field_name], total['total'] or 0) for total in totals])
+
 	def y_values(self, x_values, sessions, filters):
 		"""
 		This is a template for the axis value-generation function used by a Y
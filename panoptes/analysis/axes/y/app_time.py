@@ -0,0 +1,51 @@
+
+from django.db.models import Sum
+from django.utils.translation import ugettext_lazy as _
+
+from panoptes.analysis.axes.y import YAxis
+from panoptes.analysis.axes.y.app_use import application_totals, workstation_totals
+
+class Axis(YAxis):
+	"""A y-axis of the total time for which an application was used."""
+
+	name = _("application time used")
+	slug = "app-time"
+
+	def application_values(self, x_values, sessions, filters):
+		"""
+		Return a list of the total number of seconds for which each Application
+		instance contained in `x_values` was used.
+		"""
+		by_app = application_totals(filters, Sum('duration'))
+		return [by_app.get(app.pk, 0) for app in x_values]
+
+	def workstation_values(self, x_values, sessions, filters):
+		"""
+		Return a list of the total number of seconds for which the Application
+		instance specified in `filters` was used per workstation.
+
+		As with the application usage count, a zero is provided as the value of
+		every y-value if no single application has been passed.
+		"""
+		app = filters.x_detail
+		if not app:
+			return [0] * len(x_values)
+		by_workstation = workstation_totals(sessions, app, Sum('apps_used__duration'))
+		return [by_workstation.get(workstation.pk, 0) for workstation in x_values]
+
+	def render_value(self, value):
+		"""Render the total time in seconds as an HH:MM string."""
+		minutes = value / 60
+		return u"%d:%02d" % (minutes / 60, minutes % 60)
+
+	def verbose_value(self, value):
+		"""Render the total time as a verbose string."""
+		return _("%(time)s of use") % {'time': self.render_value(value)}
+
+	def serialize_value(self, value):
+		"""Serialize the total time as a stringified number of seconds."""
+		return unicode(value)
+
+	def deserialize_value(self, value):
+		"""Deserialize the stringified integer as an integer."""
+		return int(value)
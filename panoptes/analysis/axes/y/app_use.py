@@ -1,9 +1,36 @@
 
+from django.db.models import Count
 from django.utils.translation import ugettext_lazy as _, ungettext
 
 from panoptes.analysis.axes.y import YAxis
 from panoptes.core.models import ApplicationUse
 
+def application_totals(filters, aggregate):
+	"""
+	Return a dict whose keys are the primary keys of applications and whose
+	values are the result of the `aggregate` ApplicationUse aggregate for each
+	application used by the sessions matching the FilteredSessions `filters`.
+	"""
+	app_uses = ApplicationUse.objects.all_for_filters(
+		location=filters.location,
+		start_date=filters.start_date,
+		end_date=filters.end_date,
+		start_time=filters.start_time,
+		end_time=filters.end_time,
+		weekdays=filters.weekdays
+	)
+	totals = app_uses.values('application').order_by().annotate(total=aggregate)
+	return dict([(total['application'], total['total'] or 0) for total in totals])
+
+def workstation_totals(sessions, app, aggregate):
+	"""
+	Return a dict whose keys are the primary keys of workstations and whose
+	values are the result of the `aggregate` Session aggregate for the sessions
+	in the `sessions` queryset that used the Application instance `app`.
+	"""
+	totals = sessions.filter(apps_used__application=app).values('workstation').order_by().annotate(total=aggregate)
+	return dict([(total['workstation'], total['total'] or 0) for total in totals])
+
 class Axis(YAxis):
 	"""A y-axis of the number of sessions that used an application."""
 
@@ -15,21 +42,8 @@ class Axis(YAxis):
 		Return a list of the number of sessions that used the  Application instance
 		contained in `x_values`.
 		"""
-
-		app_uses = ApplicationUse.objects.all_for_filters(
-			location=filters.location,
-			start_date=filters.start_date,
-			end_date=filters.end_date,
-			start_time=filters.start_time,
-			end_time=filters.end_time,
-			weekdays=filters.weekdays
-		)
-
-		by_app = dict(zip(x_values, [0] * len(x_values)))
-		for app_use in app_uses.select_related('application').iterator():
-			by_app[app_use.application] += 1
-
-		return [by_app[app] for app in x_values]
+		by_app = application_totals(filters, Count('session', distinct=True))
+		return [by_app.get(app.pk, 0) for app in x_values]
 
 	def workstation_values(self, x_values, sessions, filters):
 		"""
@@ -43,9 +57,8 @@ class Axis(YAxis):
 		app = filters.x_detail
 		if not app:
 			return [0] * len(x_values)
-		else:
-			return [sessions.filter(workstation=workstation, apps_used__application=app).count()
-				for workstation in x_values]
+		by_workstation = workstation_totals(sessions, app, Count('id', distinct=True))
+		return [by_workstation.get(workstation.pk, 0) for workstation in x_values]
 
 	def render_value(self, value):
 		"""
@@ -1,43 +1,92 @@
 
+from django.db.models import Avg, Sum
 from django.utils.translation import ugettext_lazy as _
 
 from panoptes.analysis.axes.y import YAxis
 
-import copy
-
 class Axis(YAxis):
 	"""A y-axis of the average session length."""
 
 	name = _("average session length")
 	slug = "avg-session-length"
 
-	def _average_length_for_queryset(self, sessions, field_name, x_values):
+	def _average_length_for_queryset(self, sessions, field_name, x_keys):
 		"""
 		Return the average length for the given sessions, grouped by field.
 
+		The average of the stored duration of the sessions is calculated by the
+		database, which returns a single row for each value of the field and
+		ignores sessions without a stored duration.
+
 		Arguments:
 		sessions -- a Session queryset
 		field_name -- the string name of the field to group by
-		x_values -- a list of x-values for which to generate data
+		x_keys -- a list of the values of the field for which to generate data
 
-		Returns: a list of integers as long as x_values
+		Returns: a list of integers as long as x_keys
+
+		"""
+		averages = sessions.values(field_name).order_by().annotate(average=Avg('duration_seconds'))
+		by_field = dict([(average[field_name], int(average['average'] or 0)) for average in averages])
+		return [by_field.get(x_key, 0) for x_key in x_keys]
 
+	def _average_length_in_python(self, sessions, field_name, x_keys):
 		"""
+		Return the average length for the given sessions, grouped by field.
+
+		This iterates over the stored duration of every session, and is kept as
+		the reference against which the database averages are tested.  Sessions
+		without a stored duration are ignored, as they are by the database.
+
+		Arguments:
+		sessions -- a Session queryset
+		field_name -- the string name of the field to group by
+		x_keys -- a list of the values of the field for which to generate data
 
-		by_field = dict(zip(x_values, [0] * len(x_values)))
-		counts = copy.copy(by_field)
-		for session in sessions.iterator():
-			field_key = getattr(session, field_name)
-			by_field[field_key] += (session.end - session.start).seconds
-			counts[field_key] += 1
+		Returns: a list of integers as long as x_keys
+
+		"""
+		by_field = {}
+		counts = {}
+		for field_key, seconds in sessions.values_list(field_name, 'duration_seconds').iterator():
+			if seconds is None:
+				continue
+			by_field[field_key] = by_field.get(field_key, 0) + seconds
+			counts[field_key] = counts.get(field_key, 0) + 1
 
 		y_values = []
-		for x_value in x_values:
+		for x_key in x_keys:
 			try:
-				y_value = by_field[x_value] / counts[x_value]
-			except (ZeroDivisionError, KeyError):
-				y_value = 0
-			y_values.append(y_value)
+				y_values.append(by_field[x_key] / counts[x_key])
+			except KeyError:
+				y_values.append(0)
+		return y_values
+
+	def _average_length_for_rollups(self, rollups, field_name, x_keys):
+		"""
+		Return the average length of the sessions summarized by the given
+		rollups, grouped by field.  Only the sessions with a stored duration
+		are counted, so that the average matches that of the sessions.
+
+		Arguments:
+		rollups -- a UsageRollup queryset
+		field_name -- the string name of the field to group by
+		x_keys -- a list of the values of the field for which to generate data
+
+		Returns: a list of integers as long as x_keys
+
+		"""
+		totals = {}
+		for total in rollups.values(field_name).order_by().annotate(seconds=Sum('total_seconds'), count=Sum('timed_session_count')):
+			totals[total[field_name]] = (total['seconds'] or 0, total['count'] or 0)
+
+		y_values = []
+		for x_key in x_keys:
+			seconds, count = totals.get(x_key, (0, 0))
+			try:
+				y_values.append(seconds / count)
+			except ZeroDivisionError:
+				y_values.append(0)
 		return y_values
 
 	def day_values(self, x_values, sessions, filters):
@@ -45,14 +94,29 @@ class Axis(YAxis):
 		Return a list of the average session length of each date instance in the
 		`x_values` list.
 		"""
+		rollups = filters.rollups()
+		if rollups is not None:
+			return self._average_length_for_rollups(rollups, 'date', x_values)
 		return self._average_length_for_queryset(sessions, 'start_date', x_values)
 
+	def day_values_by_location(self, x_values, sessions, filters):
+		"""
+		Return the average session length at each location being compared for
+		each date instance in the `x_values` list.
+		"""
+		averages = sessions.values('location', 'start_date').order_by().annotate(average=Avg('duration_seconds'))
+		by_day = dict([((average['location'], average['start_date']), int(average['average'] or 0)) for average in averages])
+		return self._series_by_location(by_day, x_values, filters)
+
 	def workstation_values(self, x_values, sessions, filters):
 		"""
 		Return a list of the average session length for each Workstation
 		instance in the `x_values` list.
 		"""
-		return self._average_length_for_queryset(sessions, 'workstation', x_values)
+		rollups = filters.rollups()
+		if rollups is not None:
+			return self._average_length_for_rollups(rollups, 'workstation', [workstation.pk for workstation in x_values])
+		return self._average_length_for_queryset(sessions, 'workstation', [workstation.pk for workstation in x_values])
 
 	def render_value(self, value):
 		"""Render the average session length in seconds as an HH:MM string."""
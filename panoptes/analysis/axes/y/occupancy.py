@@ -0,0 +1,85 @@
+
+from django.utils.translation import ugettext_lazy as _, ungettext
+
+from panoptes.analysis.axes.y import YAxis
+
+import datetime
+
+def _occupied_hours(start_date, start_time, end_date, end_time):
+	"""Return a list of the number of times a session occupies each hour of the day.
+
+	A session occupies every hour from the one in which it started through the
+	one in which it ended, counting each hour once for each day in which the
+	session was in progress during it.  A session ending exactly on the hour is
+	not considered to occupy that hour, unless it also started during it.
+
+	Arguments:
+	start_date -- the date on which the session started
+	start_time -- the time at which the session started
+	end_date -- the date on which the session ended
+	end_time -- the time at which the session ended
+
+	Returns: a list of 24 integers, one for each hour of the day
+
+	"""
+	hours = [0] * 24
+	days = (end_date - start_date).days
+	last_hour = end_time.hour
+	if end_time == datetime.time(last_hour) and (days or last_hour > start_time.hour):
+		last_hour -= 1
+		if last_hour < 0:
+			last_hour = 23
+			days -= 1
+
+	if days <= 0:
+		for hour in xrange(start_time.hour, max(last_hour, start_time.hour) + 1):
+			hours[hour] += 1
+		return hours
+
+	for hour in xrange(start_time.hour, 24):
+		hours[hour] += 1
+	for hour in xrange(0, last_hour + 1):
+		hours[hour] += 1
+	if days > 1:
+		hours = [count + days - 1 for count in hours]
+	return hours
+
+class Axis(YAxis):
+	"""A y-axis of the number of sessions in progress."""
+
+	name = _("sessions in progress")
+	slug = "occupancy"
+
+	def hour_values(self, x_values, sessions, filters):
+		"""
+		Return a list of the number of sessions in progress during the hour
+		specified by each time instance in the `x_values` list, with a session
+		that spans several hours counted in each of them.
+		"""
+
+		now = datetime.datetime.now()
+		by_hour = [0] * 24
+		spans = sessions.order_by().values_list('start_date', 'start_time', 'end_date', 'end_time')
+		for start_date, start_time, end_date, end_time in spans.iterator():
+			if end_date is None or end_time is None:
+				end_date, end_time = now.date(), now.time()
+			for hour, count in enumerate(_occupied_hours(start_date, start_time, end_date, end_time)):
+				by_hour[hour] += count
+		return [by_hour[hour.hour] for hour in x_values]
+
+	def render_value(self, value):
+		"""Render the integer number of sessions as a stringified integer."""
+		return unicode(value)
+
+	def verbose_value(self, value):
+		"""Render the integer as the number of sessions in progress."""
+		return ungettext("%(count)d session in progress", "%(count)d sessions in progress", value) % {
+			'count': value}
+
+	def serialize_value(self, value):
+		"""Serialize the number as a string."""
+		return unicode(value)
+
+	def deserialize_value(self, value):
+		"""Deserialize the stringified integer as an integer."""
+		return int(value)
@@ -19,31 +19,67 @@ class Axis(YAxis):
 		counts = sessions.values(field_name).order_by().annotate(count=Count(field_name))
 		return dict([(count[field_name], count['count']) for count in counts])
 
+	def _make_location_count_lookup(self, sessions, field_name):
+		"""
+		Return a dict whose keys are two-tuples of a location's primary key and
+		a valueified version of the Session field named in `field_name` and whose
+		values are the counts grouped by the location and that field.
+		"""
+		counts = sessions.values('location', field_name).order_by().annotate(count=Count(field_name))
+		return dict([((count['location'], count[field_name]), count['count']) for count in counts])
+
 	def day_values(self, x_values, sessions, filters):
 		"""
 		Return a list of the number of sessions that occurred for each date
 		instance in the `x_values` list.
 		"""
-		counts = self._make_count_lookup(sessions, 'start_date')
+		rollups = filters.rollups()
+		if rollups is not None:
+			counts = self._sum_rollups(rollups, 'date', 'session_count')
+		else:
+			counts = self._make_count_lookup(sessions, 'start_date')
 		return [counts.get(use_date, 0) for use_date in x_values]
 
+	def day_values_by_location(self, x_values, sessions, filters):
+		"""
+		Return the number of sessions that occurred at each location being
+		compared for each date instance in the `x_values` list.
+		"""
+		counts = self._make_location_count_lookup(sessions, 'start_date')
+		return self._series_by_location(counts, x_values, filters)
+
 	def hour_values(self, x_values, sessions, filters):
 		"""
 		Return a list of the number of sessions that occurred during the hour
 		specified by each time instance in the `x_values` list.
 		"""
 
-		by_hour = dict(zip(range(0, 24), [0] * 24))
-		for s in sessions.order_by('start_time').iterator():
-			by_hour[s.start_time.hour] += 1
-		return [by_hour[hour.hour] for hour in x_values]
+		rollups = filters.rollups()
+		if rollups is not None:
+			counts = self._sum_rollups(rollups, 'hour', 'session_count')
+			return [counts.get(hour.hour, 0) for hour in x_values]
+
+		counts = self._make_count_lookup(sessions, 'start_hour')
+		return [counts.get(hour.hour, 0) for hour in x_values]
+
+	def hour_values_by_location(self, x_values, sessions, filters):
+		"""
+		Return the number of sessions that occurred at each location being
+		compared during the hour specified by each time instance in `x_values`.
+		"""
+		counts = self._make_location_count_lookup(sessions, 'start_hour')
+		return self._series_by_location(counts, [hour.hour for hour in x_values], filters)
 
 	def workstation_values(self, x_values, sessions, filters):
 		"""
 		Return a list of the number of sessions that occurred for each
 		Workstation instance in the `x_values` list.
 		"""
-		counts = self._make_count_lookup(sessions, 'workstation')
+		rollups = filters.rollups()
+		if rollups is not None:
+			counts = self._sum_rollups(rollups, 'workstation', 'session_count')
+		else:
+			counts = self._make_count_lookup(sessions, 'workstation')
 		return [counts.get(workstation.pk, 0) for workstation in x_values]
 
 	def render_value(self, value):
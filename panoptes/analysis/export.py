@@ -0,0 +1,93 @@
+
+from django.utils import simplejson as json
+from django.utils.encoding import force_unicode
+
+from panoptes.analysis.axes.pairs import axis_pair_is_comparable
+
+from cStringIO import StringIO
+
+import csv
+
+#  The fields given for each point of an exported plot, in order
+_POINT_FIELDS = ('location', 'x', 'x_label', 'y', 'y_label')
+
+def _exported_locations(filters):
+	"""Return the locations whose points are exported for the filters."""
+	if filters.is_comparison and axis_pair_is_comparable(filters.x_axis, filters.y_axis):
+		return filters.locations
+	return [filters.location]
+
+def iter_points(filters):
+	"""Yield a dict describing each point of the plot of the filtered sessions.
+
+	Each point is serialized as it is yielded, using the serialize_value() and
+	render_value() methods of the axes, without building a Plot instance.  When
+	several locations are being compared along axes that allow it, the points
+	of every location are given for each x-value in turn.
+
+	Arguments:
+	filters -- a FilteredSessions instance whose axes have been set
+
+	Yields: a dict with `location`, `x`, `x_label`, `y` and `y_label` keys
+
+	"""
+	x_axis = filters.x_axis
+	y_axis = filters.y_axis
+	locations = _exported_locations(filters)
+	if len(locations) > 1:
+		x_values, series = filters.comparison_values()
+	else:
+		x_values, y_values = filters.plot_values()
+		series = [y_values]
+
+	for i, x_value in enumerate(x_values):
+		x_serialized = force_unicode(x_axis.serialize_value(x_value))
+		x_label = force_unicode(x_axis.render_value(x_value))
+		for location, y_values in zip(locations, series):
+			yield {
+				'location': location.slug,
+				'x':        x_serialized,
+				'x_label':  x_label,
+				'y':        force_unicode(y_axis.serialize_value(y_values[i])),
+				'y_label':  force_unicode(y_axis.render_value(y_values[i]))
+			}
+
+def iter_json(filters):
+	"""Yield the plot as a JSON object, one point at a time."""
+	yield '{"locations": %s, "x_axis": %s, "y_axis": %s, "points": [' % (
+		json.dumps([location.slug for location in _exported_locations(filters)]),
+		json.dumps(filters.x_axis.slug), json.dumps(filters.y_axis.slug))
+	separator = ""
+	for point in iter_points(filters):
+		yield separator + json.dumps(point)
+		separator = ", "
+	yield "]}"
+
+def iter_ndjson(filters):
+	"""Yield the plot as newline-delimited JSON, with one point per line."""
+	for point in iter_points(filters):
+		yield json.dumps(point) + "\n"
+
+def iter_csv(filters):
+	"""Yield the plot as UTF-8 encoded CSV, with a header and one row per point."""
+	buffer = StringIO()
+	writer = csv.writer(buffer)
+
+	def row(values):
+		writer.writerow(values)
+		line = buffer.getvalue()
+		buffer.seek(0)
+		buffer.truncate()
+		return line
+
+	yield row(_POINT_FIELDS)
+	for point in iter_points(filters):
+		yield row([point[field].encode('utf-8') for field in _POINT_FIELDS])
+
+#  The function that yields a plot in each format in which it can be exported,
+#  and the MIME type of the format, keyed by the format's slug
+EXPORT_FORMATS = {
+	'csv':    (iter_csv, "text/csv; charset=utf-8"),
+	'json':   (iter_json, "application/json"),
+	'ndjson': (iter_ndjson, "application/x-ndjson")
+}
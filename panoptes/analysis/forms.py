@@ -6,7 +6,7 @@ from django.utils.translation import ugettext_lazy as _
 from panoptes.analysis import FilteredSessions
 from panoptes.analysis.fields import LensChoiceField, WeekdayChoiceField
 from panoptes.core.fields import LocationField
-from panoptes.core.models import Session
+from panoptes.core.models import Location, Session
 
 import datetime
 
@@ -15,6 +15,7 @@ class SessionFilterForm(forms.Form):
 
 	location   = LocationField(label=_("location"))
 	lens       = LensChoiceField(label=_("data view"))
+	compare    = forms.ModelMultipleChoiceField(label=_("compare with"), required=False, queryset=Location.objects.all().order_by('name'))
 	start      = forms.DateField(label=_("start date"), required=False)
 	end        = forms.DateField(label=_("end date"), required=False)
 	start_time = forms.TimeField(label=_("start time"), required=False)
@@ -110,7 +111,8 @@ class SessionFilterForm(forms.Form):
 			start_time=data.get('start_time', None),
 			end_time=data.get('end_time', None),
 			weekdays=data.get('weekdays', []),
-			x_detail=data.get('x_detail', None))
+			x_detail=data.get('x_detail', None),
+			compared_locations=data.get('compare', None) or [])
 
 		lens = data.get('lens', None)
 		if lens:
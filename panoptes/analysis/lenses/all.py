@@ -1,4 +1,4 @@
 
-from panoptes.analysis.lenses.app import app_use
+from panoptes.analysis.lenses.app import app_time, app_use
 from panoptes.analysis.lenses.day import avg_length, sessions
-from panoptes.analysis.lenses.hour import sessions as _sessions
+from panoptes.analysis.lenses.hour import occupancy, sessions as _sessions
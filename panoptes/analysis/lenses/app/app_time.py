@@ -0,0 +1,15 @@
+
+from panoptes.analysis.lenses import BaseLens
+
+class Lens(BaseLens):
+	"""A lens to view the total time for which an application was used."""
+
+	slug = "app-time-per-app"
+
+	x_axis_slug = "apps"
+	y_axis_slug = "app-time"
+
+	panels = (
+		('chart',  {'chart': 'bar'}),
+		('map',    {'map': 'app_time'})
+	)
@@ -0,0 +1,15 @@
+
+from panoptes.analysis.lenses import BaseLens
+
+class Lens(BaseLens):
+	"""A lens to view the number of sessions in progress during each hour."""
+
+	slug = "occupancy-per-hour"
+
+	x_axis_slug = "hours"
+	y_axis_slug = "occupancy"
+
+	panels = (
+		('chart',  {'chart': 'bar'}),
+		('events', {'list': 'hour'})
+	)
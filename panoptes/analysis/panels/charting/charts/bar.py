@@ -1,4 +1,5 @@
 
+from panoptes.analysis.axes.pairs import axis_pair_is_comparable
 from panoptes.analysis.panels.charting.charts.base import BaseChart
 
 class BarChart(BaseChart):
@@ -13,8 +14,17 @@ class BarChart(BaseChart):
 			'all': ('panoptes/css/analysis/panels/charting/charts/bar.css',)}
 
 	def provide_render_args(self):
-		"""Return HTML used to build a 2D bar chart."""
+		"""Return HTML used to build a 2D bar chart.
 
+		If several locations are being compared along axes that allow it, the
+		bars of each location are grouped at each x-value.
+		"""
+
+		if self.sessions.is_comparison and axis_pair_is_comparable(self.sessions.x_axis, self.sessions.y_axis):
+			return {
+				'comparison': self.sessions.create_comparison(),
+				'sessions':   self.sessions
+			}
 		return {
 			'plot':     self.sessions.create_plot(),
 			'sessions': self.sessions
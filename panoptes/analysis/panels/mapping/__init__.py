@@ -8,7 +8,7 @@ from panoptes.analysis.panels.mapping.maps import map_factory
 import os
 
 #  Import all available map types
-from panoptes.analysis.panels.mapping.maps import app_use, sessions, session_length
+from panoptes.analysis.panels.mapping.maps import app_time, app_use, sessions, session_length
 
 class Panel(BasePanel):
 	"""A panel that shows the map of a location and an optional data overlay."""
@@ -0,0 +1,8 @@
+
+from panoptes.analysis.panels.mapping.maps.app_use import AppMap
+
+class AppTimeMap(AppMap):
+	"""A location map that shows the time each workstation used an application."""
+
+	slug = "app_time"
+	template = "panoptes/analysis/panels/maps/app_time.html"
@@ -6,7 +6,8 @@ location_patterns = patterns('panoptes.analysis.views',
 )
 
 lens_patterns = patterns('panoptes.analysis.views',
-	url(r'^update-panels/$', 'update_supporting_panels', name="update-supporting-panels")
+	url(r'^update-panels/$', 'update_supporting_panels', name="update-supporting-panels"),
+	url(r'^export/(?P<format>csv|json|ndjson)/$', 'export_plot', name="export-plot")
 )
 
 urlpatterns = patterns('',
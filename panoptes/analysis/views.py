@@ -1,9 +1,10 @@
 
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseRedirect
 from django.core.urlresolvers import reverse
 from django.shortcuts import get_object_or_404
 
+from panoptes.analysis.export import EXPORT_FORMATS
 from panoptes.analysis.forms import SessionFilterForm
 from panoptes.core.models import Location
 from panoptes.core.utils.ajax import AjaxError, ajax_view
@@ -73,3 +74,25 @@ def update_supporting_panels(request):
 			raise AjaxError
 	else:
 		raise AjaxError
+
+@login_required
+def export_plot(request, format):
+	"""Export the plot of the sessions matching the filters in a data format.
+
+	The filters are given by the same parameters used by the analysis page, in
+	either the query string or the POST data, and the plot is streamed as JSON,
+	CSV or newline-delimited JSON, as given by the `format` slug.
+	"""
+
+	filter_form = SessionFilterForm(request.POST or request.GET)
+	if not filter_form.is_valid():
+		return HttpResponseBadRequest(filter_form.errors.as_text(), mimetype="text/plain")
+
+	filters = filter_form.as_filtered_sessions()
+	exporter, mimetype = EXPORT_FORMATS[format]
+	response = HttpResponse(exporter(filters), mimetype=mimetype)
+	response['Content-Disposition'] = 'attachment; filename=%(location)s-%(lens)s.%(format)s' % {
+		'location': filters.location.slug,
+		'lens': filter_form.cleaned_data['lens'].slug,
+		'format': format}
+	return response
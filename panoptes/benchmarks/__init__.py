@@ -0,0 +1,43 @@
+
+from django.core.management import call_command
+from django.utils.importlib import import_module
+
+from panoptes.tracking.models import clear_process_caches
+
+#  The names of the modules in this package that define benchmarks, each of
+#  which provides a `run` function returning a list of two-tuples of the form
+#  (description, result) that describe what it measured
+BENCHMARKS = (
+	"apps",
+	"ingest",
+	"parsing",
+	"sessions",
+	"stream",
+	"usage",
+)
+
+def run_benchmark(name):
+	"""Run the named benchmark and return its list of results."""
+	return import_module("panoptes.benchmarks.%s" % name).run()
+
+def run_benchmarks(names):
+	"""Run the named benchmarks one after another, each in an empty database.
+
+	The database is flushed and the caches of the current process are cleared
+	before each benchmark, so that no benchmark sees the rows of another.
+
+	Arguments:
+	names -- an iterable of the names of benchmarks in BENCHMARKS
+
+	Yields: a two-tuple of the form (name, results) for each benchmark
+
+	"""
+	for name in names:
+		call_command('flush', interactive=False, verbosity=0)
+		clear_process_caches()
+		yield name, run_benchmark(name)
+
+def rate(count, seconds):
+	"""Return a description of the rate at which `count` things took `seconds`."""
+	return "%(count)d in %(seconds).3fs (%(rate).1f/s)" % {
+		'count': count, 'seconds': seconds, 'rate': count / max(seconds, 0.000001)}
@@ -0,0 +1,56 @@
+
+from panoptes.benchmarks import rate
+from panoptes.core.models import Application, ApplicationUse, ReportedApplication, Session
+from panoptes.tests.utils import count_queries, create_location, create_os_type, create_workstations, time_call
+
+#  The number of different applications used in each session
+APPS = 40
+
+#  The number of sessions ended with their application usage
+SESSIONS = 50
+
+def _end_sessions(workstations, apps_used):
+	for workstation in workstations:
+		Session.objects.end_session(workstation, apps_used)
+
+def _log_singly(sessions, apps_used):
+	for session in sessions:
+		for reported_name, duration in apps_used:
+			ApplicationUse.objects.log_usage(session, reported_name, duration)
+
+def run():
+	"""
+	Measure the queries and time needed to log the application usage of
+	sessions that each used many applications, both when the usage is logged
+	as a session ends and when each application's use is logged alone.
+	"""
+	location = create_location()
+	os_type = create_os_type()
+	apps_used = []
+	for i in xrange(APPS):
+		name = "App %d" % i
+		ReportedApplication.objects.create(name=name, location=location,
+			application=Application.objects.create(name=name))
+		apps_used.append((name, 60))
+
+	workstations = create_workstations(location, SESSIONS * 2 + 1)
+	for workstation in workstations:
+		Session.objects.start_session(workstation, os_type)
+
+	#  Count the queries of ending a session without and with its usage, and of
+	#  logging the same usage one application at a time
+	bare_queries = count_queries(Session.objects.end_session, workstations[0])[1]
+	single_queries = count_queries(_log_singly, Session.objects.filter(workstation=workstations[0]), apps_used)[1]
+	Session.objects.start_session(workstations[0], os_type)
+	end_queries = count_queries(Session.objects.end_session, workstations[0], apps_used)[1]
+
+	ended, logged = workstations[1:SESSIONS + 1], workstations[SESSIONS + 1:]
+	end_seconds = time_call(_end_sessions, ended, apps_used)[1]
+	_end_sessions(logged, [])
+	single_seconds = time_call(_log_singly, Session.objects.filter(workstation__in=logged), apps_used)[1]
+	return [
+		("queries to end a session with %d applications" % APPS, "%d (%d without applications)" % (end_queries, bare_queries)),
+		("queries to log %d applications one at a time" % APPS, single_queries),
+		("sessions ended with %d applications" % APPS, rate(SESSIONS, end_seconds)),
+		("sessions with %d applications logged one at a time" % APPS, rate(SESSIONS, single_seconds))
+	]
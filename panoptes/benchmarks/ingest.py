@@ -0,0 +1,58 @@
+
+from django.utils import simplejson as json
+
+from panoptes.benchmarks import rate
+from panoptes.core.models import Session
+from panoptes.tests.utils import create_location, create_os_type, create_workstations, mac_address, time_call
+from panoptes.tracking.batch import SessionEventBatch
+from panoptes.tracking.forms import CreateSessionForm, EndSessionForm, SessionBatchForm
+import panoptes.settings as _settings
+
+#  The number of workstations that start and end a session in each path
+WORKSTATIONS = 200
+
+def _start_data(i):
+	return {'mac': mac_address(i), 'os_type': _settings.OS_SLUG_WINDOWS, 'event_id': "start-%d" % i}
+
+def _end_data(i):
+	return {'mac': mac_address(i), 'apps': "Word#2010-01-01T10:00:00#2010-01-01T10:30:00", 'event_id': "end-%d" % i}
+
+def _report_singly(first):
+	"""Validate and apply each start and then each end as the sessions API does."""
+	for i in xrange(first, first + WORKSTATIONS):
+		form = CreateSessionForm(_start_data(i))
+		form.is_valid()
+		Session.objects.start_session(form.cleaned_data['workstation'], form.cleaned_data['os'], form.cleaned_data['event_id'])
+	for i in xrange(first, first + WORKSTATIONS):
+		form = EndSessionForm(_end_data(i))
+		form.is_valid()
+		Session.objects.end_session(form.cleaned_data['workstation'], form.cleaned_data['apps'], form.cleaned_data['offset'], form.cleaned_data['event_id'])
+
+def _report_in_batch(first):
+	"""Validate and apply every start and end in one batch as the batch API does."""
+	events = []
+	for i in xrange(first, first + WORKSTATIONS):
+		events.append(dict(_start_data(i), type=SessionBatchForm.START_EVENT))
+	for i in xrange(first, first + WORKSTATIONS):
+		events.append(dict(_end_data(i), type=SessionBatchForm.END_EVENT))
+	form = SessionBatchForm({'events': json.dumps(events)})
+	form.is_valid()
+	SessionEventBatch(form.cleaned_data['events']).process()
+
+def run():
+	"""
+	Compare the rate at which session events are applied when each is reported
+	alone with the rate when they are reported together in a batch.  The time
+	spent handling each HTTP request is not included.
+	"""
+	location = create_location()
+	create_os_type()
+	create_workstations(location, WORKSTATIONS * 2)
+
+	events = WORKSTATIONS * 2
+	single_seconds = time_call(_report_singly, 0)[1]
+	batch_seconds = time_call(_report_in_batch, WORKSTATIONS)[1]
+	return [
+		("events reported singly", rate(events, single_seconds)),
+		("events reported in a batch", rate(events, batch_seconds))
+	]
@@ -0,0 +1,51 @@
+
+from panoptes.benchmarks import rate
+from panoptes.tests.utils import time_call
+from panoptes.tracking.parsing import parse_app_durations, parse_datetime
+
+from dateutil.parser import parse as dateutil_parse
+
+import datetime
+
+#  The number of app records in each apps string, and the number of strings parsed
+RECORDS = 40
+REPEATS = 500
+
+def _apps_string():
+	"""Return an apps string of distinct records in the format sent by the clients."""
+	start = datetime.datetime(2011, 3, 7, 9, 0, 0, 250000)
+	records = []
+	for i in xrange(RECORDS):
+		app_start = start + datetime.timedelta(minutes=i)
+		records.append(u"App %d#%s#%s" % (i, app_start.isoformat(), (app_start + datetime.timedelta(seconds=45)).isoformat()))
+	return u",".join(records)
+
+def _parse_times(parse, times):
+	for i in xrange(REPEATS):
+		for dt_string in times:
+			parse(dt_string)
+
+def _parse_apps(apps):
+	for i in xrange(REPEATS):
+		parse_app_durations(apps)
+
+def run():
+	"""
+	Compare the rate at which the datetimes sent by the clients are parsed by
+	the direct ISO 8601 path and by dateutil, and measure the rate at which
+	whole apps strings are parsed.
+	"""
+	apps = _apps_string()
+	times = []
+	for record in apps.split(","):
+		times.extend(record.split("#")[1:])
+
+	count = REPEATS * len(times)
+	fast_seconds = time_call(_parse_times, parse_datetime, times)[1]
+	dateutil_seconds = time_call(_parse_times, dateutil_parse, times)[1]
+	apps_seconds = time_call(_parse_apps, apps)[1]
+	return [
+		("datetimes parsed directly", rate(count, fast_seconds)),
+		("datetimes parsed by dateutil", rate(count, dateutil_seconds)),
+		("apps strings of %d records parsed" % RECORDS, rate(REPEATS, apps_seconds))
+	]
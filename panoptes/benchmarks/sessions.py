@@ -0,0 +1,89 @@
+
+from django.db.models import Q
+
+from panoptes.benchmarks import rate
+from panoptes.core.models import Session
+from panoptes.core.utils.constants import week_day_lookup_value
+from panoptes.core.utils.db import bulk_insert
+from panoptes.tests.utils import create_location, create_os_type, create_workstations, time_call
+import panoptes.settings as _settings
+
+import datetime
+
+#  The number of locations, and the number of workstations at each location
+LOCATIONS = 10
+WORKSTATIONS = 50
+
+#  The number of sessions inserted with each statement
+BATCH_SIZE = 10000
+
+#  The number of times that each filter is counted
+REPEATS = 5
+
+#  The first day of the sessions, the days and weekdays that are filtered, and
+#  the duration of each session, one of which starts each hour at a workstation
+FIRST_DAY = datetime.datetime(2010, 1, 4)
+FILTER_START = datetime.date(2010, 2, 1)
+FILTER_END = datetime.date(2010, 2, 28)
+FILTER_WEEKDAYS = [1, 2, 3, 4, 5]
+SESSION_LENGTH = datetime.timedelta(minutes=45)
+
+def _insert_sessions(count, workstations, os_type):
+	"""Insert the sessions in batches, starting one each hour at each workstation."""
+	for first in xrange(0, count, BATCH_SIZE):
+		sessions = []
+		for i in xrange(first, min(first + BATCH_SIZE, count)):
+			workstation = workstations[i % len(workstations)]
+			start = FIRST_DAY + datetime.timedelta(hours=i // len(workstations))
+			end = start + SESSION_LENGTH
+			sessions.append(Session(workstation=workstation, location_id=workstation.location_id, os_type=os_type,
+				start=start, start_date=start.date(), start_time=start.time(), start_hour=start.hour,
+				weekday=start.isoweekday(), end=end, end_date=end.date(), end_time=end.time(),
+				duration_seconds=SESSION_LENGTH.seconds))
+		bulk_insert(Session, sessions)
+
+def _joined_sessions(location):
+	"""Return the filtered sessions found through their workstation and start."""
+	weekdays = Q()
+	for weekday in FILTER_WEEKDAYS:
+		weekdays |= Q(start__week_day=week_day_lookup_value(weekday))
+	return Session.objects.filter(weekdays, workstation__track=True, workstation__location=location,
+		start_date__gte=FILTER_START, end_date__lte=FILTER_END)
+
+def _stored_sessions(location):
+	"""Return the filtered sessions found through their stored location and weekday."""
+	return Session.objects.filter(workstation__track=True, location=location, weekday__in=FILTER_WEEKDAYS,
+		start_date__gte=FILTER_START, end_date__lte=FILTER_END)
+
+def _count_repeatedly(sessions):
+	for i in xrange(REPEATS):
+		sessions.count()
+
+def run():
+	"""
+	Measure the rate at which the sessions of one location are filtered by
+	date and weekday from a large table, both when the location and weekday
+	are found through the session's workstation and start, as they were before
+	being stored on each session, and when the stored values are used.
+
+	The number of sessions is set by the BENCHMARK_SESSION_COUNT setting.
+	"""
+	os_type = create_os_type()
+	workstations = []
+	for i in xrange(LOCATIONS):
+		workstations.extend(create_workstations(create_location("Lab %d" % i), WORKSTATIONS, i * WORKSTATIONS))
+	count = _settings.BENCHMARK_SESSION_COUNT
+	insert_seconds = time_call(_insert_sessions, count, workstations, os_type)[1]
+
+	location = workstations[0].location
+	joined = _joined_sessions(location)
+	stored = _stored_sessions(location)
+	matched = stored.count()
+	joined_seconds = time_call(_count_repeatedly, joined)[1]
+	stored_seconds = time_call(_count_repeatedly, stored)[1]
+	return [
+		("sessions inserted", rate(count, insert_seconds)),
+		("sessions matched by each filter", "%d joined, %d stored" % (joined.count(), matched)),
+		("joined filters of %d sessions" % count, rate(REPEATS, joined_seconds)),
+		("stored filters of %d sessions" % count, rate(REPEATS, stored_seconds))
+	]
@@ -0,0 +1,60 @@
+
+from django.core.cache import get_cache
+
+from panoptes.benchmarks import rate
+from panoptes.core.pubsub import CacheBackend, LocalBackend
+
+import threading
+import time
+
+#  The number of subscribers reading the channel, and the number of messages
+#  published to them
+SUBSCRIBERS = 1000
+MESSAGES = 20
+
+CHANNEL = "panoptes:benchmark"
+
+def _subscribe(backend, received):
+	"""Read the channel until every message has been received."""
+	after_id = 0
+	while after_id < MESSAGES:
+		messages = backend.read(CHANNEL, after_id, 5)
+		if messages:
+			after_id = messages[-1][0]
+		elif messages is None:
+			break
+	received.append(after_id)
+
+def _deliver(backend):
+	"""Return the number of seconds taken to deliver every message to every subscriber."""
+	received = []
+	subscribers = [threading.Thread(target=_subscribe, args=(backend, received)) for i in xrange(SUBSCRIBERS)]
+	for subscriber in subscribers:
+		subscriber.start()
+
+	#  Let the subscribers begin waiting before the messages are published
+	time.sleep(1)
+	started = time.time()
+	for i in xrange(MESSAGES):
+		backend.publish(CHANNEL, {'event': "session-started", 'name': "ws-%d" % i, 'session_start': None})
+	for subscriber in subscribers:
+		subscriber.join()
+	seconds = time.time() - started
+
+	if len([after_id for after_id in received if after_id == MESSAGES]) != SUBSCRIBERS:
+		raise AssertionError("Not every subscriber received every message")
+	return seconds
+
+def run():
+	"""
+	Measure the rate at which messages published on one channel are delivered
+	to many subscribers waiting on it, as when many clients follow the usage
+	stream of one location, using the local backend and the cache backend.
+	"""
+	deliveries = SUBSCRIBERS * MESSAGES
+	local_seconds = _deliver(LocalBackend())
+	cache_seconds = _deliver(CacheBackend(cache=get_cache("locmem://")))
+	return [
+		("deliveries to %d local subscribers" % SUBSCRIBERS, rate(deliveries, local_seconds)),
+		("deliveries to %d cache subscribers" % SUBSCRIBERS, rate(deliveries, cache_seconds))
+	]
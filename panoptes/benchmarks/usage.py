@@ -0,0 +1,32 @@
+
+from panoptes.benchmarks import rate
+from panoptes.core.models import Session
+from panoptes.tests.utils import count_queries, create_location, create_os_type, create_workstations, time_call
+from panoptes.tracking.usage import _build_current_usage
+
+#  The number of workstations at the location, half of which are in use
+WORKSTATIONS = 500
+
+#  The number of times that the usage is built
+REPEATS = 20
+
+def _build_repeatedly(location):
+	for i in xrange(REPEATS):
+		_build_current_usage(location)
+
+def run():
+	"""
+	Measure the rate at which the current usage of a large location is built
+	without its cached snapshot, and the number of queries used to build it.
+	"""
+	location = create_location()
+	os_type = create_os_type()
+	for workstation in create_workstations(location, WORKSTATIONS)[::2]:
+		Session.objects.start_session(workstation, os_type)
+
+	queries = count_queries(_build_current_usage, location)[1]
+	seconds = time_call(_build_repeatedly, location)[1]
+	return [
+		("queries per build of %d workstations" % WORKSTATIONS, queries),
+		("builds of %d workstations" % WORKSTATIONS, rate(REPEATS, seconds))
+	]
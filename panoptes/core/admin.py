@@ -54,6 +54,20 @@ class SessionAdmin(admin.ModelAdmin):
 	list_display = ('workstation', 'start', 'end', 'os_type')
 	ordering = ('-start',)
 
+class UnmatchedApplicationAdmin(admin.ModelAdmin):
+
+	list_display = ('name', 'location', 'use_count', 'total_duration', 'last_reported', 'application')
+	list_editable = ('application',)
+	list_filter = ('location',)
+	ordering = ('-use_count',)
+
+	def save_model(self, request, obj, form, change):
+		"""Map the unmatched name to an application once one is chosen."""
+		if obj.application_id:
+			UnmatchedApplication.objects.map_to_application(obj, obj.application)
+		else:
+			obj.save()
+
 class WorkstationAdmin(admin.ModelAdmin):
 
 	inlines = [MACAddressInline]
@@ -68,4 +82,5 @@ admin.site.register(Location, LocationAdmin)
 admin.site.register(OSType, OSTypeAdmin)
 admin.site.register(ReportedApplication, ReportedApplicationAdmin)
 admin.site.register(Session, SessionAdmin)
+admin.site.register(UnmatchedApplication, UnmatchedApplicationAdmin)
 admin.site.register(Workstation, WorkstationAdmin)
@@ -6,6 +6,10 @@ import pytz
 
 import datetime
 
+def normalize_mac_address(value):
+	"""Return the MAC address string normalized as AABBCCDDEEFF."""
+	return "".join([c for c in value if c not in ':-']).upper()
+
 #  Code for this comes from http://djangosnippets.org/snippets/1337/
 class MACAddressField(models.Field):
 	"""A model field that contains a normalized MAC address."""
@@ -30,13 +34,15 @@ class MACAddressField(models.Field):
 
 	def get_prep_value(self, value):
 		"""Normalize the MAC address as AABBCCDDEEFF before saving."""
-		return "".join([c for c in value if c not in ':-']).upper()
+		return normalize_mac_address(value)
 
 	def get_prep_lookup(self, lookup_type, value):
 		"""Normalize a MAC address that's being requested."""
 
 		if lookup_type == 'exact':
 			return self.get_prep_value(value)
+		elif lookup_type == 'in':
+			return [self.get_prep_value(v) for v in value]
 		else:
 			raise TypeError(ugettext('Lookup type %(lookup)s not supported') % {'lookup': lookup_type})
 
@@ -1,15 +1,23 @@
 
 from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
-from django.db import models
-from django.db.models import Q
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.utils.translation import ugettext_lazy as _
 
-from panoptes.core.model_fields import MACAddressField, TimeZoneField
+from panoptes.core.model_fields import MACAddressField, TimeZoneField, normalize_mac_address
+from panoptes.core.signals import sessions_ended, sessions_started
+from panoptes.core.utils.applications import ApplicationNameIndex
+from panoptes.core.utils.cache import LRUCache
+from panoptes.core.utils.constants import week_day_lookup_value
+from panoptes.core.utils.dates import total_seconds
+from panoptes.core.utils.db import bulk_insert, bulk_update, increment_or_create
 import panoptes.settings as _settings
 
 from autoslug import AutoSlugField
 
 import datetime
+import uuid
 
 class LocationManager(models.Manager):
 	"""Custom manager for the Location model."""
@@ -36,6 +44,57 @@ class LocationManager(models.Manager):
 			location.save()
 			return location
 
+	def adjust_open_session_counts(self, deltas):
+		"""Atomically add to the stored open session counts of many locations.
+
+		Locations whose counts change by the same amount are updated together, so
+		this usually needs a single query.
+
+		Arguments:
+		deltas -- a dict mapping the primary keys of Location instances to the
+		          integer to add to each location's open session count
+
+		"""
+		by_delta = {}
+		for location_id, delta in deltas.iteritems():
+			if delta:
+				by_delta.setdefault(delta, []).append(location_id)
+		for delta, location_ids in by_delta.iteritems():
+			self.filter(pk__in=location_ids).update(open_session_count=F('open_session_count') + delta)
+
+	def bump_versions(self, location_ids, history=True):
+		"""Atomically increment the change versions of many locations.
+
+		Arguments:
+		location_ids -- an iterable of the primary keys of Location instances
+		history -- whether the history versions of the locations are also
+		           incremented, which is not needed when only today's sessions
+		           change
+
+		"""
+		location_ids = set(location_ids)
+		location_ids.discard(None)
+		if location_ids:
+			versions = {'version': F('version') + 1}
+			if history:
+				versions['history_version'] = F('history_version') + 1
+			self.filter(pk__in=location_ids).update(**versions)
+
+	def reconcile_counts(self, locations=None):
+		"""Recount the stored workstation and open session counts of locations.
+
+		Arguments:
+		locations -- an optional iterable of Location instances or primary keys,
+		             which defaults to every location
+
+		"""
+		if locations is None:
+			locations = self.all()
+		for location in locations:
+			self.filter(pk=getattr(location, 'pk', location)).update(
+				workstation_count=Workstation.objects.filter(location=location, track=True).count(),
+				open_session_count=Session.objects.open_for_location(location).count())
+
 class Location(models.Model):
 	"""A location with computers whose usage can be tracked."""
 
@@ -48,6 +107,20 @@ class Location(models.Model):
 	timezone         = TimeZoneField(verbose_name=_("time zone"))
 	default          = models.BooleanField(verbose_name=_("default location"), default=False)
 
+	#  Counts of the tracked workstations and their open sessions, which are kept
+	#  current as sessions start and end so that they can be read without a query
+	workstation_count  = models.IntegerField(default=0, editable=False)
+	open_session_count = models.IntegerField(default=0, editable=False)
+
+	#  A number that is incremented whenever the location's usage, workstations or
+	#  layout change, which identifies the version of any data describing them
+	version = models.IntegerField(default=0, editable=False)
+
+	#  A number that is only incremented when the location's workstations or
+	#  layout change or a session closes on an earlier day, which identifies the
+	#  version of data describing the days before today
+	history_version = models.IntegerField(default=0, editable=False)
+
 	class Meta:
 
 		app_label = "panoptes"
@@ -60,12 +133,12 @@ class Location(models.Model):
 	@property
 	def open_workstation_count(self):
 		"""The number of currently available workstations."""
-		return self.total_workstation_count - Session.objects.open_for_location(self).count()
+		return max(self.workstation_count - self.open_session_count, 0)
 
 	@property
 	def total_workstation_count(self):
 		"""The total number of workstations at the location."""
-		return self.workstations.filter(track=True).count()
+		return self.workstation_count
 
 class LayoutRowManager(models.Manager):
 	"""Custom manager for the LayoutRow model."""
@@ -182,6 +255,10 @@ class LayoutCell(models.Model):
 class WorkstationManager(models.Manager):
 	"""Custom manager for the Workstation model."""
 
+	#  A cache of trackable workstations keyed by their normalized MAC addresses,
+	#  which is cleared whenever a location, workstation or MAC address changes
+	_mac_cache = LRUCache(_settings.MAC_CACHE_SIZE, _settings.MAC_CACHE_TIMEOUT)
+
 	def all_for_location(self, location):
 		"""Return all workstations for a location, ordered by name.
 
@@ -196,15 +273,63 @@ class WorkstationManager(models.Manager):
 	def trackable_by_mac(self, mac_address):
 		"""Return the trackable workstation with the given MAC address.
 
+		The resolution of the address is cached in the current process, including
+		the absence of a workstation for an unknown address.
+
 		Arguments:
 		mac_address -- a string of a workstation's MAC adress
 
 		Returns: a single Workstation instance or None
 		"""
+		address = normalize_mac_address(mac_address)
+		try:
+			return self._mac_cache[address]
+		except KeyError:
+			pass
 		try:
-			return MACAddress.objects.get(address=mac_address, workstation__track=True).workstation
+			mac = MACAddress.objects.select_related('workstation', 'workstation__location').get(address=address, workstation__track=True)
 		except MACAddress.DoesNotExist:
-			return None
+			workstation = None
+		else:
+			workstation = mac.workstation
+		self._mac_cache[address] = workstation
+		return workstation
+
+	def trackable_by_macs(self, mac_addresses):
+		"""Return the trackable workstations for many MAC addresses with one query.
+
+		Arguments:
+		mac_addresses -- an iterable of strings of workstations' MAC addresses
+
+		Returns: a dict whose keys are the normalized MAC addresses and whose
+		         values are Workstation instances, or None for unknown addresses
+
+		"""
+		workstations = {}
+		uncached = []
+		for address in set([normalize_mac_address(mac) for mac in mac_addresses]):
+			try:
+				workstations[address] = self._mac_cache[address]
+			except KeyError:
+				workstations[address] = None
+				uncached.append(address)
+
+		if uncached:
+			macs = MACAddress.objects.filter(address__in=uncached, workstation__track=True)
+			for mac in macs.select_related('workstation', 'workstation__location'):
+				workstations[mac.address] = mac.workstation
+			for address in uncached:
+				self._mac_cache[address] = workstations[address]
+
+		return workstations
+
+	def clear_mac_cache(self):
+		"""Discard every cached resolution of a MAC address to a workstation."""
+		self._mac_cache.clear()
+
+	def mac_cache_stats(self):
+		"""Return a dict of the size, hits and misses of the MAC address cache."""
+		return self._mac_cache.stats()
 
 class Workstation(models.Model):
 	"""A workstation at a location, identified by its MAC address."""
@@ -259,21 +384,90 @@ class MACAddress(models.Model):
 class OSTypeManager(models.Manager):
 	"""Custom manager for the OSType model."""
 
+	#  A cache of OSType instances keyed by their (name, version) pairs, which is
+	#  filled with every OS type on first use and cleared whenever one changes
+	_os_types = LRUCache(_settings.OS_TYPE_CACHE_SIZE, _settings.OS_TYPE_CACHE_TIMEOUT)
+	_loaded = False
+
+	def _normalize(self, name, version):
+		"""Return the name and version as a two-tuple with blank values as None."""
+		return (name or None, version or None)
+
+	def load_cache(self):
+		"""Fill the cache with every existing OS type."""
+		for os_type in self.all():
+			self._os_types[(os_type.name, os_type.version)] = os_type
+		OSTypeManager._loaded = True
+
+	def clear_cache(self):
+		"""Discard every cached OS type."""
+		self._os_types.clear()
+		OSTypeManager._loaded = False
+
+	def _create(self, name, version):
+		"""Create an OS type, or fetch it if it was created concurrently."""
+		savepoint = transaction.savepoint(using=self.db)
+		try:
+			os_type = self.create(name=name, version=version)
+		except IntegrityError:
+			transaction.savepoint_rollback(savepoint, using=self.db)
+			try:
+				return self.filter(name=name, version=version).order_by('pk')[0]
+			except IndexError:
+				return None
+		else:
+			transaction.savepoint_commit(savepoint, using=self.db)
+			return os_type
+
 	def get_or_create(self, name, version):
 		"""Return an OSType type instance matching the passed parameters.
 
 		This will create a new OSType instance if none exists matching the passed
 		values, provided that at least `name` is not None.
 		"""
-		name = name or None
-		version = version or None
-		try:
-			return self.get(name=name, version=version)
-		except OSType.DoesNotExist:
+		return self.get_or_create_many([(name, version)])[0]
+
+	def get_or_create_many(self, os_types):
+		"""Return the OSType instances for many (name, version) pairs.
+
+		The OS types are read from the cache, which is filled with every OS type
+		the first time that it is used.  Any pairs missing from the cache are
+		fetched with a single query, and only the pairs that do not yet exist are
+		created.
+
+		Arguments:
+		os_types -- a list of two-tuples of the form (name, version)
+
+		Returns: a list as long as `os_types` of OSType instances or None
+
+		"""
+		if not self._loaded:
+			self.load_cache()
+
+		pairs = [self._normalize(name, version) for name, version in os_types]
+		found = {}
+		missing = set()
+		for pair in set(pairs):
+			if not pair[0]:
+				found[pair] = None
+				continue
 			try:
-				return self.create(name=name, version=version)
-			except ValueError:
-				return None
+				found[pair] = self._os_types[pair]
+			except KeyError:
+				missing.add(pair)
+
+		if missing:
+			for os_type in self.filter(name__in=[name for name, version in missing]).order_by('-pk'):
+				pair = (os_type.name, os_type.version)
+				if pair in missing:
+					found[pair] = self._os_types[pair] = os_type
+			for pair in missing:
+				if pair not in found:
+					found[pair] = self._create(*pair)
+					if found[pair]:
+						self._os_types[pair] = found[pair]
+
+		return [found[pair] for pair in pairs]
 
 class OSType(models.Model):
 	"""An operating system that a machine can run."""
@@ -286,36 +480,233 @@ class OSType(models.Model):
 	class Meta:
 
 		app_label = "panoptes"
+		unique_together = (('name', 'version'),)
 		verbose_name = _("OS type")
 		verbose_name_plural = _("OS types")
 
 	def __unicode__(self):
 		return u" ".join([self.name, self.version or u""])
 
+def _current_time():
+	"""Return a time instance of the current time."""
+	return datetime.datetime.now().time()
+
 class SessionManager(models.Manager):
 	"""Custom manager for the Session model."""
 
-	def start_session(self, workstation, os_instance):
+	#  Whether every session is known to have its location and weekday stored,
+	#  which is only checked until it is true, since new sessions always have them
+	_backfilled = False
+
+	def is_backfilled(self):
+		"""Return whether every session has its location and weekday stored.
+
+		Sessions recorded before those fields were added lack them until the
+		backfill_session_locations and backfill_weekdays commands are run, and
+		are filtered by their workstation's location and start date until then.
+		"""
+		if not SessionManager._backfilled:
+			SessionManager._backfilled = not self.filter(Q(location__isnull=True) | Q(weekday__isnull=True)).exists()
+		return SessionManager._backfilled
+
+	def clear_backfilled(self):
+		"""Forget whether every session has its location and weekday stored."""
+		SessionManager._backfilled = False
+
+	def _new_event_id(self):
+		"""Return a unique event ID for an event reported without one."""
+		return uuid.uuid4().hex
+
+	def _delete_unclosed(self, workstations, keep_events=[]):
+		"""Delete the unclosed sessions of the workstations with one statement.
+
+		Since application usage is only recorded when a session is closed, an
+		unclosed session has no related records, so it can be deleted directly
+		without first selecting the records that depend upon it.
+
+		Arguments:
+		workstations -- a list of Workstation instances
+		keep_events -- a list of start event IDs whose sessions should be kept
+
+		Returns: the number of sessions deleted
+
+		"""
+		if not workstations:
+			return 0
+		connection = connections[self.db]
+		qn = connection.ops.quote_name
+		opts = self.model._meta
+		sql = "DELETE FROM %(table)s WHERE %(workstation)s IN (%(workstations)s) AND %(end)s IS NULL" % {
+			'table': qn(opts.db_table),
+			'workstation': qn(opts.get_field('workstation').column),
+			'workstations': ", ".join(["%s"] * len(workstations)),
+			'end': qn(opts.get_field('end').column)
+		}
+		params = [workstation.pk for workstation in workstations]
+		if keep_events:
+			sql += " AND (%(event)s IS NULL OR %(event)s NOT IN (%(events)s))" % {
+				'event': qn(opts.get_field('start_event').column),
+				'events': ", ".join(["%s"] * len(keep_events))
+			}
+			params.extend(keep_events)
+		cursor = connection.cursor()
+		cursor.execute(sql, params)
+		transaction.commit_unless_managed(using=self.db)
+		return cursor.rowcount
+
+	def _count_by_location(self, workstations):
+		"""Return a dict mapping location primary keys to their number of workstations."""
+		counts = {}
+		for workstation in workstations:
+			counts[workstation.location_id] = counts.get(workstation.location_id, 0) + 1
+		return counts
+
+	def _delete_unclosed_by_location(self, workstations, keep_events=[]):
+		"""Delete the unclosed sessions of workstations with a query per location.
+
+		Returns: a dict mapping location primary keys to their deleted session counts
+
+		"""
+		by_location = {}
+		for workstation in workstations:
+			by_location.setdefault(workstation.location_id, []).append(workstation)
+		deleted = {}
+		for location_id, location_workstations in by_location.iteritems():
+			deleted[location_id] = self._delete_unclosed(location_workstations, keep_events)
+		return deleted
+
+	def _new_session(self, workstation, os_instance, event_id, start):
+		"""Return an unsaved Session instance starting at the given datetime."""
+		return self.model(
+			workstation=workstation,
+			location_id=workstation.location_id,
+			os_type=os_instance,
+			start_event=event_id,
+			start=start,
+			start_date=start.date(),
+			start_time=start.time(),
+			start_hour=start.hour,
+			weekday=start.isoweekday())
+
+	def start_session(self, workstation, os_instance, event_id=None, at=None):
 		"""Create a new session for the given workstation.
 
 		If an error occurs during the creation of the session, None is returned and
 		the session is not tracked.
 
+		The optional `event_id` argument is a string that uniquely identifies the
+		start being reported, which makes it safe to report the same start more
+		than once.  Any repeated report of the start returns the session created
+		by the first report.
+
+		The optional `at` argument is a datetime instance of when the start was
+		reported, which defaults to the current time.
+
 		Arguments:
 		workstation -- a Workstation instance
 		os_instance -- an instance of an OSType model
+		event_id -- an optional unique string identifying the start
+		at -- an optional datetime instance of when the session started
 
 		Returns: a new Session instance
 		"""
 
-		#  Clear any unclosed sessions before opening a new one
-		if workstation and os_instance:
-			self.filter(workstation=workstation, end__isnull=True).delete()
-			return self.create(workstation=workstation, os_type=os_instance)
-		else:
+		if not workstation or not os_instance:
 			return None
+		event_id = event_id or self._new_event_id()
+
+		#  Clear any unclosed sessions before opening a new one, keeping a session
+		#  that might have been opened by an earlier report of this start
+		replaced = self._delete_unclosed([workstation], [event_id])
+
+		#  Insert the session, relying on the unique start event and the unique
+		#  index on each workstation's unclosed session to reject a repeated or
+		#  concurrent start, in which case the existing session is returned
+		session = self._new_session(workstation, os_instance, event_id, at or datetime.datetime.now())
+		savepoint = transaction.savepoint(using=self.db)
+		try:
+			session.save(force_insert=True, using=self.db)
+		except IntegrityError:
+			transaction.savepoint_rollback(savepoint, using=self.db)
+			Location.objects.adjust_open_session_counts({workstation.location_id: -replaced})
+			existing = self.filter(Q(start_event=event_id) | Q(workstation=workstation, end__isnull=True))
+			try:
+				return existing.order_by('-start')[0]
+			except IndexError:
+				return None
+		else:
+			transaction.savepoint_commit(savepoint, using=self.db)
+			Location.objects.adjust_open_session_counts({workstation.location_id: 1 - replaced})
+			sessions_started.send(sender=self.model, workstations=[workstation], sessions=[session])
+			return session
+
+	def start_sessions(self, starts):
+		"""Create new sessions for many workstations at once.
+
+		This behaves like `start_session`, but clears the unclosed sessions of every
+		workstation with one query and creates the new sessions with one insert.
+		Each workstation should appear at most once in `starts`.
+
+		Arguments:
+		starts -- a list of four-tuples of the form (workstation, os_instance, event_id, at)
 
-	def end_session(self, workstation, apps_used=[], time_offset=0):
+		Returns: a list as long as `starts` of whether each session was started
+
+		"""
+
+		now = datetime.datetime.now()
+		started = [bool(workstation and os_instance) for workstation, os_instance, event_id, at in starts]
+		valid = [(workstation, os_instance, event_id or self._new_event_id(), at or now)
+				 for (workstation, os_instance, event_id, at), is_valid in zip(starts, started) if is_valid]
+		if not valid:
+			return started
+
+		#  Skip any starts that have already been reported
+		event_ids = [start[2] for start in valid]
+		reported = set(self.filter(start_event__in=event_ids).values_list('start_event', flat=True))
+		new = [start for start in valid if start[2] not in reported]
+		if not new:
+			return started
+
+		deltas = self._delete_unclosed_by_location([start[0] for start in new], event_ids)
+		for location_id in deltas:
+			deltas[location_id] = -deltas[location_id]
+		sessions = [self._new_session(*start) for start in new]
+		savepoint = transaction.savepoint(using=self.db)
+		try:
+			bulk_insert(self.model, sessions, using=self.db)
+		except IntegrityError:
+
+			#  If a concurrent report conflicts with any of the sessions, start
+			#  each of them individually
+			transaction.savepoint_rollback(savepoint, using=self.db)
+			Location.objects.adjust_open_session_counts(deltas)
+			for start in new:
+				self.start_session(*start)
+		else:
+			transaction.savepoint_commit(savepoint, using=self.db)
+			for location_id, count in self._count_by_location([start[0] for start in new]).iteritems():
+				deltas[location_id] += count
+			Location.objects.adjust_open_session_counts(deltas)
+			sessions_started.send(sender=self.model, workstations=[start[0] for start in new], sessions=sessions)
+
+		return started
+
+	def _end_datetime(self, now, time_offset):
+		"""Return the datetime at which a session ending at `now` should end."""
+		if time_offset != 0:
+			return now + datetime.timedelta(seconds=time_offset)
+		return now
+
+	def _set_end(self, session, end, event_id):
+		"""Set the ending date, time, duration and event fields of the session instance."""
+		session.end = end
+		session.end_date = end.date()
+		session.end_time = end.time()
+		session.end_event = event_id
+		session.duration_seconds = total_seconds(end - session.start)
+
+	def end_session(self, workstation, apps_used=[], time_offset=0, event_id=None, at=None):
 		"""Finalize the session associated with the workstation.
 
 		If the workstation is valid and the session was properly closed, the Session
@@ -330,42 +721,166 @@ class SessionManager(models.Manager):
 		This can be used to decrease the session length if the end is occurring
 		due to an automatic idle logout, for example.
 
+		The optional `event_id` argument is a string that uniquely identifies the
+		end being reported, which makes it safe to report the same end more than
+		once.  Any repeated report of the end returns the session closed by the
+		first report without changing it.
+
+		The optional `at` argument is a datetime instance of when the end was
+		reported, to which the time offset is applied, and defaults to the
+		current time.
+
 		Arguments:
 
 		workstation -- a Workstation instance
 		apps_used -- a list of apps used
 		time_offset -- an integer of the number of seconds to add to the end time
+		event_id -- an optional unique string identifying the end
+		at -- an optional datetime instance of when the session ended
 
 		Returns: a Session instance on success or None on failure
 
 		"""
 
-		#  Close the most recent unclosed session, applying the time offset if
-		#  needed and performing a sanity check to prevent sessions with an end
-		#  time less than their start time
-		try:
-			session = self.filter(workstation=workstation, end__isnull=True).order_by('-end')[0]
-		except IndexError:
+		if not workstation:
 			return None
-		else:
+		event_id = event_id or self._new_event_id()
+		end = self._end_datetime(at or datetime.datetime.now(), time_offset)
+
+		#  Close the unclosed session with a conditional update, which will close
+		#  nothing if a concurrent report closes it first and will fail on the
+		#  unique end event if this end has already been reported.  The session is
+		#  read first, rather than computing its end in the update, since its
+		#  duration cannot be computed from its start with SQL common to every
+		#  database, and the closed session is needed to record its activity.
+		closed = 0
+		session = self.active_session_for_workstation(workstation)
+		if session and session.start < end:
+			self._set_end(session, end, event_id)
+			savepoint = transaction.savepoint(using=self.db)
+			try:
+				closed = self.filter(pk=session.pk, end__isnull=True).update(
+					end=session.end, end_date=session.end_date, end_time=session.end_time,
+					end_event=event_id, duration_seconds=session.duration_seconds)
+			except IntegrityError:
+				transaction.savepoint_rollback(savepoint, using=self.db)
+			else:
+				transaction.savepoint_commit(savepoint, using=self.db)
 
-			#  Set the session's ending time if it occurs after the start time
-			end = datetime.datetime.now()
-			if time_offset != 0:
-				end += datetime.timedelta(seconds=time_offset)
-			if session.start >= end:
-				session.delete()
+		#  If no session was closed, return the session closed by an earlier report
+		#  of this end, or discard an unclosed session whose end would precede its
+		#  start
+		if not closed:
+			try:
+				return self.select_related('workstation').get(end_event=event_id)
+			except self.model.DoesNotExist:
+				deleted = self._delete_unclosed([workstation])
+				if deleted:
+					Location.objects.adjust_open_session_counts({workstation.location_id: -deleted})
+					sessions_ended.send(sender=self.model, workstations=[workstation], sessions=[])
 				return None
-			session.end = end
-			session.end_date = end.date()
-			session.end_time = end.time()
-			session.save()
 
-			#  If any application usage records exist, create instances for them
-			for app in apps_used:
-				session.add_app_usage(*app)
+		#  If any application usage records exist, create instances for them
+		session.workstation = workstation
+		Location.objects.adjust_open_session_counts({workstation.location_id: -1})
+		sessions_ended.send(sender=self.model, workstations=[workstation], sessions=[session])
+		DailyActivity.objects.record_sessions([session])
+		app_counts = ApplicationUse.objects.log_usage_for_sessions([(session, apps_used)])
+		UsageRollup.objects.record_sessions([session], app_counts)
 
-			return session
+		return session
+
+	def end_sessions(self, ends):
+		"""Finalize the sessions associated with many workstations at once.
+
+		This behaves like `end_session`, but finds the unclosed sessions of every
+		workstation with one query, closes them with one batched update and logs
+		all of their application usage with one insert.  Each workstation should
+		appear at most once in `ends`.
+
+		Arguments:
+		ends -- a list of five-tuples of the form (workstation, apps_used, time_offset, event_id, at)
+
+		Returns: a list as long as `ends` of closed Session instances or None
+
+		"""
+
+		now = datetime.datetime.now()
+		ends = [(workstation, apps_used, time_offset, event_id or self._new_event_id(), at or now)
+				for workstation, apps_used, time_offset, event_id, at in ends]
+
+		#  Find the sessions closed by earlier reports of any of the ends
+		reported = {}
+		for session in self.filter(end_event__in=[end[3] for end in ends]):
+			reported[session.end_event] = session
+
+		workstations = [end[0] for end in ends if end[0] and end[3] not in reported]
+		open_sessions = {}
+		if workstations:
+			unclosed = self.filter(workstation__in=workstations, end__isnull=True)
+			for session in unclosed.select_related('workstation').order_by('start'):
+				open_sessions[session.workstation_id] = session
+
+		#  Sort the most recent unclosed session of each workstation into those
+		#  that can be closed and those whose end would precede their start
+		closed = []
+		invalid = []
+		results = []
+		for workstation, apps_used, time_offset, event_id, at in ends:
+			session = reported.get(event_id, None)
+			if not session:
+				session = open_sessions.pop(getattr(workstation, 'pk', None), None)
+				if session:
+					end = self._end_datetime(at, time_offset)
+					if session.start >= end:
+						invalid.append(workstation)
+						session = None
+					else:
+						self._set_end(session, end, event_id)
+						closed.append((session, apps_used))
+			results.append(session)
+
+		if invalid:
+			deleted = self._delete_unclosed_by_location(invalid)
+			Location.objects.adjust_open_session_counts(dict([(location_id, -count) for location_id, count in deleted.iteritems()]))
+			if sum(deleted.values()):
+				sessions_ended.send(sender=self.model, workstations=invalid, sessions=[])
+		if closed:
+			savepoint = transaction.savepoint(using=self.db)
+			try:
+				bulk_update(self.model, [session for session, apps_used in closed], ['end', 'end_date', 'end_time', 'end_event', 'duration_seconds'],
+					condition="%s IS NULL" % connections[self.db].ops.quote_name('end'), using=self.db)
+			except IntegrityError:
+
+				#  If a concurrent report conflicts with any of the ends, end each of
+				#  the sessions individually
+				transaction.savepoint_rollback(savepoint, using=self.db)
+				return [self.end_session(*end) for end in ends]
+			else:
+				transaction.savepoint_commit(savepoint, using=self.db)
+
+			#  Only count the sessions that this update closed, since a concurrent
+			#  report may have closed any of them first, which leaves the other
+			#  report's end event on the session
+			end_events = dict([(session.pk, session.end_event) for session, apps_used in closed])
+			updated = set([pk for pk, end_event in self.filter(pk__in=end_events.keys()).values_list('pk', 'end_event')
+				if end_events[pk] == end_event])
+			lost = set(end_events.keys()) - updated
+			if lost:
+				results = [None if session and session.pk in lost else session for session in results]
+				closed = [(session, apps_used) for session, apps_used in closed if session.pk in updated]
+
+		if closed:
+			closed_workstations = [session.workstation for session, apps_used in closed]
+			Location.objects.adjust_open_session_counts(dict([(location_id, -count)
+				for location_id, count in self._count_by_location(closed_workstations).iteritems()]))
+			sessions_ended.send(sender=self.model, workstations=closed_workstations,
+				sessions=[session for session, apps_used in closed])
+			DailyActivity.objects.record_sessions([session for session, apps_used in closed])
+			app_counts = ApplicationUse.objects.log_usage_for_sessions(closed)
+			UsageRollup.objects.record_sessions([session for session, apps_used in closed], app_counts)
+
+		return results
 
 	def filter_sessions(self, location=None, start_date=None, end_date=None, start_time=None, end_time=None, weekdays=[], related_fields=[]):
 		"""
@@ -406,7 +921,7 @@ class SessionManager(models.Manager):
 		]
 
 		if location:
-			queries.append(self._make_q('workstation__location', location, related_prefix))
+			queries.append(self._location_q(location, related_prefix))
 		if start_date:
 			queries.append(self._make_q('start_date__gte', start_date, related_prefix))
 		if end_date:
@@ -417,20 +932,42 @@ class SessionManager(models.Manager):
 			queries.append(self._make_q('end_time__lte', end_time, related_prefix))
 
 		if weekdays:
-			days = None
-			for weekday in weekdays:
-				q_key = 'start__week_day'
-				if related_prefix:
-					q_key = "%s__%s" % (related_prefix, q_key)
-				day_args = {q_key: weekday % 7 + 1}
-				if not days:
-					days = Q(**day_args)
-				else:
-					days |= Q(**day_args)
-			queries.append(days)
+			queries.append(self._weekdays_q(weekdays, related_prefix))
 
 		return queries
 
+	def _location_q(self, location, prefix=None):
+		"""Return a Q object matching the sessions recorded at the location.
+
+		Arguments:
+		location -- a Location instance
+		prefix -- an optional kwarg that will be used as a related-field prefix
+
+		Returns: a Q object
+
+		"""
+		query = self._make_q('location', location, prefix)
+		if not self.is_backfilled():
+			query |= self._make_q('location__isnull', True, prefix) & self._make_q('workstation__location', location, prefix)
+		return query
+
+	def _weekdays_q(self, weekdays, prefix=None):
+		"""Return a Q object matching the sessions started on the weekdays.
+
+		Arguments:
+		weekdays -- an iterable of ISO weekday numbers
+		prefix -- an optional kwarg that will be used as a related-field prefix
+
+		Returns: a Q object
+
+		"""
+		weekdays = list(weekdays)
+		query = self._make_q('weekday__in', weekdays, prefix)
+		if not self.is_backfilled():
+			for weekday in weekdays:
+				query |= self._make_q('weekday__isnull', True, prefix) & self._make_q('start__week_day', week_day_lookup_value(weekday), prefix)
+		return query
+
 	def _make_q(self, query, val, prefix=None):
 		"""Return a Q object describing the given query.
 
@@ -456,7 +993,7 @@ class SessionManager(models.Manager):
 		A date instance for the first session's date
 
 		"""
-		first_session = self.filter(workstation__location=location).order_by('-start_date')[:1]
+		first_session = self.filter(self._location_q(location)).order_by('-start_date')[:1]
 		try:
 			return first_session[0]
 		except IndexError:
@@ -464,7 +1001,7 @@ class SessionManager(models.Manager):
 
 	def open_for_location(self, location):
 		"""Return a queryset of open sessions at the given location."""
-		return self.filter(workstation__track=True, workstation__location=location, end__isnull=True)
+		return self.filter(self._location_q(location), workstation__track=True, end__isnull=True)
 
 	def active_session_for_workstation(self, workstation):
 		"""Get a possible active session for the workstation.
@@ -486,13 +1023,19 @@ class Session(models.Model):
 	objects     = SessionManager()
 
 	workstation = models.ForeignKey(Workstation, verbose_name=_("workstation"))
-	start       = models.DateTimeField(auto_now_add=True, verbose_name=_("session start"))
-	start_date  = models.DateField(auto_now_add=True, verbose_name=_("session start date"))
-	start_time  = models.TimeField(auto_now_add=True, verbose_name=_("session start time"))
+	location    = models.ForeignKey(Location, verbose_name=_("location"), blank=True, null=True, editable=False)
+	start       = models.DateTimeField(default=datetime.datetime.now, editable=False, verbose_name=_("session start"))
+	start_date  = models.DateField(default=datetime.date.today, editable=False, verbose_name=_("session start date"))
+	start_time  = models.TimeField(default=_current_time, editable=False, verbose_name=_("session start time"))
+	start_hour  = models.PositiveSmallIntegerField(blank=True, null=True, editable=False, verbose_name=_("session start hour"))
+	weekday     = models.PositiveSmallIntegerField(blank=True, null=True, editable=False, verbose_name=_("session start weekday"))
 	end         = models.DateTimeField(blank=True, null=True, verbose_name=_("session end"))
 	end_date    = models.DateField(blank=True, null=True, verbose_name=_("session end date"))
 	end_time    = models.TimeField(blank=True, null=True, verbose_name=_("session end time"))
+	duration_seconds = models.PositiveIntegerField(blank=True, null=True, editable=False, verbose_name=_("session duration in seconds"))
 	os_type     = models.ForeignKey(OSType, verbose_name=_("operating system"))
+	start_event = models.CharField(max_length=36, unique=True, blank=True, null=True, editable=False, verbose_name=_("start event ID"))
+	end_event   = models.CharField(max_length=36, unique=True, blank=True, null=True, editable=False, verbose_name=_("end event ID"))
 
 	class Meta:
 
@@ -513,6 +1056,205 @@ class Session(models.Model):
 		"""
 		ApplicationUse.objects.log_usage(self, reported_name, duration)
 
+class DailyActivityManager(models.Manager):
+	"""Custom manager for the DailyActivity model."""
+
+	def record_sessions(self, sessions):
+		"""Add closed sessions to the activity of the days on which they started.
+
+		The workstations of the sessions that have already closed a session on
+		the same day are found with one query, and each day's activity is then
+		updated atomically, or created if it does not yet exist.
+
+		As when the activity is rebuilt, the sessions of workstations that are not
+		tracked are ignored.
+
+		Arguments:
+		sessions -- a list of closed Session instances whose workstations are
+		            available without a query
+
+		"""
+
+		sessions = [session for session in sessions if session.workstation.track]
+		if not sessions:
+			return
+
+		#  Find the workstations that were already counted on each day
+		counted = set()
+		earlier = Session.objects.filter(
+			workstation__in=set([session.workstation_id for session in sessions]),
+			start_date__in=set([session.start_date for session in sessions]),
+			end__isnull=False).exclude(pk__in=[session.pk for session in sessions])
+		for workstation_id, start_date in earlier.values_list('workstation', 'start_date').distinct():
+			counted.add((workstation_id, start_date))
+
+		#  Total the changes to the activity of each location on each day
+		changes = {}
+		for session in sessions:
+			key = (session.workstation.location_id, session.start_date)
+			session_count, workstation_count, seconds = changes.get(key, (0, 0, 0))
+			if (session.workstation_id, session.start_date) not in counted:
+				counted.add((session.workstation_id, session.start_date))
+				workstation_count += 1
+			changes[key] = (session_count + 1, workstation_count, seconds + (session.duration_seconds or 0))
+
+		for (location_id, date), (session_count, workstation_count, seconds) in changes.iteritems():
+			increment_or_create(self.model, {'location': location_id, 'date': date},
+				{'sessions': session_count, 'workstations': workstation_count, 'total_seconds': seconds},
+				{'weekday': date.isoweekday()}, using=self.db)
+
+	def rebuild(self, locations=None):
+		"""Recompute the daily activity of locations from their closed sessions.
+
+		Arguments:
+		locations -- an optional iterable of Location instances, which defaults
+		             to every location
+
+		"""
+		activity = self.all()
+		sessions = Session.objects.filter(workstation__track=True, end__isnull=False)
+		if locations is not None:
+			activity = activity.filter(location__in=locations)
+			sessions = sessions.filter(location__in=locations)
+		activity.delete()
+
+		days = sessions.values('location', 'start_date').order_by().annotate(
+			session_count=Count('id'),
+			workstation_count=Count('workstation', distinct=True),
+			seconds=Sum('duration_seconds'))
+		bulk_insert(self.model, [self.model(
+			location_id=day['location'],
+			date=day['start_date'],
+			weekday=day['start_date'].isoweekday(),
+			sessions=day['session_count'],
+			workstations=day['workstation_count'],
+			total_seconds=day['seconds'] or 0) for day in days], using=self.db)
+
+	def transfer_workstation(self, workstation, old_location_id, new_location_id):
+		"""Move the closed sessions of a workstation between the activity of locations.
+
+		This is used when a workstation moves to another location, or starts or
+		stops being tracked, so that only the days on which it closed a session
+		are changed, rather than rebuilding the activity of either location.
+
+		Arguments:
+		workstation -- a Workstation instance
+		old_location_id -- the primary key of the location whose activity holds
+		                   the workstation's sessions, or None if none does
+		new_location_id -- the primary key of the location whose activity should
+		                   hold them, or None if none should
+
+		"""
+		if old_location_id == new_location_id:
+			return
+
+		days = Session.objects.filter(workstation=workstation, end__isnull=False).values('start_date').order_by().annotate(
+			session_count=Count('id'),
+			seconds=Sum('duration_seconds'))
+		for day in days:
+			seconds = day['seconds'] or 0
+			if old_location_id:
+				self.filter(location=old_location_id, date=day['start_date']).update(
+					sessions=F('sessions') - day['session_count'],
+					workstations=F('workstations') - 1,
+					total_seconds=F('total_seconds') - seconds)
+			if new_location_id:
+				increment_or_create(self.model, {'location': new_location_id, 'date': day['start_date']},
+					{'sessions': day['session_count'], 'workstations': 1, 'total_seconds': seconds},
+					{'weekday': day['start_date'].isoweekday()}, using=self.db)
+
+	def count_sessions(self, location, start=None, end=None):
+		"""Return the number of sessions at a location within a datetime range.
+
+		A session is counted if it started at or after `start` and, if `end` is
+		given, ended at or before `end`.  The sessions that started on the whole
+		days within the range are counted from the daily activity, so that only
+		the sessions of the partial days at either end of the range, and any
+		sessions that span its end, are counted from the sessions themselves.
+		Sessions are assumed to last no longer than the MAX_SESSION_DAYS setting.
+
+		Arguments:
+		location -- a Location instance
+		start -- an optional naive datetime instance
+		end -- an optional naive datetime instance
+
+		Returns: the integer number of sessions
+
+		"""
+
+		sessions = Session.objects.filter(Session.objects._location_q(location), workstation__track=True)
+		if start:
+			sessions = sessions.filter(start__gte=start)
+		if end:
+			sessions = sessions.filter(end__lte=end)
+
+		#  Find the first and last days on which every session start is in range
+		first_day = None
+		last_day = None
+		if start:
+			first_day = start.date()
+			if start.time() != datetime.time(0):
+				first_day += datetime.timedelta(days=1)
+		if end:
+			last_day = end.date() - datetime.timedelta(days=1)
+		if first_day and last_day and first_day > last_day:
+			return sessions.count()
+
+		#  Count the closed sessions of the whole days from their activity, less
+		#  those that ended after the range, or plus those still open
+		days = self.filter(location=location)
+		whole_days = Session.objects.filter(Session.objects._location_q(location), workstation__track=True)
+		if first_day:
+			days = days.filter(date__gte=first_day)
+			whole_days = whole_days.filter(start_date__gte=first_day)
+		if last_day:
+			days = days.filter(date__lte=last_day)
+			whole_days = whole_days.filter(start_date__lte=last_day)
+		total = days.aggregate(count=Sum('sessions'))['count'] or 0
+		if end:
+			#  Only the sessions that started within the longest session length of
+			#  the end can span it, which keeps this from scanning every later day
+			longest = datetime.timedelta(days=_settings.MAX_SESSION_DAYS)
+			total -= whole_days.filter(start_date__gte=end.date() - longest, end__gt=end).count()
+		else:
+			total += whole_days.filter(end__isnull=True).count()
+
+		#  Count the sessions of the partial days from the sessions themselves
+		partial_days = []
+		if first_day:
+			partial_days.append(Q(start_date__lt=first_day))
+		if last_day:
+			partial_days.append(Q(start_date__gt=last_day))
+		if partial_days:
+			total += sessions.filter(reduce(lambda a, b: a | b, partial_days)).count()
+
+		return total
+
+class DailyActivity(models.Model):
+	"""
+	A summary of the closed sessions that started at a location on one day, which
+	is updated as each session ends.
+	"""
+
+	objects       = DailyActivityManager()
+
+	location      = models.ForeignKey(Location, verbose_name=_("location"))
+	date          = models.DateField(verbose_name=_("date"))
+	weekday       = models.PositiveSmallIntegerField(verbose_name=_("weekday"), db_index=True)
+	sessions      = models.PositiveIntegerField(verbose_name=_("sessions"), default=0)
+	workstations  = models.PositiveIntegerField(verbose_name=_("workstations used"), default=0)
+	total_seconds = models.PositiveIntegerField(verbose_name=_("total session seconds"), default=0)
+
+	class Meta:
+
+		app_label = "panoptes"
+		unique_together = (('location', 'date'),)
+		verbose_name = _("daily activity")
+		verbose_name_plural = _("daily activity")
+
+	def __unicode__(self):
+		return u"%s %s" % (self.location, self.date)
+
 class Application(models.Model):
 	"""
 	An application used on a workstation.
@@ -536,6 +1278,47 @@ class Application(models.Model):
 	def __unicode__(self):
 		return self.name
 
+class ReportedApplicationManager(models.Manager):
+	"""Custom manager for the ReportedApplication model."""
+
+	#  A cache of the name index of each location keyed by the location's
+	#  primary key, which is cleared whenever an application changes
+	_indexes = LRUCache(_settings.APPLICATION_INDEX_CACHE_SIZE, _settings.APPLICATION_INDEX_CACHE_TIMEOUT)
+
+	def indexes_for_locations(self, location_ids):
+		"""Return the application name indexes of many locations.
+
+		The reported applications of any locations that are not cached are
+		fetched with a single query.
+
+		Arguments:
+		location_ids -- an iterable of the primary keys of Location instances
+
+		Returns: a dict mapping each location's primary key to an
+		         ApplicationNameIndex instance
+
+		"""
+		indexes = {}
+		uncached = {}
+		for location_id in set(location_ids):
+			try:
+				indexes[location_id] = self._indexes[location_id]
+			except KeyError:
+				uncached[location_id] = []
+
+		if uncached:
+			for reported in self.filter(location__in=uncached.keys()).select_related('application'):
+				uncached[reported.location_id].append(reported)
+			for location_id, reported_apps in uncached.iteritems():
+				indexes[location_id] = self._indexes[location_id] = ApplicationNameIndex(
+					reported_apps, use_prefixes=_settings.APPLICATION_PREFIX_MATCHING)
+
+		return indexes
+
+	def clear_indexes(self):
+		"""Discard the cached name index of every location."""
+		self._indexes.clear()
+
 class ReportedApplication(models.Model):
 	"""
 	The name under which the use of an application can be reported.
@@ -544,6 +1327,8 @@ class ReportedApplication(models.Model):
 	reported versions of the same application.
 	"""
 
+	objects     = ReportedApplicationManager()
+
 	name        = models.CharField(max_length=50, verbose_name=_("reported name"))
 	application = models.ForeignKey(Application, verbose_name=_("application"))
 	location    = models.ForeignKey(Location, verbose_name=_("location"))
@@ -557,6 +1342,100 @@ class ReportedApplication(models.Model):
 	def __unicode__(self):
 		return self.name
 
+class UnmatchedApplicationManager(models.Manager):
+	"""Custom manager for the UnmatchedApplication model."""
+
+	def record(self, unmatched):
+		"""Record the use of application names that could not be resolved.
+
+		The existing records for the names are found with one query, and the
+		records are then updated with one batched update and created with one
+		insert.  If a concurrent report creates a record for one of the names
+		first, each name is instead recorded individually.
+
+		Arguments:
+		unmatched -- a list of three-tuples of the form (location_id, name, duration)
+
+		"""
+
+		if not unmatched:
+			return
+
+		#  Total the uses and duration of each name at each location
+		totals = {}
+		for location_id, name, duration in unmatched:
+			uses, total_duration = totals.get((location_id, name), (0, 0))
+			totals[(location_id, name)] = (uses + 1, total_duration + duration)
+
+		now = datetime.datetime.now()
+		names = set([name for location_id, name in totals])
+		locations = set([location_id for location_id, name in totals])
+		updated = []
+		for record in self.filter(location__in=locations, name__in=names):
+			key = (record.location_id, record.name)
+			if key in totals:
+				uses, duration = totals.pop(key)
+				record.use_count += uses
+				record.total_duration += duration
+				record.last_reported = now
+				updated.append(record)
+		bulk_update(self.model, updated, ['use_count', 'total_duration', 'last_reported'], using=self.db)
+
+		savepoint = transaction.savepoint(using=self.db)
+		try:
+			bulk_insert(self.model, [self.model(location_id=location_id, name=name, use_count=uses, total_duration=duration, last_reported=now)
+									 for (location_id, name), (uses, duration) in totals.iteritems()], using=self.db)
+		except IntegrityError:
+			transaction.savepoint_rollback(savepoint, using=self.db)
+			for (location_id, name), (uses, duration) in totals.iteritems():
+				self._record_one(location_id, name, uses, duration, now)
+		else:
+			transaction.savepoint_commit(savepoint, using=self.db)
+
+	def _record_one(self, location_id, name, uses, duration, now):
+		"""Add the uses and duration to the record for a single name."""
+		records = self.filter(location=location_id, name=name)
+		if not records.update(use_count=F('use_count') + uses, total_duration=F('total_duration') + duration, last_reported=now):
+			self.create(location_id=location_id, name=name, use_count=uses, total_duration=duration, last_reported=now)
+
+	def map_to_application(self, unmatched, application):
+		"""Map an unmatched name to an application.
+
+		This creates a ReportedApplication instance for the name of the
+		UnmatchedApplication instance `unmatched` that points to `application`,
+		and then deletes the unmatched record.
+		"""
+		ReportedApplication.objects.create(name=unmatched.name, location_id=unmatched.location_id, application=application)
+		unmatched.delete()
+
+class UnmatchedApplication(models.Model):
+	"""
+	A name under which an application was reported that could not be resolved
+	to an Application instance, along with a count of its uses.
+
+	This allows an administrator to find the names that should be added as
+	ReportedApplication instances.
+	"""
+
+	objects        = UnmatchedApplicationManager()
+
+	name           = models.CharField(max_length=50, verbose_name=_("reported name"))
+	location       = models.ForeignKey(Location, verbose_name=_("location"))
+	use_count      = models.PositiveIntegerField(verbose_name=_("uses"), default=0)
+	total_duration = models.PositiveIntegerField(verbose_name=_("total duration"), default=0)
+	last_reported  = models.DateTimeField(verbose_name=_("last reported"))
+	application    = models.ForeignKey(Application, verbose_name=_("map to application"), blank=True, null=True)
+
+	class Meta:
+
+		app_label = "panoptes"
+		unique_together = (('location', 'name'),)
+		verbose_name = _("unmatched application")
+		verbose_name_plural = _("unmatched applications")
+
+	def __unicode__(self):
+		return self.name
+
 class ApplicationUseManager(models.Manager):
 	"""Custom manager for the ApplicationUse model."""
 
@@ -590,19 +1469,66 @@ class ApplicationUseManager(models.Manager):
 		reported_name -- a string of the name used to report the application
 		duration -- an integer of the number of seconds the app was used for
 		"""
+		self.log_usage_for_sessions([(session, [(reported_name, duration)])])
 
-		try:
-			application = ReportedApplication.objects.get(name=reported_name, location=session.workstation.location).application
-		except ReportedApplication.DoesNotExist:
-			return None
-		else:
-			try:
-				usage = self.get(session=session, application=application)
-			except ApplicationUse.DoesNotExist:
-				self.create(application=application, session=session, duration=duration)
-			else:
-				usage.duration += duration
-				usage.save()
+	def log_usage_for_sessions(self, sessions_apps):
+		"""Associate the usage of many applications with many sessions.
+
+		This behaves like `log_usage`, but resolves the reported names using the
+		cached name index of each location, merges repeated uses of the same
+		application in one session, and then writes every usage with one query
+		to find existing records, one insert and one batched update.  Any names
+		that cannot be resolved are recorded as unmatched applications.
+
+		Arguments:
+		sessions_apps -- a list of two-tuples of the form (session, apps_used),
+		                 with `apps_used` being a list of (reported_name, duration)
+
+		Returns: a dict mapping the primary key of each session that used any
+		         applications to the number of different applications it used
+
+		"""
+
+		sessions_apps = [(session, apps_used) for session, apps_used in sessions_apps if apps_used]
+		if not sessions_apps:
+			return {}
+		indexes = ReportedApplication.objects.indexes_for_locations(
+			[session.workstation.location_id for session, apps_used in sessions_apps])
+
+		#  Total the duration of each application used in each session
+		durations = {}
+		sessions = {}
+		unmatched = []
+		for session, apps_used in sessions_apps:
+			location_id = session.workstation.location_id
+			for reported_name, duration in apps_used:
+				application = indexes[location_id].resolve(reported_name)
+				if application:
+					key = (session.pk, application.pk)
+					durations[key] = durations.get(key, 0) + duration
+					sessions[session.pk] = session
+				else:
+					unmatched.append((location_id, reported_name, duration))
+		UnmatchedApplication.objects.record(unmatched)
+		if not durations:
+			return {}
+
+		app_counts = {}
+		for session_pk, application_pk in durations:
+			app_counts[session_pk] = app_counts.get(session_pk, 0) + 1
+
+		#  Add the durations to any existing usage records and create the rest
+		updated = []
+		for usage in self.filter(session__in=sessions.keys()):
+			key = (usage.session_id, usage.application_id)
+			if key in durations:
+				usage.duration += durations.pop(key)
+				updated.append(usage)
+		bulk_update(self.model, updated, ['duration'], using=self.db)
+		bulk_insert(self.model, [self.model(session=sessions[session_pk], application_id=application_pk, duration=duration)
+								 for (session_pk, application_pk), duration in durations.iteritems()], using=self.db)
+
+		return app_counts
 
 class ApplicationUse(models.Model):
 	"""
@@ -624,3 +1550,279 @@ class ApplicationUse(models.Model):
 
 	def __unicode__(self):
 		return self.application.__unicode__()
+
+def _end_hour(end_time):
+	"""Return the hour at or after the time of day at which a session ended."""
+	if end_time.minute or end_time.second or end_time.microsecond:
+		return end_time.hour + 1
+	return end_time.hour
+
+def _is_whole_hour(time_value):
+	"""Return True if the time instance is on the hour."""
+	return not (time_value.minute or time_value.second or time_value.microsecond)
+
+class UsageRollupManager(models.Manager):
+	"""Custom manager for the UsageRollup model."""
+
+	def _key(self, location_id, workstation_id, start_date, start_time, end_date, end_time):
+		"""Return the dict of field values identifying the rollup of a session."""
+		return {
+			'location': location_id,
+			'workstation': workstation_id,
+			'date': start_date,
+			'hour': start_time.hour,
+			'end_date': end_date,
+			'end_hour': _end_hour(end_time)
+		}
+
+	def record_sessions(self, sessions, app_counts={}):
+		"""Add closed sessions to the rollups of the hours in which they started.
+
+		Arguments:
+		sessions -- a list of closed Session instances
+		app_counts -- a dict mapping the primary keys of the sessions to the
+		              number of applications that each used
+
+		"""
+		changes = {}
+		for session in sessions:
+			key = self._key(session.location_id or session.workstation.location_id, session.workstation_id,
+				session.start_date, session.start_time, session.end_date, session.end_time)
+			key = tuple(sorted(key.items()))
+			session_count, timed_count, seconds, app_use_count = changes.get(key, (0, 0, 0, 0))
+			if session.duration_seconds is not None:
+				timed_count += 1
+				seconds += session.duration_seconds
+			changes[key] = (session_count + 1, timed_count, seconds, app_use_count + app_counts.get(session.pk, 0))
+
+		for key, (session_count, timed_count, seconds, app_use_count) in changes.iteritems():
+			key = dict(key)
+			increment_or_create(self.model, key,
+				{'session_count': session_count, 'timed_session_count': timed_count,
+				 'total_seconds': seconds, 'app_use_count': app_use_count},
+				{'weekday': key['date'].isoweekday()}, using=self.db)
+
+	def _insert_totals(self, totals):
+		"""Insert new rollups for the totals gathered by `rebuild`."""
+		new_rollups = []
+		for key, (session_count, timed_count, seconds, app_use_count) in totals.iteritems():
+			values = dict([("%s_id" % name if name in ('location', 'workstation') else name, value)
+				for name, value in key])
+			new_rollups.append(self.model(weekday=values['date'].isoweekday(), session_count=session_count,
+				timed_session_count=timed_count, total_seconds=seconds, app_use_count=app_use_count, **values))
+		bulk_insert(self.model, new_rollups, using=self.db)
+
+	def rebuild(self, locations=None, batch_size=1000):
+		"""Recompute the rollups of locations from their closed sessions.
+
+		The sessions are read in batches ordered by their start dates.  Since the
+		rollups of a session are identified by its start date, the rollups of every
+		date before that of the last session read are complete, and are inserted
+		after each batch, so that only the rollups of a single day are held at once.
+
+		Arguments:
+		locations -- an optional iterable of Location instances, which defaults
+		             to every location
+		batch_size -- the number of sessions to read at once
+
+		"""
+		rollups = self.all()
+		sessions = Session.objects.filter(end__isnull=False).order_by('start_date', 'pk')
+		if locations is not None:
+			rollups = rollups.filter(location__in=locations)
+			sessions = sessions.filter(location__in=locations)
+		rollups.delete()
+
+		totals = {}
+		last = None
+		fields = ('pk', 'location', 'workstation', 'start_date', 'start_time', 'end_date', 'end_time', 'duration_seconds')
+		while True:
+			batch_sessions = sessions
+			if last:
+				batch_sessions = sessions.filter(Q(start_date__gt=last[0]) | Q(start_date=last[0], pk__gt=last[1]))
+			batch = list(batch_sessions.values_list(*fields)[:batch_size])
+			if not batch:
+				break
+			last = (batch[-1][3], batch[-1][0])
+			app_counts = dict(ApplicationUse.objects.filter(session__in=[row[0] for row in batch]).values_list(
+				'session').order_by().annotate(count=Count('id')))
+			for pk, location_id, workstation_id, start_date, start_time, end_date, end_time, seconds in batch:
+				key = tuple(sorted(self._key(location_id, workstation_id,
+					start_date, start_time, end_date, end_time).items()))
+				session_count, timed_count, total_seconds, app_use_count = totals.get(key, (0, 0, 0, 0))
+				if seconds is not None:
+					timed_count += 1
+					total_seconds += seconds
+				totals[key] = (session_count + 1, timed_count, total_seconds, app_use_count + app_counts.get(pk, 0))
+
+			complete = dict([(key, total) for key, total in totals.iteritems() if dict(key)['date'] < last[0]])
+			self._insert_totals(complete)
+			for key in complete:
+				del totals[key]
+
+		self._insert_totals(totals)
+
+	def for_filters(self, location=None, start_date=None, end_date=None, start_time=None, end_time=None, weekdays=[]):
+		"""Return the rollups matching the session filters, or None.
+
+		The rollups can only replace the sessions matching the filters when the
+		filters exclude open sessions, by giving an end date or time, and when any
+		times given are on the hour.  If they cannot, None is returned, and the
+		sessions themselves must be used instead.
+
+		Arguments are the same as those of `SessionManager.filter_sessions`.
+
+		Returns: a queryset of UsageRollup instances or None
+
+		"""
+		if not location or not (end_date or end_time):
+			return None
+		if (start_time and not _is_whole_hour(start_time)) or (end_time and not _is_whole_hour(end_time)):
+			return None
+
+		rollups = self.filter(location=location, workstation__track=True)
+		if start_date:
+			rollups = rollups.filter(date__gte=start_date)
+		if end_date:
+			rollups = rollups.filter(end_date__lte=end_date)
+		if start_time:
+			rollups = rollups.filter(hour__gte=start_time.hour)
+		if end_time:
+			rollups = rollups.filter(end_hour__lte=end_time.hour)
+		if weekdays:
+			rollups = rollups.filter(weekday__in=list(weekdays))
+		return rollups
+
+class UsageRollup(models.Model):
+	"""
+	A summary of the closed sessions started on one workstation during one hour
+	of one day that ended during the same hour of another day, which is updated
+	as each session ends.
+
+	Because the rollups record both the hour in which their sessions started and
+	the hour at or after which they ended, they can stand in for the sessions
+	whenever the sessions are filtered by dates and whole hours.
+	"""
+
+	objects       = UsageRollupManager()
+
+	location      = models.ForeignKey(Location, verbose_name=_("location"))
+	workstation   = models.ForeignKey(Workstation, verbose_name=_("workstation"))
+	date          = models.DateField(verbose_name=_("start date"))
+	hour          = models.PositiveSmallIntegerField(verbose_name=_("start hour"))
+	weekday       = models.PositiveSmallIntegerField(verbose_name=_("start weekday"))
+	end_date      = models.DateField(verbose_name=_("end date"))
+	end_hour      = models.PositiveSmallIntegerField(verbose_name=_("end hour"))
+	session_count = models.PositiveIntegerField(verbose_name=_("sessions"), default=0)
+	timed_session_count = models.PositiveIntegerField(verbose_name=_("sessions with a duration"), default=0)
+	total_seconds = models.PositiveIntegerField(verbose_name=_("total session seconds"), default=0)
+	app_use_count = models.PositiveIntegerField(verbose_name=_("application uses"), default=0)
+
+	class Meta:
+
+		app_label = "panoptes"
+		unique_together = (('location', 'workstation', 'date', 'hour', 'end_date', 'end_hour'),)
+		verbose_name = _("usage rollup")
+		verbose_name_plural = _("usage rollups")
+
+	def __unicode__(self):
+		return u"%s %s %02d:00" % (self.workstation, self.date, self.hour)
+
+def _clear_mac_cache(sender, **kwargs):
+	"""Clear the cached MAC address resolutions when a related model changes."""
+	Workstation.objects.clear_mac_cache()
+for _model in (Location, Workstation, MACAddress):
+	post_save.connect(_clear_mac_cache, sender=_model)
+	post_delete.connect(_clear_mac_cache, sender=_model)
+
+def _remember_workstation_location(sender, instance, **kwargs):
+	"""Note the location and tracking that a workstation had before it is saved."""
+	instance._saved_location_id = None
+	instance._saved_track = None
+	if instance.pk:
+		saved = sender.objects.filter(pk=instance.pk).values_list('location', 'track')
+		if saved:
+			instance._saved_location_id, instance._saved_track = saved[0]
+
+def _update_workstation_locations(sender, instance, **kwargs):
+	"""Recount and bump the versions of the locations whose workstations changed.
+
+	The workstation's sessions are also moved between the daily activity of the
+	locations when it moves to another location or starts or stops being tracked.
+	"""
+	saved_location_id = getattr(instance, '_saved_location_id', None)
+	location_ids = set([instance.location_id, saved_location_id])
+	location_ids.discard(None)
+	if kwargs.get('signal') is post_save and saved_location_id:
+		if len(location_ids) > 1:
+			Session.objects.filter(workstation=instance).update(location=instance.location_id)
+			UsageRollup.objects.filter(workstation=instance).update(location=instance.location_id)
+		DailyActivity.objects.transfer_workstation(instance,
+			instance._saved_track and saved_location_id or None,
+			instance.track and instance.location_id or None)
+	Location.objects.reconcile_counts(location_ids)
+	Location.objects.bump_versions(location_ids)
+pre_save.connect(_remember_workstation_location, sender=Workstation)
+post_save.connect(_update_workstation_locations, sender=Workstation)
+post_delete.connect(_update_workstation_locations, sender=Workstation)
+
+def _refresh_location_counts(sender, instance, **kwargs):
+	"""Keep the saving of a location from overwriting its stored counts and version."""
+	if instance.pk:
+		saved = sender.objects.filter(pk=instance.pk).values('workstation_count', 'open_session_count', 'version', 'history_version')
+		if saved:
+			instance.workstation_count = saved[0]['workstation_count']
+			instance.open_session_count = saved[0]['open_session_count']
+			instance.version = saved[0]['version']
+			instance.history_version = saved[0]['history_version']
+
+def _bump_location_version(sender, instance, **kwargs):
+	"""Bump the version of a location that changed."""
+	Location.objects.bump_versions([instance.pk])
+pre_save.connect(_refresh_location_counts, sender=Location)
+post_save.connect(_bump_location_version, sender=Location)
+
+def _bump_session_versions(sender, workstations, sessions=[], **kwargs):
+	"""Bump the versions of the locations at which sessions started or ended.
+
+	The history versions of the locations are only bumped when a session closed
+	on an earlier day, as when its end is moved back by a time offset or is
+	applied late from the ingest queue, since only closed sessions are counted
+	in the data of past days.
+	"""
+	today = datetime.date.today()
+	past = set([session.location_id or session.workstation.location_id
+		for session in sessions if session.end_date and session.end_date < today])
+	Location.objects.bump_versions(past)
+	Location.objects.bump_versions(set([workstation.location_id for workstation in workstations]) - past, history=False)
+sessions_started.connect(_bump_session_versions)
+sessions_ended.connect(_bump_session_versions)
+
+def _bump_layout_version(sender, instance, **kwargs):
+	"""Bump the version of a location whose layout or MAC addresses changed."""
+	try:
+		if isinstance(instance, LayoutRow):
+			location_id = instance.location_id
+		elif isinstance(instance, LayoutCell):
+			location_id = instance.row.location_id
+		else:
+			location_id = instance.workstation.location_id
+	except ObjectDoesNotExist:
+		return
+	Location.objects.bump_versions([location_id])
+for _model in (LayoutRow, LayoutCell, MACAddress):
+	post_save.connect(_bump_layout_version, sender=_model)
+	post_delete.connect(_bump_layout_version, sender=_model)
+
+def _clear_os_types(sender, **kwargs):
+	"""Clear the cached OS types when one changes."""
+	OSType.objects.clear_cache()
+post_save.connect(_clear_os_types, sender=OSType)
+post_delete.connect(_clear_os_types, sender=OSType)
+
+def _clear_application_indexes(sender, **kwargs):
+	"""Clear the cached application name indexes when an application changes."""
+	ReportedApplication.objects.clear_indexes()
+for _model in (Application, ReportedApplication):
+	post_save.connect(_clear_application_indexes, sender=_model)
+	post_delete.connect(_clear_application_indexes, sender=_model)
@@ -0,0 +1,200 @@
+
+from django.core.cache import cache as default_cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.importlib import import_module
+
+import panoptes.settings as _settings
+
+from collections import deque
+
+import threading
+import time
+
+class BaseBackend(object):
+	"""
+	A publish/subscribe backend that delivers messages published on a named
+	channel to every subscriber of that channel.
+
+	Each message published on a channel is given an integer ID that is greater
+	than that of the message before it, which allows a subscriber to resume
+	reading a channel after the last message that it read.
+	"""
+
+	def publish(self, channel, message):
+		"""Publish a message on the channel.
+
+		Arguments:
+		channel -- the string name of the channel
+		message -- any object that can be encoded as JSON
+
+		Returns: the integer ID of the published message
+
+		"""
+		raise NotImplementedError
+
+	def last_id(self, channel):
+		"""Return the ID of the last message published on the channel, or 0."""
+		raise NotImplementedError
+
+	def read(self, channel, after_id, timeout):
+		"""Return the messages published on the channel after the given ID.
+
+		If no such messages exist, this waits up to `timeout` seconds for one to
+		be published.
+
+		Arguments:
+		channel -- the string name of the channel
+		after_id -- the ID of the last message that the caller has read
+		timeout -- the maximum number of seconds to wait for a message
+
+		Returns: a list of two-tuples of the form (message_id, message), which is
+		         empty if none were published before the timeout, or None if
+		         some of the messages after `after_id` are no longer held
+
+		"""
+		raise NotImplementedError
+
+class _Channel(object):
+	"""The messages held by the local backend for a single channel."""
+
+	def __init__(self, history_size):
+		self.messages = deque(maxlen=history_size)
+		self.last_id = 0
+		self.condition = threading.Condition()
+
+class LocalBackend(BaseBackend):
+	"""
+	A backend that delivers messages between the threads of a single process,
+	holding a limited number of recent messages on each channel so that
+	subscribers can resume reading after a reconnection.
+
+	Waiting subscribers share one condition per channel, so a published message
+	wakes each subscriber once, no matter how many subscribe to the channel.
+	"""
+
+	def __init__(self, history_size=None):
+		self.history_size = history_size or _settings.PUBSUB_HISTORY_SIZE
+		self._channels = {}
+		self._lock = threading.Lock()
+
+	def _channel(self, name):
+		"""Return the channel with the given name, creating it if needed."""
+		self._lock.acquire()
+		try:
+			try:
+				return self._channels[name]
+			except KeyError:
+				channel = self._channels[name] = _Channel(self.history_size)
+				return channel
+		finally:
+			self._lock.release()
+
+	def publish(self, channel, message):
+		channel = self._channel(channel)
+		channel.condition.acquire()
+		try:
+			channel.last_id += 1
+			channel.messages.append((channel.last_id, message))
+			channel.condition.notifyAll()
+			return channel.last_id
+		finally:
+			channel.condition.release()
+
+	def last_id(self, channel):
+		return self._channel(channel).last_id
+
+	def _messages_after(self, channel, after_id):
+		"""Return the held messages after the ID, or None if some were discarded."""
+		if after_id > channel.last_id:
+			return None
+		if after_id == channel.last_id:
+			return []
+		if not channel.messages or channel.messages[0][0] > after_id + 1:
+			return None
+		return [(message_id, message) for message_id, message in channel.messages if message_id > after_id]
+
+	def read(self, channel, after_id, timeout):
+		channel = self._channel(channel)
+		channel.condition.acquire()
+		try:
+			messages = self._messages_after(channel, after_id)
+			if messages == []:
+				channel.condition.wait(timeout)
+				messages = self._messages_after(channel, after_id)
+			return messages
+		finally:
+			channel.condition.release()
+
+class CacheBackend(BaseBackend):
+	"""
+	A backend that delivers messages between processes, and between hosts, by
+	storing them in a Django cache that they share, such as memcached.
+
+	Each channel's last message ID is kept in a cache key that is incremented
+	atomically when a message is published, and each message is kept in a key of
+	its own.  Subscribers poll the last ID of their channel, so a message is read
+	up to one poll interval after it is published.
+	"""
+
+	def __init__(self, history_size=None, cache=None, poll_interval=None, timeout=None):
+		self.history_size = history_size or _settings.PUBSUB_HISTORY_SIZE
+		self.cache = cache or default_cache
+		self.poll_interval = poll_interval or _settings.PUBSUB_POLL_INTERVAL
+		self.timeout = timeout or _settings.PUBSUB_CACHE_TIMEOUT
+
+	def _last_id_key(self, channel):
+		return "%s:last-id" % channel
+
+	def _message_key(self, channel, message_id):
+		return "%s:%d" % (channel, message_id)
+
+	def publish(self, channel, message):
+		key = self._last_id_key(channel)
+		self.cache.add(key, 0, self.timeout)
+		try:
+			message_id = self.cache.incr(key)
+		except ValueError:
+			self.cache.set(key, 1, self.timeout)
+			message_id = 1
+		self.cache.set(self._message_key(channel, message_id), message, self.timeout)
+		return message_id
+
+	def last_id(self, channel):
+		return self.cache.get(self._last_id_key(channel), 0)
+
+	def _messages_after(self, channel, after_id, last_id):
+		"""Return the held messages after the ID, or None if some were discarded."""
+		if after_id > last_id or last_id - after_id > self.history_size:
+			return None
+		message_ids = range(after_id + 1, last_id + 1)
+		held = self.cache.get_many([self._message_key(channel, message_id) for message_id in message_ids])
+		messages = []
+		for message_id in message_ids:
+			key = self._message_key(channel, message_id)
+			if key not in held:
+				return None
+			messages.append((message_id, held[key]))
+		return messages
+
+	def read(self, channel, after_id, timeout):
+		stop_at = time.time() + timeout
+		while True:
+			last_id = self.last_id(channel)
+			if last_id != after_id or time.time() >= stop_at:
+				return self._messages_after(channel, after_id, last_id)
+			time.sleep(max(min(self.poll_interval, stop_at - time.time()), 0))
+
+_backend = None
+
+def get_backend():
+	"""Return the publish/subscribe backend named by the PUBSUB_BACKEND setting."""
+	global _backend
+	if not _backend:
+		module_name, class_name = _settings.PUBSUB_BACKEND.rsplit(".", 1)
+		try:
+			backend_class = getattr(import_module(module_name), class_name)
+		except (ImportError, AttributeError), e:
+			raise ImproperlyConfigured("Could not load the publish/subscribe backend %(backend)s: %(error)s" % {
+				'backend': _settings.PUBSUB_BACKEND, 'error': e})
+		_backend = backend_class()
+	return _backend
@@ -0,0 +1,12 @@
+
+from django.dispatch import Signal
+
+#  Sent by the Session manager once sessions have been started, with the list
+#  of the Workstation instances at which they started and the matching list of
+#  the new Session instances
+sessions_started = Signal(providing_args=["workstations", "sessions"])
+
+#  Sent by the Session manager once sessions have been ended or discarded, with
+#  the list of the Workstation instances at which they were open and the list of
+#  the Session instances that were closed, which is empty if they were discarded
+sessions_ended = Signal(providing_args=["workstations", "sessions"])
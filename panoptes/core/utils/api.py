@@ -1,4 +1,6 @@
 
+from django.http import HttpResponse, HttpResponseNotModified
+
 from piston.resource import Resource
 from piston.decorator import decorator
 from piston.utils import FormValidationError
@@ -10,6 +12,13 @@ class CSRFExemptResource(Resource):
 		super(CSRFExemptResource, self).__init__(*args, **kwargs)
 		self.csrf_exempt = True
 
+	def __call__(self, request, *args, **kwargs):
+		"""Add any headers set by the handler to the response."""
+		response = super(CSRFExemptResource, self).__call__(request, *args, **kwargs)
+		for header, value in getattr(request, 'response_headers', {}).iteritems():
+			response[header] = value
+		return response
+
 def validate(v_form, operation='POST'):
 	@decorator
 	def wrap(f, self, request, *a, **kwa):
@@ -21,3 +30,32 @@ def validate(v_form, operation='POST'):
 			raise FormValidationError(form)
 	return wrap
 
+def accepted():
+	"""Return a response indicating that a request was accepted for later processing."""
+	return HttpResponse("Accepted", content_type="text/plain", status=202)
+
+def not_modified(request, etag):
+	"""Return a 304 response if the client already has the data with the given ETag.
+
+	If the ETag is not among those given in the request's If-None-Match header,
+	None is returned and the ETag is added to the headers of the response that
+	the handler returns.
+
+	Arguments:
+	request -- the HttpRequest being handled
+	etag -- the quoted ETag string of the current version of the data
+
+	Returns: an HttpResponseNotModified instance or None
+
+	"""
+	if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+	if if_none_match:
+		tags = [tag.strip() for tag in if_none_match.split(",")]
+		if etag in tags or "*" in tags:
+			response = HttpResponseNotModified()
+			response['ETag'] = etag
+			return response
+	if not hasattr(request, 'response_headers'):
+		request.response_headers = {}
+	request.response_headers['ETag'] = etag
+	return None
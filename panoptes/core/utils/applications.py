@@ -0,0 +1,102 @@
+
+import re
+
+_SUFFIX_SEARCH = re.compile(r'\.(exe|app)$', re.I)
+_VERSION_SEARCH = re.compile(r'\b(v|version\s*)?\d+([._]\d+)*[a-z]?\b', re.I)
+_SEPARATOR_SEARCH = re.compile(r'[\s_\-]+')
+
+#  A marker for a normalized name shared by more than one application
+_AMBIGUOUS = object()
+
+def normalize_application_name(name):
+	"""Return a normalized version of a reported application name.
+
+	The name is lowercased, stripped of any ".exe" or ".app" extension and any
+	version numbers, and has runs of spaces, hyphens and underscores reduced to
+	a single space, so that "Microsoft Word 2016" and "microsoft_word" are both
+	normalized as "microsoft word".
+	"""
+	name = _SUFFIX_SEARCH.sub("", name.strip())
+	normalized = _SEPARATOR_SEARCH.sub(" ", _VERSION_SEARCH.sub(" ", name)).strip().lower()
+	return normalized or name.lower()
+
+class ApplicationNameIndex(object):
+	"""
+	An index that resolves the names under which applications are reported at one
+	location to Application instances.
+
+	A name is first matched exactly against the reported application names.  If
+	no exact match exists, the normalized name is matched against the normalized
+	reported names, and then, if prefix matching is used, against the longest
+	normalized reported name that begins the normalized name on a word boundary,
+	so that "Microsoft Word for Mac" can match a reported name of "Microsoft
+	Word".  Normalized names shared by reported names of different applications
+	are never used for matching.
+	"""
+
+	def __init__(self, reported_apps, use_prefixes=True):
+		"""Build the index.
+
+		Arguments:
+		reported_apps -- an iterable of ReportedApplication instances whose
+		                 `application` is available without a query
+		use_prefixes -- whether to match names by their normalized prefixes
+
+		"""
+		self._exact = {}
+		self._normalized = {}
+		self._prefixes = {} if use_prefixes else None
+
+		for reported in reported_apps:
+			self._exact[reported.name] = reported.application
+			key = normalize_application_name(reported.name)
+			self._add_normalized(key, reported.application)
+			if self._prefixes is not None:
+				self._add_prefix(key.split(" "), reported.application)
+
+	def __len__(self):
+		return len(self._exact)
+
+	def _merge(self, existing, application):
+		"""Return the value stored for a key shared by an existing value and an app."""
+		if existing is None or existing == application:
+			return application
+		return _AMBIGUOUS
+
+	def _add_normalized(self, key, application):
+		"""Add the application under the normalized name."""
+		self._normalized[key] = self._merge(self._normalized.get(key, None), application)
+
+	def _add_prefix(self, words, application):
+		"""Add the application to the prefix trie under the list of words."""
+		node = self._prefixes
+		for word in words:
+			node = node.setdefault(word, {})
+		node[None] = self._merge(node.get(None, None), application)
+
+	def _longest_prefix(self, words):
+		"""Return the value of the longest key in the prefix trie starting the words."""
+		found = None
+		node = self._prefixes
+		for word in words:
+			node = node.get(word, None)
+			if node is None:
+				break
+			found = node.get(None, found)
+		return found
+
+	def resolve(self, name):
+		"""Return the Application instance matched by the name, or None."""
+
+		try:
+			return self._exact[name]
+		except KeyError:
+			pass
+
+		key = normalize_application_name(name)
+		application = self._normalized.get(key, None)
+		if application is None and self._prefixes is not None:
+			application = self._longest_prefix(key.split(" "))
+		if application is _AMBIGUOUS:
+			return None
+		return application
@@ -0,0 +1,74 @@
+
+from collections import OrderedDict
+
+import threading
+import time
+
+class LRUCache(object):
+	"""
+	A thread-safe in-process cache that holds at most a given number of entries,
+	discarding the least recently used entry when full, and that expires each
+	entry after a given number of seconds.
+
+	Entries are accessed like those of a dict, with a KeyError raised for any
+	missing or expired key.  The number of successful and failed lookups are
+	tracked by the `hits` and `misses` attributes.
+	"""
+
+	def __init__(self, max_size, timeout):
+		"""Create an empty cache.
+
+		Arguments:
+		max_size -- the maximum number of entries to hold
+		timeout -- the number of seconds after which an entry expires
+
+		"""
+		self.max_size = max_size
+		self.timeout = timeout
+		self.hits = 0
+		self.misses = 0
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	def __len__(self):
+		return len(self._entries)
+
+	def __getitem__(self, key):
+		"""Return the unexpired value for the key, marking it as recently used."""
+		with self._lock:
+			try:
+				expires, value = self._entries.pop(key)
+			except KeyError:
+				self.misses += 1
+				raise
+			if expires < time.time():
+				self.misses += 1
+				raise KeyError(key)
+			self._entries[key] = (expires, value)
+			self.hits += 1
+			return value
+
+	def __setitem__(self, key, value):
+		"""Store the value, discarding the least recently used entry if full."""
+		with self._lock:
+			self._entries.pop(key, None)
+			while self._entries and len(self._entries) >= self.max_size:
+				self._entries.popitem(last=False)
+			self._entries[key] = (time.time() + self.timeout, value)
+
+	def __delitem__(self, key):
+		with self._lock:
+			del self._entries[key]
+
+	def clear(self):
+		"""Remove every entry from the cache."""
+		with self._lock:
+			self._entries.clear()
+
+	def stats(self):
+		"""Return a dict of the size of the cache and its hit and miss counts."""
+		return {
+			'size': len(self._entries),
+			'hits': self.hits,
+			'misses': self.misses
+		}
@@ -9,6 +9,14 @@ def weekday_name(iso_number):
 	except IndexError:
 		return u""
 
+def week_day_lookup_value(iso_number):
+	"""Return the value of a `week_day` lookup matching the ISO weekday number.
+
+	Django's `week_day` lookup numbers the days from Sunday as 1 to Saturday as 7,
+	while ISO weekday numbers run from Monday as 1 to Sunday as 7.
+	"""
+	return iso_number % 7 + 1
+
 WEEKDAYS = tuple([_WEEKDAYS[i] for i in sorted(_WEEKDAYS.keys())])
 WEEKDAYS_ABBR = tuple([_WEEKDAYS_ABBR[i] for i in sorted(_WEEKDAYS_ABBR.keys())])
 WEEKDAYS_SINGLE_LETTER = (_('M'), _('T'), _('W'), _('R'), _('F'), _('S'), _('U'))
@@ -0,0 +1,15 @@
+
+def total_seconds(delta):
+	"""Return the whole number of seconds spanned by a timedelta.
+
+	Unlike the `seconds` attribute of a timedelta, this includes any whole days
+	in the span, so a span of a day and a minute gives 86460 seconds.
+
+	Arguments:
+	delta -- a timedelta instance
+
+	Returns: an integer of the number of seconds, which is negative if the
+	         timedelta is negative
+
+	"""
+	return delta.days * 86400 + delta.seconds
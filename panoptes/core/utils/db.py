@@ -0,0 +1,122 @@
+
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+
+def _local_fields(model):
+	"""Return the concrete fields of the model, excluding its auto primary key."""
+	return [field for field in model._meta.local_fields if not field.primary_key]
+
+def bulk_insert(model, instances, using="default"):
+	"""Insert every unsaved model instance given with a single batched statement.
+
+	Any `auto_now` or `auto_now_add` fields are populated in the same way that
+	they would be by a call to `save()`, but no signals are sent and the primary
+	keys of the instances are not set.
+
+	Arguments:
+	model -- the model class of the instances
+	instances -- a list of unsaved instances of the model
+	using -- the optional alias of the database to use
+
+	"""
+
+	if not instances:
+		return
+
+	connection = connections[using]
+	qn = connection.ops.quote_name
+	fields = _local_fields(model)
+
+	rows = []
+	for instance in instances:
+		rows.append([field.get_db_prep_save(field.pre_save(instance, True), connection=connection)
+					for field in fields])
+
+	sql = "INSERT INTO %(table)s (%(columns)s) VALUES (%(values)s)" % {
+		'table': qn(model._meta.db_table),
+		'columns': ", ".join([qn(field.column) for field in fields]),
+		'values': ", ".join(["%s"] * len(fields))
+	}
+	cursor = connection.cursor()
+	cursor.executemany(sql, rows)
+	transaction.commit_unless_managed(using=using)
+
+def bulk_update(model, instances, field_names, condition=None, using="default"):
+	"""Save the given fields of every model instance with a single batched statement.
+
+	Since the number of rows updated by each instance is not reported by every
+	database for a batched statement, a caller using a `condition` should check
+	which rows were updated afterwards.
+
+	Arguments:
+	model -- the model class of the instances
+	instances -- a list of saved instances of the model
+	field_names -- a list of the names of the fields to update
+	condition -- an optional SQL condition that a row must also meet to be updated
+	using -- the optional alias of the database to use
+
+	"""
+
+	if not instances:
+		return
+
+	connection = connections[using]
+	qn = connection.ops.quote_name
+	opts = model._meta
+	fields = [opts.get_field(name) for name in field_names]
+
+	rows = []
+	for instance in instances:
+		row = [field.get_db_prep_save(getattr(instance, field.attname), connection=connection)
+			   for field in fields]
+		row.append(instance.pk)
+		rows.append(row)
+
+	sql = "UPDATE %(table)s SET %(assignments)s WHERE %(pk)s = %%s" % {
+		'table': qn(opts.db_table),
+		'assignments': ", ".join(["%s = %%s" % qn(field.column) for field in fields]),
+		'pk': qn(opts.pk.column)
+	}
+	if condition:
+		sql += " AND (%s)" % condition
+	cursor = connection.cursor()
+	cursor.executemany(sql, rows)
+	transaction.commit_unless_managed(using=using)
+
+def increment_or_create(model, lookup, increments, defaults={}, using="default"):
+	"""Atomically add to the counters of the row matching the lookup.
+
+	If no row matches, one is created with the increments as its counters, and
+	if a concurrent call creates the row first, the counters are added to it.
+
+	Arguments:
+	model -- the model class of the row
+	lookup -- a dict of the field values that identify the row, in which any
+	          foreign keys can be given as model instances or primary keys
+	increments -- a dict mapping the names of integer fields to the amounts to
+	              add to them
+	defaults -- a dict of any other field values to use when creating the row
+	using -- the optional alias of the database to use
+
+	"""
+	rows = model._default_manager.using(using).filter(**lookup)
+	updates = dict([(name, F(name) + amount) for name, amount in increments.iteritems()])
+	if rows.update(**updates):
+		return
+
+	#  Give the values of any foreign keys as primary keys
+	values = {}
+	for name, value in defaults.items() + lookup.items() + increments.items():
+		field = model._meta.get_field(name)
+		if field.rel and not hasattr(value, '_meta'):
+			name = field.attname
+		values[name] = value
+
+	savepoint = transaction.savepoint(using=using)
+	try:
+		model(**values).save(force_insert=True, using=using)
+	except IntegrityError:
+		transaction.savepoint_rollback(savepoint, using=using)
+		rows.update(**updates)
+	else:
+		transaction.savepoint_commit(savepoint, using=using)
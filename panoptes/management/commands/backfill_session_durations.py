@@ -0,0 +1,42 @@
+
+from django.core.management.base import NoArgsCommand
+
+from panoptes.core.models import Session
+from panoptes.core.utils.db import bulk_update
+from panoptes.core.utils.dates import total_seconds
+
+from optparse import make_option
+
+class Command(NoArgsCommand):
+	"""Store the duration of each closed session that lacks one."""
+
+	help = "Computes the stored duration of closed sessions recorded without one."
+
+	option_list = NoArgsCommand.option_list + (
+		make_option('--batch-size', action='store', type='int', dest='batch_size',
+			default=1000,
+			help="The number of sessions to update at once"),
+	)
+
+	def handle_noargs(self, **options):
+		"""Update the sessions in batches ordered by their primary keys."""
+
+		verbosity = int(options.get('verbosity', 1))
+		missing = Session.objects.filter(end__isnull=False, duration_seconds__isnull=True).order_by('pk')
+		last_pk = 0
+		updated = 0
+
+		while True:
+			sessions = list(missing.filter(pk__gt=last_pk).only('pk', 'start', 'end')[:options['batch_size']])
+			if not sessions:
+				break
+			for session in sessions:
+				session.duration_seconds = max(total_seconds(session.end - session.start), 0)
+			bulk_update(Session, sessions, ['duration_seconds'])
+			last_pk = sessions[-1].pk
+			updated += len(sessions)
+			if verbosity > 1:
+				print "Updated %(count)d sessions" % {'count': updated}
+
+		if verbosity > 0:
+			print "Stored the duration of %(count)d sessions" % {'count': updated}
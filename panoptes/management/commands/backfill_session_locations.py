@@ -0,0 +1,30 @@
+
+from django.core.management.base import NoArgsCommand
+from django.db import connection, transaction
+
+from panoptes.core.models import Session, Workstation
+
+class Command(NoArgsCommand):
+	"""Store the location of each session that lacks one."""
+
+	help = "Copies the location of each session's workstation to sessions recorded without one."
+
+	def handle_noargs(self, **options):
+		"""Update every session lacking a location with a single statement."""
+
+		qn = connection.ops.quote_name
+		sessions = Session._meta
+		workstations = Workstation._meta
+		cursor = connection.cursor()
+		cursor.execute("UPDATE %(sessions)s SET %(location)s = (SELECT %(ws_location)s FROM %(workstations)s WHERE %(workstations)s.%(ws_pk)s = %(sessions)s.%(workstation)s) WHERE %(location)s IS NULL" % {
+			'sessions': qn(sessions.db_table),
+			'location': qn(sessions.get_field('location').column),
+			'workstation': qn(sessions.get_field('workstation').column),
+			'workstations': qn(workstations.db_table),
+			'ws_location': qn(workstations.get_field('location').column),
+			'ws_pk': qn(workstations.pk.column)
+		})
+		transaction.commit_unless_managed()
+
+		if int(options.get('verbosity', 1)) > 0:
+			print "Stored the location of %(count)d sessions" % {'count': cursor.rowcount}
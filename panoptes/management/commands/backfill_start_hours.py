@@ -0,0 +1,24 @@
+
+from django.core.management.base import NoArgsCommand
+
+from panoptes.core.models import Session
+
+import datetime
+
+class Command(NoArgsCommand):
+	"""Store the starting hour of each session that lacks one."""
+
+	help = "Stores the starting hour of sessions recorded without one."
+
+	def handle_noargs(self, **options):
+		"""Update the sessions starting in each hour with a single statement."""
+
+		sessions = 0
+		for hour in xrange(0, 24):
+			started = Session.objects.filter(start_hour__isnull=True, start_time__gte=datetime.time(hour))
+			if hour < 23:
+				started = started.filter(start_time__lt=datetime.time(hour + 1))
+			sessions += started.update(start_hour=hour)
+
+		if int(options.get('verbosity', 1)) > 0:
+			print "Stored the starting hour of %(count)d sessions" % {'count': sessions}
@@ -0,0 +1,22 @@
+
+from django.core.management.base import NoArgsCommand
+
+from panoptes.core.models import DailyActivity, Session
+from panoptes.core.utils.constants import week_day_lookup_value
+
+class Command(NoArgsCommand):
+	"""Store the ISO weekday of each session and daily activity that lacks one."""
+
+	help = "Stores the weekday of sessions and daily activity recorded without one."
+
+	def handle_noargs(self, **options):
+		"""Update the rows of each weekday with a single statement per model."""
+
+		sessions = 0
+		for weekday in xrange(1, 8):
+			week_day = week_day_lookup_value(weekday)
+			sessions += Session.objects.filter(weekday__isnull=True, start__week_day=week_day).update(weekday=weekday)
+			DailyActivity.objects.filter(date__week_day=week_day).exclude(weekday=weekday).update(weekday=weekday)
+
+		if int(options.get('verbosity', 1)) > 0:
+			print "Stored the weekday of %(count)d sessions" % {'count': sessions}
@@ -0,0 +1,101 @@
+
+from django.core.management.base import NoArgsCommand
+from django.db import transaction
+
+from panoptes.tracking.batch import SessionEventBatch
+from panoptes.tracking.models import clear_process_caches
+from panoptes.tracking.spool import get_spool
+import panoptes.settings as _settings
+
+from optparse import make_option
+
+import time
+import traceback
+
+@transaction.commit_on_success
+def _commit_events(events):
+	"""Apply the events in a single transaction and return their statuses."""
+	return SessionEventBatch(events).process()
+
+def _apply_events(events):
+	"""Apply the events in a single transaction and return their statuses.
+
+	If the transaction is rolled back, the caches of the process are cleared,
+	since they may hold workstations or OS types created in the transaction.
+	"""
+	try:
+		return _commit_events(events)
+	except Exception:
+		clear_process_caches()
+		raise
+
+class Command(NoArgsCommand):
+	"""Apply the session starts and ends held in the ingest queue."""
+
+	help = "Applies queued session starts and ends in batches until stopped."
+
+	option_list = NoArgsCommand.option_list + (
+		make_option('--batch-size', action='store', type='int', dest='batch_size',
+			default=_settings.INGEST_QUEUE_BATCH_SIZE,
+			help="The maximum number of events to apply at once"),
+		make_option('--interval', action='store', type='float', dest='interval',
+			default=_settings.INGEST_QUEUE_FLUSH_INTERVAL,
+			help="The number of seconds to wait before checking an empty queue again"),
+		make_option('--once', action='store_true', dest='once', default=False,
+			help="Stop once the queue is empty instead of waiting for new events"),
+	)
+
+	def _apply_singly(self, spool, events, verbosity):
+		"""Apply the events of a failed batch one at a time.
+
+		Any event that still cannot be applied is moved to the spool's failed
+		events, so that the events queued after it can be applied.
+
+		Arguments:
+		spool -- the EventSpool holding the events
+		events -- a list of two-tuples of the form (spool_id, event)
+		verbosity -- the verbosity level of the command
+
+		Returns: a list as long as the list of events of the status of each
+		         event, which is None for each failed event
+
+		"""
+		statuses = []
+		for spool_id, event in events:
+			try:
+				status = _apply_events([event])[0]
+			except Exception:
+				spool.fail(spool_id, traceback.format_exc())
+				if verbosity > 0:
+					print "Moved queued event %(id)d to the failed events" % {'id': spool_id}
+				statuses.append(None)
+			else:
+				spool.remove([spool_id])
+				statuses.append(status)
+		return statuses
+
+	def handle_noargs(self, **options):
+		"""Drain the queue, waiting for new events once it is empty."""
+
+		spool = get_spool()
+		verbosity = int(options.get('verbosity', 1))
+
+		while True:
+			events = spool.peek(options['batch_size'])
+			if events:
+				try:
+					statuses = _apply_events([event for spool_id, event in events])
+				except Exception:
+					statuses = self._apply_singly(spool, events, verbosity)
+				else:
+					spool.remove([spool_id for spool_id, event in events])
+				if verbosity > 1:
+					print "Applied %(applied)d of %(total)d queued events" % {
+						'applied': len([status for status in statuses if status not in (None, SessionEventBatch.STATUS_REJECTED)]),
+						'total': len(events)}
+
+			#  Only wait for more events if the last batch did not fill the limit
+			if len(events) < options['batch_size']:
+				if options['once']:
+					break
+				time.sleep(options['interval'])
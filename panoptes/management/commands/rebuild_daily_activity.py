@@ -0,0 +1,27 @@
+
+from django.core.management.base import BaseCommand, CommandError
+
+from panoptes.core.models import DailyActivity, Location, Session
+
+class Command(BaseCommand):
+	"""Recompute the daily activity of locations from their closed sessions."""
+
+	args = "[location_slug ...]"
+	help = "Recomputes the daily activity of the given locations, or of every location, from their closed sessions."
+
+	def handle(self, *location_slugs, **options):
+		"""Rebuild the activity of the named locations or of all locations."""
+
+		if not Session.objects.is_backfilled():
+			raise CommandError("Some sessions lack a location or weekday, so run backfill_session_locations and backfill_weekdays first")
+
+		locations = None
+		if location_slugs:
+			locations = list(Location.objects.filter(slug__in=location_slugs))
+		DailyActivity.objects.rebuild(locations)
+
+		if int(options.get('verbosity', 1)) > 0:
+			days = DailyActivity.objects.all()
+			if locations is not None:
+				days = days.filter(location__in=locations)
+			print "Rebuilt the activity of %(count)d days" % {'count': days.count()}
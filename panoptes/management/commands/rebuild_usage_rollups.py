@@ -0,0 +1,38 @@
+
+from django.core.management.base import BaseCommand, CommandError
+
+from panoptes.core.models import Location, Session, UsageRollup
+
+from optparse import make_option
+
+class Command(BaseCommand):
+	"""Recompute the usage rollups of locations from their closed sessions."""
+
+	args = "[location_slug ...]"
+	help = "Recomputes the usage rollups of the given locations, or of every location, from their closed sessions."
+
+	option_list = BaseCommand.option_list + (
+		make_option('--batch-size', action='store', type='int', dest='batch_size',
+			default=1000,
+			help="The number of sessions to read at once"),
+	)
+
+	def handle(self, *location_slugs, **options):
+		"""Rebuild the rollups of the named locations or of all locations."""
+
+		if not Session.objects.is_backfilled():
+			raise CommandError("Some sessions lack a location or weekday, so run backfill_session_locations and backfill_weekdays first")
+
+		locations = None
+		if location_slugs:
+			locations = list(Location.objects.filter(slug__in=location_slugs))
+		UsageRollup.objects.rebuild(locations, options['batch_size'])
+
+		if int(options.get('verbosity', 1)) > 0:
+			rollups = UsageRollup.objects.all()
+			sessions = Session.objects.filter(end__isnull=False)
+			if locations is not None:
+				rollups = rollups.filter(location__in=locations)
+				sessions = sessions.filter(location__in=locations)
+			print "Rebuilt %(count)d usage rollups from %(sessions)d sessions" % {
+				'count': rollups.count(), 'sessions': sessions.count()}
@@ -0,0 +1,25 @@
+
+from django.core.management.base import BaseCommand
+
+from panoptes.core.models import Location
+
+class Command(BaseCommand):
+	"""Recount the stored workstation and open session counts of locations."""
+
+	args = "[location_slug ...]"
+	help = "Recounts the stored workstation and open session counts of the given locations, or of every location."
+
+	def handle(self, *location_slugs, **options):
+		"""Reconcile the counts of the named locations or of all locations."""
+
+		locations = Location.objects.all()
+		if location_slugs:
+			locations = locations.filter(slug__in=location_slugs)
+		Location.objects.reconcile_counts(locations)
+
+		if int(options.get('verbosity', 1)) > 0:
+			for location in Location.objects.filter(pk__in=[location.pk for location in locations]):
+				print "%(name)s: %(open)d open sessions on %(total)d workstations" % {
+					'name': location.name,
+					'open': location.open_session_count,
+					'total': location.workstation_count}
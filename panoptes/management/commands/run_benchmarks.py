@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from panoptes.benchmarks import BENCHMARKS, run_benchmarks
+
+from optparse import make_option
+
+class Command(BaseCommand):
+	"""Run the performance benchmarks against a throwaway test database."""
+
+	args = "[benchmark ...]"
+	help = "Runs the named benchmarks, or all of them, in a newly created test database."
+
+	option_list = BaseCommand.option_list + (
+		make_option('--current-database', action='store_true', dest='current_database', default=False,
+			help="Run in the current database, which is flushed before each benchmark, instead of a new test database"),
+	)
+
+	def _run(self, names):
+		"""Run the benchmarks and print their results."""
+		for name, results in run_benchmarks(names):
+			print name
+			for description, result in results:
+				print "    %(description)s: %(result)s" % {'description': description, 'result': result}
+
+	def handle(self, *names, **options):
+		"""Create a test database, run the benchmarks in it and destroy it."""
+
+		names = names or BENCHMARKS
+		for name in names:
+			if name not in BENCHMARKS:
+				raise CommandError("No benchmark is named %(name)s" % {'name': name})
+
+		if options.get('current_database'):
+			self._run(names)
+			return
+
+		verbosity = int(options.get('verbosity', 1))
+		setup_test_environment()
+		old_name = connection.settings_dict['NAME']
+		connection.creation.create_test_db(verbosity=verbosity)
+		try:
+			self._run(names)
+		finally:
+			connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+			teardown_test_environment()
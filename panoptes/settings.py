@@ -1,4 +1,6 @@
 
+from django.conf import settings as _project_settings
+
 OS_SLUG_MAC = "mac"
 OS_SLUG_LINUX = "linux"
 OS_SLUG_WINDOWS = "windows"
@@ -9,4 +11,90 @@ OS_CHOICES = (
 	(OS_SLUG_WINDOWS, 'Windows')
 )
 
-DEFAULT_ANALYSIS_RECENT_DAYS = 7
+#  Each of the following settings can be overridden by a value of the same name
+#  prefixed with PANOPTES_ in the project settings
+
+#  The number of recent days shown by default when analyzing usage
+DEFAULT_ANALYSIS_RECENT_DAYS = getattr(_project_settings, 'PANOPTES_DEFAULT_ANALYSIS_RECENT_DAYS', 7)
+
+#  The maximum number of session events that can be reported in one batch
+SESSION_BATCH_MAX_EVENTS = getattr(_project_settings, 'PANOPTES_SESSION_BATCH_MAX_EVENTS', 2000)
+
+#  The longest that a session is expected to last, in days, which bounds the
+#  sessions checked when counting the sessions that span the end of a range
+MAX_SESSION_DAYS = getattr(_project_settings, 'PANOPTES_MAX_SESSION_DAYS', 31)
+
+#  The maximum number of MAC addresses whose workstations are cached in each
+#  process, and the number of seconds for which a cached workstation is used
+MAC_CACHE_SIZE = getattr(_project_settings, 'PANOPTES_MAC_CACHE_SIZE', 4096)
+MAC_CACHE_TIMEOUT = getattr(_project_settings, 'PANOPTES_MAC_CACHE_TIMEOUT', 600)
+
+#  The maximum number of OS types cached in each process, and the number of
+#  seconds for which a cached OS type is used
+OS_TYPE_CACHE_SIZE = getattr(_project_settings, 'PANOPTES_OS_TYPE_CACHE_SIZE', 256)
+OS_TYPE_CACHE_TIMEOUT = getattr(_project_settings, 'PANOPTES_OS_TYPE_CACHE_TIMEOUT', 3600)
+
+#  The maximum number of locations whose compiled account filters are cached in
+#  each process, and the number of seconds for which they are used
+ACCOUNT_MATCHER_CACHE_SIZE = getattr(_project_settings, 'PANOPTES_ACCOUNT_MATCHER_CACHE_SIZE', 256)
+ACCOUNT_MATCHER_CACHE_TIMEOUT = getattr(_project_settings, 'PANOPTES_ACCOUNT_MATCHER_CACHE_TIMEOUT', 600)
+
+#  The maximum number of locations whose application name indexes are cached in
+#  each process, and the number of seconds for which they are used
+APPLICATION_INDEX_CACHE_SIZE = getattr(_project_settings, 'PANOPTES_APPLICATION_INDEX_CACHE_SIZE', 256)
+APPLICATION_INDEX_CACHE_TIMEOUT = getattr(_project_settings, 'PANOPTES_APPLICATION_INDEX_CACHE_TIMEOUT', 600)
+
+#  The number of seconds for which a snapshot of a location's current usage is
+#  cached when no session starts or ends there
+CURRENT_USAGE_CACHE_TIMEOUT = getattr(_project_settings, 'PANOPTES_CURRENT_USAGE_CACHE_TIMEOUT', 10)
+
+#  The number of seconds for which a plot of a location's sessions is cached in
+#  the Django cache when its dates have all passed, and when they include today.
+#  A cached plot is also discarded whenever the location's data change.
+PLOT_CACHE_TIMEOUT = getattr(_project_settings, 'PANOPTES_PLOT_CACHE_TIMEOUT', 86400)
+PLOT_CACHE_CURRENT_TIMEOUT = getattr(_project_settings, 'PANOPTES_PLOT_CACHE_CURRENT_TIMEOUT', 60)
+
+#  Whether an application name that matches no reported name can be matched by
+#  a reported name that begins it, such as "Word" for "Word for Mac", which is
+#  off by default since it can also match unrelated names, such as "Word Search"
+APPLICATION_PREFIX_MATCHING = getattr(_project_settings, 'PANOPTES_APPLICATION_PREFIX_MATCHING', False)
+
+#  Whether session starts and ends are queued and applied later by the
+#  drain_ingest_queue management command, rather than during each request
+INGEST_QUEUE_ENABLED = getattr(_project_settings, 'PANOPTES_INGEST_QUEUE_ENABLED', False)
+
+#  The path to the SQLite database that holds queued events, which must be set
+#  to a persistent location when the queue is enabled, and the number of queued
+#  events beyond which new events are refused until the queue is drained
+INGEST_QUEUE_PATH = getattr(_project_settings, 'PANOPTES_INGEST_QUEUE_PATH', None)
+INGEST_QUEUE_MAX_EVENTS = getattr(_project_settings, 'PANOPTES_INGEST_QUEUE_MAX_EVENTS', 100000)
+
+#  The maximum number of queued events applied at once, and the number of
+#  seconds to wait before checking an empty queue for new events
+INGEST_QUEUE_BATCH_SIZE = getattr(_project_settings, 'PANOPTES_INGEST_QUEUE_BATCH_SIZE', 500)
+INGEST_QUEUE_FLUSH_INTERVAL = getattr(_project_settings, 'PANOPTES_INGEST_QUEUE_FLUSH_INTERVAL', 5)
+
+#  The dotted path of the class used to publish changes to the usage of each
+#  location, and the number of recent changes it holds for reconnecting clients.
+#  The default backend only delivers changes between the threads of one process,
+#  so streams must be served by the process that handles session reports, and
+#  miss the reports applied by drain_ingest_queue.  The cache backend delivers
+#  changes between every process sharing the project's cache, such as memcached.
+PUBSUB_BACKEND = getattr(_project_settings, 'PANOPTES_PUBSUB_BACKEND', "panoptes.core.pubsub.LocalBackend")
+PUBSUB_HISTORY_SIZE = getattr(_project_settings, 'PANOPTES_PUBSUB_HISTORY_SIZE', 1000)
+
+#  The number of seconds between the checks of the cache backend for new
+#  changes, and the number of seconds for which it keeps each change
+PUBSUB_POLL_INTERVAL = getattr(_project_settings, 'PANOPTES_PUBSUB_POLL_INTERVAL', 0.5)
+PUBSUB_CACHE_TIMEOUT = getattr(_project_settings, 'PANOPTES_PUBSUB_CACHE_TIMEOUT', 3600)
+
+#  The number of sessions in the table filtered by the sessions benchmark of the
+#  run_benchmarks management command
+BENCHMARK_SESSION_COUNT = getattr(_project_settings, 'PANOPTES_BENCHMARK_SESSION_COUNT', 10000000)
+
+#  The number of seconds between heartbeats on an idle usage stream, the number
+#  of seconds after which a stream is closed, and the number of seconds that a
+#  client should wait before reconnecting
+STREAM_HEARTBEAT_INTERVAL = getattr(_project_settings, 'PANOPTES_STREAM_HEARTBEAT_INTERVAL', 15)
+STREAM_MAX_DURATION = getattr(_project_settings, 'PANOPTES_STREAM_MAX_DURATION', 300)
+STREAM_RETRY_INTERVAL = getattr(_project_settings, 'PANOPTES_STREAM_RETRY_INTERVAL', 3)
@@ -0,0 +1,2 @@
+-- Allow each OS type without a version to be recorded only once
+CREATE UNIQUE INDEX panoptes_ostype_unversioned_name ON panoptes_ostype (name) WHERE version IS NULL;
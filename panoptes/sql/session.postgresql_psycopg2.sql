@@ -0,0 +1,5 @@
+-- Allow each workstation to have at most one unclosed session
+CREATE UNIQUE INDEX panoptes_session_unclosed_workstation ON panoptes_session (workstation_id) WHERE "end" IS NULL;
+
+-- Find the open sessions of a location without scanning its closed sessions
+CREATE INDEX panoptes_session_unclosed_location ON panoptes_session (location_id) WHERE "end" IS NULL;
@@ -0,0 +1,6 @@
+-- Match the filters applied by SessionManager.create_q_objects, which always
+-- restrict sessions by location and usually by their start and end dates
+CREATE INDEX panoptes_session_location_start ON panoptes_session (location_id, start_date, start_time);
+CREATE INDEX panoptes_session_location_end ON panoptes_session (location_id, end_date, end_time);
+CREATE INDEX panoptes_session_workstation_start ON panoptes_session (workstation_id, start_date);
+CREATE INDEX panoptes_session_location_weekday ON panoptes_session (location_id, weekday, start_date);
@@ -24,6 +24,7 @@ def _make_filter_context(filters):
 
 	return {
 		'location':   filters.location,
+		'compared_locations': filters.locations[1:] if filters.is_comparison else [],
 		'start_date': filters.start_date,
 		'end_date':   filters.end_date,
 		'start_time': filters.start_time,
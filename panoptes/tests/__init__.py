@@ -0,0 +1,18 @@
+from panoptes.tests.activity import *
+from panoptes.tests.app_use import *
+from panoptes.tests.applications import *
+from panoptes.tests.averages import *
+from panoptes.tests.batch import *
+from panoptes.tests.benchmarks import *
+from panoptes.tests.constants import *
+from panoptes.tests.etags import *
+from panoptes.tests.export import *
+from panoptes.tests.matchers import *
+from panoptes.tests.occupancy import *
+from panoptes.tests.parsing import *
+from panoptes.tests.plots import *
+from panoptes.tests.pubsub import *
+from panoptes.tests.rollups import *
+from panoptes.tests.sessions import *
+from panoptes.tests.spool import *
+from panoptes.tests.usage import *
@@ -0,0 +1,61 @@
+
+from django.test import TestCase
+
+from panoptes.core.models import DailyActivity, Session, Workstation
+from panoptes.tests.utils import create_location, create_os_type, create_workstations
+
+import datetime
+
+class DailyActivityTest(TestCase):
+	"""Tests of the daily activity recorded as sessions end."""
+
+	def setUp(self):
+		self.location = create_location()
+		self.tracked, self.untracked = create_workstations(self.location, 2)
+		self.untracked.track = False
+		self.untracked.save()
+
+		os_type = create_os_type()
+		start = datetime.datetime(2011, 3, 7, 10)
+		for workstation in (self.tracked, self.untracked):
+			Session.objects.start_session(workstation, os_type, at=start)
+			Session.objects.end_session(workstation, at=start + datetime.timedelta(hours=1))
+
+	def activity(self, location=None):
+		return DailyActivity.objects.values_list('sessions', 'workstations').get(location=location or self.location)
+
+	def test_untracked_sessions_are_ignored(self):
+		self.assertEqual(self.activity(), (1, 1))
+
+	def test_tracking_change_rebuilds_activity(self):
+		workstation = Workstation.objects.get(pk=self.untracked.pk)
+		workstation.track = True
+		workstation.save()
+		self.assertEqual(self.activity(), (2, 2))
+
+		workstation.track = False
+		workstation.save()
+		self.assertEqual(self.activity(), (1, 1))
+
+	def test_move_transfers_activity(self):
+		other = create_location("Other")
+		workstation = Workstation.objects.get(pk=self.tracked.pk)
+		workstation.location = other
+		workstation.save()
+		self.assertEqual(self.activity(), (0, 0))
+		self.assertEqual(self.activity(other), (1, 1))
+
+		workstation.location = self.location
+		workstation.save()
+		self.assertEqual(self.activity(), (1, 1))
+		self.assertEqual(self.activity(other), (0, 0))
+
+	def test_counts_sessions_spanning_the_end(self):
+		start = datetime.datetime(2011, 3, 7, 20)
+		Session.objects.start_session(self.tracked, create_os_type(), at=start)
+		Session.objects.end_session(self.tracked, at=start + datetime.timedelta(hours=6))
+
+		first_day = datetime.datetime(2011, 3, 1)
+		self.assertEqual(DailyActivity.objects.count_sessions(self.location, first_day, datetime.datetime(2011, 3, 8)), 1)
+		self.assertEqual(DailyActivity.objects.count_sessions(self.location, first_day, datetime.datetime(2011, 3, 9)), 2)
+		self.assertEqual(DailyActivity.objects.count_sessions(self.location, first_day), 2)
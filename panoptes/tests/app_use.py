@@ -0,0 +1,48 @@
+
+from django.test import TestCase
+
+from panoptes.analysis import FilteredSessions
+from panoptes.analysis.axes.x.applications import Axis as ApplicationsAxis
+from panoptes.analysis.axes.x.workstations import Axis as WorkstationsAxis
+from panoptes.analysis.axes.y.app_time import Axis as AppTimeAxis
+from panoptes.analysis.axes.y.app_use import Axis as AppUseAxis
+from panoptes.core.models import Application, ReportedApplication, Session
+from panoptes.tests.utils import count_queries, create_location, create_os_type, create_workstations
+
+class ApplicationUseAxisTest(TestCase):
+	"""Tests of the queries used to plot application use."""
+
+	def setUp(self):
+		self.location = create_location()
+		self.apps = []
+		for name in ("Word", "Excel", "Firefox"):
+			app = Application.objects.create(name=name)
+			ReportedApplication.objects.create(name=name, application=app, location=self.location)
+			self.apps.append(app)
+
+		#  Each workstation uses one more of the applications than the last
+		os_type = create_os_type()
+		self.workstations = create_workstations(self.location, 3)
+		for i, workstation in enumerate(self.workstations):
+			Session.objects.start_session(workstation, os_type)
+			Session.objects.end_session(workstation, [(app.name, 60) for app in self.apps[:i + 1]])
+
+	def filters(self, x_axis, y_axis, x_detail=None):
+		filters = FilteredSessions(location=self.location)
+		filters.set_axes(x_axis, y_axis)
+		filters.x_detail = x_detail
+		return filters
+
+	def test_application_values(self):
+		for y_axis, expected in ((AppUseAxis, [3, 2, 1]), (AppTimeAxis, [180, 120, 60])):
+			filters = self.filters(ApplicationsAxis, y_axis)
+			values, queries = count_queries(filters.y_axis.application_values, self.apps, filters.all_sessions(), filters)
+			self.assertEqual(values, expected)
+			self.assertEqual(queries, 1)
+
+	def test_workstation_values(self):
+		for y_axis, expected in ((AppUseAxis, [0, 1, 1]), (AppTimeAxis, [0, 60, 60])):
+			filters = self.filters(WorkstationsAxis, y_axis, self.apps[1])
+			values, queries = count_queries(filters.y_axis.workstation_values, self.workstations, filters.all_sessions(), filters)
+			self.assertEqual(values, expected)
+			self.assertEqual(queries, 1)
@@ -0,0 +1,27 @@
+
+from django.test import TestCase
+
+from panoptes.core.utils.applications import ApplicationNameIndex
+
+class _Reported(object):
+	"""A reported application name, standing in for a ReportedApplication."""
+
+	def __init__(self, name, application):
+		self.name = name
+		self.application = application
+
+class ApplicationNameIndexTest(TestCase):
+	"""Tests of resolving reported application names."""
+
+	def setUp(self):
+		self.reported = [_Reported("Microsoft Word", "word"), _Reported("Firefox", "firefox")]
+
+	def test_normalized_names_match(self):
+		index = ApplicationNameIndex(self.reported, use_prefixes=False)
+		self.assertEqual(index.resolve("microsoft_word"), "word")
+		self.assertEqual(index.resolve("Microsoft Word 2016"), "word")
+		self.assertEqual(index.resolve("firefox.exe"), "firefox")
+
+	def test_prefixes_only_match_when_enabled(self):
+		self.assertEqual(ApplicationNameIndex(self.reported, use_prefixes=False).resolve("Microsoft Word for Mac"), None)
+		self.assertEqual(ApplicationNameIndex(self.reported, use_prefixes=True).resolve("Microsoft Word for Mac"), "word")
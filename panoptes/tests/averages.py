@@ -0,0 +1,109 @@
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from panoptes.analysis.axes.y.avg_session import Axis
+from panoptes.core.models import Session, UsageRollup
+from panoptes.tests.utils import create_location, create_os_type, create_workstations
+
+import datetime
+
+class AverageSessionLengthTest(TestCase):
+	"""Tests that the ways of averaging session lengths agree."""
+
+	def setUp(self):
+		self.location = create_location()
+		self.os_type = create_os_type()
+		self.workstations = create_workstations(self.location, 3)
+		self.days = [datetime.date(2011, 3, 7), datetime.date(2011, 3, 8)]
+
+		#  Give each workstation sessions of different lengths on both days
+		for day in self.days:
+			for i, workstation in enumerate(self.workstations):
+				start = datetime.datetime.combine(day, datetime.time(9 + i))
+				Session.objects.start_session(workstation, self.os_type, at=start)
+				Session.objects.end_session(workstation, at=start + datetime.timedelta(minutes=17 * (i + 1)))
+
+		#  Remove the duration of one session, as if it had never been backfilled
+		Session.objects.filter(workstation=self.workstations[0], start_date=self.days[0]).update(duration_seconds=None)
+		UsageRollup.objects.rebuild([self.location])
+
+		self.axis = Axis()
+		self.sessions = Session.objects.filter(location=self.location)
+
+	def test_database_matches_python(self):
+		for field_name, x_keys in (('start_date', self.days), ('workstation', [ws.pk for ws in self.workstations])):
+			self.assertEqual(
+				self.axis._average_length_for_queryset(self.sessions, field_name, x_keys),
+				self.axis._average_length_in_python(self.sessions, field_name, x_keys))
+
+	def test_rollups_match_python(self):
+		rollups = UsageRollup.objects.for_filters(location=self.location, end_date=self.days[-1])
+		self.assertEqual(
+			self.axis._average_length_for_rollups(rollups, 'date', self.days),
+			self.axis._average_length_in_python(self.sessions, 'start_date', self.days))
+
+	def test_null_durations_are_skipped(self):
+		averages = self.axis._average_length_in_python(self.sessions, 'start_date', self.days)
+		self.assertEqual(averages, [(34 + 51) * 60 / 2, (17 + 34 + 51) * 60 / 3])
+
+class StoredDurationTest(TestCase):
+	"""Tests that stored session durations and their averages match the sessions' spans."""
+
+	def setUp(self):
+		location = create_location()
+		os_type = create_os_type()
+		workstations = create_workstations(location, 3)
+		self.days = [datetime.date(2011, 3, 7), datetime.date(2011, 3, 8)]
+		first, second = [datetime.datetime.combine(day, datetime.time(0)) for day in self.days]
+		hours = lambda count: datetime.timedelta(hours=count)
+
+		#  End sessions singly on the first day, one of which lasts into the third
+		#  day and one of which is shortened by an offset
+		for workstation, start, end, offset in (
+				(workstations[0], first + hours(10), first + hours(10.75), 0),
+				(workstations[1], first + hours(22), first + hours(49.5), 0),
+				(workstations[2], first + hours(12), first + hours(13), -600)):
+			Session.objects.start_session(workstation, os_type, at=start)
+			Session.objects.end_session(workstation, time_offset=offset, at=end)
+
+		#  End sessions in a batch on the second day
+		for workstation in (workstations[0], workstations[2]):
+			Session.objects.start_session(workstation, os_type, at=second + hours(9))
+		Session.objects.end_sessions([
+			(workstations[0], [], 0, None, second + hours(9.5)),
+			(workstations[2], [], -30, None, second + hours(11))])
+
+		self.sessions = Session.objects.all()
+		self.axis = Axis()
+
+	def spans(self):
+		"""Return the span of each session in seconds, keyed by its primary key."""
+		spans = {}
+		for pk, start, end in self.sessions.values_list('pk', 'start', 'end'):
+			delta = end - start
+			spans[pk] = delta.days * 86400 + delta.seconds
+		return spans
+
+	def average_spans(self):
+		"""Return the average span of the sessions started on each day."""
+		spans = self.spans()
+		averages = []
+		for day in self.days:
+			day_spans = [spans[pk] for pk in self.sessions.filter(start_date=day).values_list('pk', flat=True)]
+			averages.append(sum(day_spans) / len(day_spans))
+		return averages
+
+	def test_stored_durations_match_spans(self):
+		self.assertEqual(dict(self.sessions.values_list('pk', 'duration_seconds')), self.spans())
+		self.assertEqual(self.spans()[self.sessions.get(start_hour=22).pk], 99000)
+
+	def test_backfilled_durations_match_spans(self):
+		self.sessions.update(duration_seconds=None)
+		call_command('backfill_session_durations', verbosity=0)
+		self.assertEqual(dict(self.sessions.values_list('pk', 'duration_seconds')), self.spans())
+
+	def test_averages_match_spans(self):
+		averages = self.average_spans()
+		self.assertEqual(self.axis._average_length_for_queryset(self.sessions, 'start_date', self.days), averages)
+		self.assertEqual(self.axis._average_length_in_python(self.sessions, 'start_date', self.days), averages)
@@ -0,0 +1,97 @@
+from django.test import TestCase
+from django.utils import simplejson as json
+
+from panoptes.core.models import DailyActivity, Location, MACAddress, Session, Workstation
+from panoptes.tests.utils import create_location, create_os_type, create_workstations, mac_address
+from panoptes.tracking.batch import SessionEventBatch
+from panoptes.tracking.forms import SessionBatchForm
+import panoptes.settings as _settings
+
+class SessionEventBatchTest(TestCase):
+	"""Tests of ending sessions with a batch of events."""
+
+	def setUp(self):
+		Workstation.objects.clear_mac_cache()
+		self.location = create_location()
+		self.workstations = create_workstations(self.location, 2)
+		self.os_type = create_os_type()
+
+	def process(self, *events):
+		form = SessionBatchForm({'events': json.dumps(list(events))})
+		self.assertTrue(form.is_valid())
+		return SessionEventBatch(form.cleaned_data['events']).process()
+
+	def start(self, i, event_id=None):
+		return {'type': SessionBatchForm.START_EVENT, 'mac': mac_address(i), 'os_type': _settings.OS_SLUG_WINDOWS,
+			'event_id': event_id or "start-%d" % i}
+
+	def end(self, i, event_id=None):
+		return {'type': SessionBatchForm.END_EVENT, 'mac': mac_address(i), 'event_id': event_id or "end-%d" % i}
+
+	def open_session_count(self):
+		return Location.objects.get(pk=self.location.pk).open_session_count
+
+	def test_start_and_end_in_one_batch(self):
+		statuses = self.process(self.start(0), self.end(0), self.start(1))
+		self.assertEqual(statuses, [SessionEventBatch.STATUS_STARTED, SessionEventBatch.STATUS_ENDED, SessionEventBatch.STATUS_STARTED])
+		session = Session.objects.get(workstation=self.workstations[0])
+		self.assertEqual(session.end_event, "end-0")
+		self.assertTrue(session.duration_seconds is not None)
+		self.assertEqual(self.open_session_count(), 1)
+		self.assertEqual(DailyActivity.objects.get(location=self.location).sessions, 1)
+
+	def test_repeated_end_is_applied_once(self):
+		self.process(self.start(0))
+		self.assertEqual(self.process(self.end(0)), [SessionEventBatch.STATUS_ENDED])
+		first_end = Session.objects.get(workstation=self.workstations[0]).end
+		self.assertEqual(self.process(self.end(0)), [SessionEventBatch.STATUS_ENDED])
+		self.assertEqual(Session.objects.get(workstation=self.workstations[0]).end, first_end)
+		self.assertEqual(self.open_session_count(), 0)
+		self.assertEqual(DailyActivity.objects.get(location=self.location).sessions, 1)
+
+	def test_end_without_session_is_rejected(self):
+		self.assertEqual(self.process(self.end(0)), [SessionEventBatch.STATUS_REJECTED])
+
+	def test_end_of_unknown_workstation_is_rejected(self):
+		self.process(self.start(0))
+		statuses = self.process(self.end(9), {'type': "other"}, self.end(0))
+		self.assertEqual(statuses, [SessionEventBatch.STATUS_REJECTED, SessionEventBatch.STATUS_REJECTED, SessionEventBatch.STATUS_ENDED])
+
+	def test_untracking_rejects_cached_workstation(self):
+		self.process(self.start(1))
+		workstation = Workstation.objects.get(pk=self.workstations[1].pk)
+		workstation.track = False
+		workstation.save()
+		self.assertEqual(self.process(self.end(1)), [SessionEventBatch.STATUS_REJECTED])
+		self.assertTrue(Session.objects.get(workstation=workstation).end is None)
+
+class MACAddressCacheTest(TestCase):
+	"""Tests of resolving MAC addresses to workstations through the cache."""
+
+	def setUp(self):
+		Workstation.objects.clear_mac_cache()
+		self.workstations = create_workstations(create_location(), 2)
+
+	def resolve(self, i):
+		return Workstation.objects.trackable_by_macs([mac_address(i)])[mac_address(i)]
+
+	def test_repeated_resolution_is_cached(self):
+		stats = Workstation.objects.mac_cache_stats()
+		self.assertEqual(self.resolve(0), self.workstations[0])
+		self.assertEqual(self.resolve(0), self.workstations[0])
+		self.assertEqual(Workstation.objects.trackable_by_mac(mac_address(0)), self.workstations[0])
+		self.assertEqual(self.resolve(9), None)
+		self.assertEqual(self.resolve(9), None)
+		after = Workstation.objects.mac_cache_stats()
+		self.assertEqual(after['hits'] - stats['hits'], 3)
+		self.assertEqual(after['misses'] - stats['misses'], 2)
+
+	def test_moved_address_is_resolved_again(self):
+		self.assertEqual(self.resolve(0), self.workstations[0])
+		mac = MACAddress.objects.get(address=mac_address(0))
+		mac.workstation = self.workstations[1]
+		mac.save()
+		self.assertEqual(self.resolve(0), self.workstations[1])
+
+		mac.delete()
+		self.assertEqual(self.resolve(0), None)
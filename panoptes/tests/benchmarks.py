@@ -0,0 +1,31 @@
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from panoptes.benchmarks import BENCHMARKS
+import panoptes.settings as _settings
+
+from StringIO import StringIO
+
+import sys
+
+class RunBenchmarksTest(TestCase):
+	"""Tests of running every benchmark with the management command."""
+
+	def setUp(self):
+		self.session_count = _settings.BENCHMARK_SESSION_COUNT
+		_settings.BENCHMARK_SESSION_COUNT = 2000
+
+	def tearDown(self):
+		_settings.BENCHMARK_SESSION_COUNT = self.session_count
+
+	def test_runs_every_benchmark(self):
+		stdout = sys.stdout
+		sys.stdout = output = StringIO()
+		try:
+			call_command('run_benchmarks', current_database=True)
+		finally:
+			sys.stdout = stdout
+
+		printed = [line for line in output.getvalue().splitlines() if not line.startswith(" ")]
+		self.assertEqual(printed, list(BENCHMARKS))
@@ -0,0 +1,33 @@
+
+from django.test import TestCase
+
+from panoptes.core.models import Session
+from panoptes.core.utils.constants import week_day_lookup_value, weekday_name
+from panoptes.tests.utils import create_location, create_os_type, create_workstations
+
+import datetime
+
+class WeekdayTest(TestCase):
+	"""Tests of converting between ISO weekdays and Django's week_day lookups."""
+
+	def test_lookup_values(self):
+		self.assertEqual([week_day_lookup_value(weekday) for weekday in xrange(1, 8)], [2, 3, 4, 5, 6, 7, 1])
+
+	def test_lookup_matches_weekday(self):
+
+		#  Start a session on each day of a week that begins on a Monday
+		workstation = create_workstations(create_location(), 1)[0]
+		os_type = create_os_type()
+		for day in xrange(7):
+			start = datetime.datetime(2011, 3, 7 + day, 10)
+			Session.objects.start_session(workstation, os_type, at=start)
+			Session.objects.end_session(workstation, at=start + datetime.timedelta(hours=1))
+
+		for weekday in xrange(1, 8):
+			sessions = Session.objects.filter(start__week_day=week_day_lookup_value(weekday))
+			self.assertEqual([session.weekday for session in sessions], [weekday])
+			self.assertEqual([session.start.isoweekday() for session in sessions], [weekday])
+
+	def test_weekday_name(self):
+		self.assertEqual(unicode(weekday_name(1)), u"Monday")
+		self.assertEqual(unicode(weekday_name(7)), u"Sunday")
@@ -0,0 +1,46 @@
+from django.test import TestCase
+
+from panoptes.core.models import Session
+from panoptes.tests.utils import create_location, create_os_type, create_workstations
+
+class LocationETagTest(TestCase):
+	"""Tests of the ETags of the location API."""
+
+	urls = "panoptes.urls"
+
+	def setUp(self):
+		self.location = create_location()
+		self.workstation = create_workstations(self.location, 1)[0]
+		self.os_type = create_os_type()
+
+	def url(self, name):
+		return "/api/versions/1/tracking/location/%s/%s/" % (self.location.slug, name)
+
+	def etag(self, name="info"):
+		response = self.client.get(self.url(name))
+		self.assertEqual(response.status_code, 200)
+		return response['ETag']
+
+	def test_matching_etag_is_not_modified(self):
+		for name in ("activity", "current-usage", "info"):
+			etag = self.etag(name)
+			response = self.client.get(self.url(name), HTTP_IF_NONE_MATCH=etag)
+			self.assertEqual(response.status_code, 304)
+			self.assertEqual(response['ETag'], etag)
+
+	def test_other_etag_is_modified(self):
+		response = self.client.get(self.url("info"), HTTP_IF_NONE_MATCH='"0-0", "other"')
+		self.assertEqual(response.status_code, 200)
+
+	def test_session_start_changes_etag(self):
+		etag = self.etag()
+		Session.objects.start_session(self.workstation, self.os_type)
+		self.assertNotEqual(self.etag(), etag)
+		response = self.client.get(self.url("info"), HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+
+	def test_session_end_changes_etag(self):
+		Session.objects.start_session(self.workstation, self.os_type)
+		etag = self.etag()
+		Session.objects.end_session(self.workstation)
+		self.assertNotEqual(self.etag(), etag)
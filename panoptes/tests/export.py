@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import simplejson as json
+
+from panoptes.core.models import Session
+from panoptes.tests.utils import create_location, create_os_type, create_workstations
+
+import csv
+import datetime
+
+class ExportPlotTest(TestCase):
+	"""Tests of exporting the plot of a location's sessions."""
+
+	urls = "panoptes.urls"
+
+	def setUp(self):
+		self.location = create_location()
+		workstations = create_workstations(self.location, 2)
+		os_type = create_os_type()
+
+		#  Two sessions start on the first day and one on the second
+		today = datetime.date.today()
+		self.days = [today - datetime.timedelta(days=3), today - datetime.timedelta(days=2)]
+		for day, day_workstations in zip(self.days, (workstations, workstations[:1])):
+			start = datetime.datetime.combine(day, datetime.time(10))
+			for workstation in day_workstations:
+				Session.objects.start_session(workstation, os_type, at=start)
+				Session.objects.end_session(workstation, at=start + datetime.timedelta(hours=1))
+
+		User.objects.create_user("analyst", "analyst@example.com", "secret")
+		self.client.login(username="analyst", password="secret")
+
+	def export(self, format, **params):
+		data = {
+			'location': self.location.pk,
+			'lens': "sessions-per-day",
+			'start': self.days[0].strftime("%m/%d/%Y"),
+			'end': self.days[-1].strftime("%m/%d/%Y")
+		}
+		data.update(params)
+		return self.client.get("/analysis/lenses/export/%s/" % format, data)
+
+	def expected_points(self):
+		return [(self.location.slug, unicode(day.toordinal()), unicode(count)) for day, count in zip(self.days, (2, 1))]
+
+	def test_csv(self):
+		response = self.export("csv")
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response['Content-Type'], "text/csv; charset=utf-8")
+		rows = list(csv.reader(response.content.splitlines()))
+		self.assertEqual(rows[0], ['location', 'x', 'x_label', 'y', 'y_label'])
+		self.assertEqual([(row[0], row[1], row[3]) for row in rows[1:]], self.expected_points())
+		self.assertEqual([row[4] for row in rows[1:]], ["2", "1"])
+
+	def test_json(self):
+		response = self.export("json")
+		self.assertEqual(response.status_code, 200)
+		plot = json.loads(response.content)
+		self.assertEqual(plot['locations'], [self.location.slug])
+		self.assertEqual((plot['x_axis'], plot['y_axis']), ("days", "session-count"))
+		self.assertEqual([(point['location'], point['x'], point['y']) for point in plot['points']], self.expected_points())
+
+	def test_ndjson(self):
+		response = self.export("ndjson")
+		self.assertEqual(response.status_code, 200)
+		points = [json.loads(line) for line in response.content.splitlines()]
+		self.assertEqual([(point['location'], point['x'], point['y']) for point in points], self.expected_points())
+
+	def test_login_required(self):
+		self.client.logout()
+		self.assertEqual(self.export("csv").status_code, 302)
+
+	def test_invalid_filters(self):
+		response = self.export("json", lens="no-such-lens")
+		self.assertEqual(response.status_code, 400)
+		response = self.export("json", start=self.days[-1].strftime("%m/%d/%Y"), end=self.days[0].strftime("%m/%d/%Y"))
+		self.assertEqual(response.status_code, 400)
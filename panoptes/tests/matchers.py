@@ -0,0 +1,26 @@
+
+from django.test import TestCase
+
+from panoptes.tracking.matchers import NameMatcher
+
+class NameMatcherTest(TestCase):
+	"""Tests of the matching of account names and patterns."""
+
+	def test_literal_names_ignore_case(self):
+		matcher = NameMatcher(["Admin"])
+		self.assertTrue(matcher.matches("admin"))
+		self.assertFalse(matcher.matches("administrator"))
+
+	def test_globs_ignore_case(self):
+		matcher = NameMatcher(["Lab-*"])
+		self.assertTrue(matcher.matches("lab-12"))
+		self.assertFalse(matcher.matches("library"))
+
+	def test_regex_source_is_not_lowercased(self):
+		matcher = NameMatcher([r"/lab\D+/"])
+		self.assertTrue(matcher.matches("lababc"))
+		self.assertFalse(matcher.matches("lab123"))
+
+	def test_regex_ignores_case(self):
+		matcher = NameMatcher([r"/SVC_\w+/"])
+		self.assertTrue(matcher.matches("svc_backup"))
@@ -0,0 +1,56 @@
+from django.test import TestCase
+
+from panoptes.analysis.axes.y.occupancy import Axis as OccupancyAxis, _occupied_hours
+from panoptes.core.models import Session
+from panoptes.tests.utils import create_location, create_os_type, create_workstations
+
+import datetime
+
+class OccupiedHoursTest(TestCase):
+	"""Tests of the hours occupied by a session."""
+
+	day = datetime.date(2011, 3, 7)
+
+	def occupied(self, start, end, days=0):
+		"""Return the hours occupied by a session from the start time on the day
+		to the end time the given number of days later, as a dict of counts."""
+		hours = _occupied_hours(self.day, start, self.day + datetime.timedelta(days=days), end)
+		return dict([(hour, count) for hour, count in enumerate(hours) if count])
+
+	def test_within_an_hour(self):
+		self.assertEqual(self.occupied(datetime.time(10, 15), datetime.time(10, 45)), {10: 1})
+
+	def test_hour_boundaries(self):
+		self.assertEqual(self.occupied(datetime.time(10), datetime.time(12)), {10: 1, 11: 1})
+		self.assertEqual(self.occupied(datetime.time(10, 30), datetime.time(12, 0, 1)), {10: 1, 11: 1, 12: 1})
+		self.assertEqual(self.occupied(datetime.time(10), datetime.time(10)), {10: 1})
+
+	def test_spanning_midnight(self):
+		self.assertEqual(self.occupied(datetime.time(22, 30), datetime.time(1, 15), 1), {22: 1, 23: 1, 0: 1, 1: 1})
+		self.assertEqual(self.occupied(datetime.time(22, 30), datetime.time(0), 1), {22: 1, 23: 1})
+
+	def test_spanning_several_days(self):
+		self.assertEqual(self.occupied(datetime.time(10), datetime.time(9, 30), 2), dict([(hour, 2) for hour in xrange(24)]))
+		self.assertEqual(self.occupied(datetime.time(23), datetime.time(1), 2), dict([(hour, 2 if hour in (23, 0) else 1) for hour in xrange(24)]))
+
+class OccupancyAxisTest(TestCase):
+	"""Tests of the number of sessions in progress each hour."""
+
+	def test_open_sessions_occupy_hours_until_now(self):
+		closed, open = create_workstations(create_location(), 2)
+		os_type = create_os_type()
+		start = datetime.datetime.combine(datetime.date.today() - datetime.timedelta(days=1), datetime.time(10, 30))
+		Session.objects.start_session(closed, os_type, at=start)
+		Session.objects.end_session(closed, at=start + datetime.timedelta(hours=1))
+
+		#  The open session started at the beginning of the current hour
+		now = datetime.datetime.now()
+		Session.objects.start_session(open, os_type, at=now.replace(minute=0, second=0, microsecond=0))
+
+		hours = [datetime.time(hour) for hour in xrange(24)]
+		values = OccupancyAxis().hour_values(hours, Session.objects.all(), None)
+		expected = [0] * 24
+		expected[10] += 1
+		expected[11] += 1
+		expected[now.hour] += 1
+		self.assertEqual(values, expected)
@@ -0,0 +1,25 @@
+
+from django.test import TestCase
+
+from panoptes.tracking.parsing import parse_app_durations, parse_datetime
+
+from dateutil.parser import parse as dateutil_parse
+
+class ParsingTest(TestCase):
+	"""Tests of parsing the apps string sent when a session ends."""
+
+	def test_fast_path_matches_dateutil(self):
+		for dt_string in ("2011-03-07T09:15:30", "2011-03-07T09:15:30.5", "2011-03-07T09:15:30.123456"):
+			self.assertEqual(parse_datetime(dt_string), dateutil_parse(dt_string))
+
+	def test_other_formats_use_dateutil(self):
+		self.assertEqual(parse_datetime("March 7 2011 9:15"), dateutil_parse("March 7 2011 9:15"))
+		self.assertEqual(parse_datetime("not a date"), None)
+
+	def test_durations_are_totalled(self):
+		apps = ",".join([
+			"Word#2011-03-07T09:00:00#2011-03-07T09:10:00",
+			"Excel#2011-03-07T09:00:00#bad",
+			"Word#2011-03-07T10:00:00#2011-03-07T10:00:30",
+			"skipped#2011-03-07T09:00:00"])
+		self.assertEqual(parse_app_durations(apps), [("Word", 630), ("Excel", 0)])
@@ -0,0 +1,130 @@
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import TestCase
+
+from panoptes.analysis import FilteredSessions, Plot
+from panoptes.analysis.axes.x.days import Axis as DaysAxis
+from panoptes.analysis.axes.x.hours import Axis as HoursAxis
+from panoptes.analysis.axes.x.workstations import Axis as WorkstationsAxis
+from panoptes.analysis.axes.y.sessions import Axis as SessionsAxis
+from panoptes.analysis.exceptions import InvalidAxisPair
+from panoptes.analysis.panels.charting.charts.bar import BarChart
+from panoptes.core.models import Location, Session
+from panoptes.tests.utils import create_location, create_os_type, create_workstations
+
+from decimal import Decimal
+
+import datetime
+
+class PlotCacheKeyTest(TestCase):
+	"""Tests of when the cached plots of a location are discarded."""
+
+	def setUp(self):
+		self.location = create_location()
+		self.workstation = create_workstations(self.location, 1)[0]
+		self.today = datetime.date.today()
+
+	def cache_key(self, end_date):
+		location = Location.objects.get(pk=self.location.pk)
+		sessions = FilteredSessions(location=location, start_date=end_date - datetime.timedelta(days=7), end_date=end_date)
+		sessions.set_axes(DaysAxis, SessionsAxis)
+		return sessions._plot_cache_key([location])
+
+	def test_sessions_change_current_plots(self):
+		key = self.cache_key(self.today)
+		Session.objects.start_session(self.workstation, create_os_type())
+		self.assertNotEqual(self.cache_key(self.today), key)
+
+	def test_sessions_keep_past_plots(self):
+		yesterday = self.today - datetime.timedelta(days=1)
+		key = self.cache_key(yesterday)
+		Session.objects.start_session(self.workstation, create_os_type())
+		Session.objects.end_session(self.workstation)
+		self.assertEqual(self.cache_key(yesterday), key)
+
+	def test_back_dated_end_changes_past_plots(self):
+		yesterday = self.today - datetime.timedelta(days=1)
+		key = self.cache_key(yesterday)
+		start = datetime.datetime.combine(yesterday, datetime.time(10))
+		Session.objects.start_session(self.workstation, create_os_type(), at=start)
+		Session.objects.end_session(self.workstation, at=start + datetime.timedelta(hours=1))
+		self.assertNotEqual(self.cache_key(yesterday), key)
+
+	def test_end_moved_back_by_offset_changes_past_plots(self):
+		yesterday = self.today - datetime.timedelta(days=1)
+		key = self.cache_key(yesterday)
+		start = datetime.datetime.combine(yesterday, datetime.time(10))
+		Session.objects.start_session(self.workstation, create_os_type(), at=start)
+		end = datetime.datetime.combine(self.today, datetime.time(0, 30))
+		Session.objects.end_session(self.workstation, time_offset=-3600, at=end)
+		self.assertEqual(Session.objects.get(workstation=self.workstation).end_date, yesterday)
+		self.assertNotEqual(self.cache_key(yesterday), key)
+
+	def test_workstations_change_past_plots(self):
+		yesterday = self.today - datetime.timedelta(days=1)
+		key = self.cache_key(yesterday)
+		create_workstations(self.location, 1, first=1)
+		self.assertNotEqual(self.cache_key(yesterday), key)
+
+class PlotTest(TestCase):
+	"""Tests of the percentages of the y-values of a plot."""
+
+	def percentages(self, y_values):
+		return list(Plot(DaysAxis(), SessionsAxis(), range(len(y_values)), y_values).y_percentages)
+
+	def test_integer_percentages(self):
+		self.assertEqual(self.percentages([0, 1, 200, 400]), [0, 1, 50, 100])
+
+	def test_decimal_percentages(self):
+		self.assertEqual(self.percentages([Decimal("0"), Decimal("0.5"), Decimal("2"), Decimal("4")]), [0, 13, 50, 100])
+
+class ComparisonTest(TestCase):
+	"""Tests of comparing the plots of several locations."""
+
+	def setUp(self):
+		cache.clear()
+		os_type = create_os_type()
+		self.day = datetime.date.today() - datetime.timedelta(days=1)
+		start = datetime.datetime.combine(self.day, datetime.time(10))
+
+		#  Two sessions are recorded at the first location and one at the other
+		self.location = create_location()
+		self.other_location = create_location("Other")
+		workstations = create_workstations(self.location, 2) + create_workstations(self.other_location, 1, first=2)
+		for workstation in workstations:
+			Session.objects.start_session(workstation, os_type, at=start)
+			Session.objects.end_session(workstation, at=start + datetime.timedelta(hours=1))
+
+	def filters(self, x_axis, location=None, compared_locations=None):
+		filters = FilteredSessions(location=location or self.location, start_date=self.day, end_date=self.day,
+			start_time=datetime.time(8), end_time=datetime.time(22),
+			compared_locations=[self.other_location] if compared_locations is None else compared_locations)
+		filters.set_axes(x_axis, SessionsAxis)
+		return filters
+
+	def test_values_match_each_location(self):
+		for x_axis in (DaysAxis, HoursAxis):
+			x_values, series = self.filters(x_axis).comparison_values()
+			self.assertEqual(len(series), 2)
+			for location, y_values in zip((self.location, self.other_location), series):
+				alone = self.filters(x_axis, location, []).plot_values()
+				self.assertEqual(x_values, alone[0])
+				self.assertEqual(list(y_values), list(alone[1]))
+
+	def test_shares_scale(self):
+		comparison = self.filters(DaysAxis).create_comparison()
+		self.assertEqual([list(plot.y_values) for plot in comparison.plots], [[2], [1]])
+		self.assertEqual([list(plot.y_percentages) for plot in comparison.plots], [[100], [50]])
+
+	def test_rejects_uncomparable_axes(self):
+		self.assertRaises(InvalidAxisPair, self.filters(WorkstationsAxis).comparison_values)
+
+	def test_renders_grouped_series(self):
+		html = render_to_string(BarChart.template, BarChart(self.filters(DaysAxis)).provide_render_args())
+		self.assertTrue("grouped series__2" in html)
+		self.assertTrue("bar-chart-point-0-1" in html)
+		self.assertTrue("Other" in html)
+
+		html = render_to_string(BarChart.template, BarChart(self.filters(WorkstationsAxis)).provide_render_args())
+		self.assertFalse("grouped" in html)
@@ -0,0 +1,58 @@
+
+from django.core.cache import get_cache
+from django.test import TestCase
+
+from panoptes.core.models import Session, Workstation
+from panoptes.core.pubsub import CacheBackend, LocalBackend
+from panoptes.tests.utils import count_queries, create_location, create_os_type, create_workstations, mac_address
+from panoptes.tracking.stream import _channel, publish_ended, publish_started
+import panoptes.core.pubsub as pubsub
+
+class BackendTests(object):
+	"""Tests shared by every publish/subscribe backend."""
+
+	def test_reads_messages_after_id(self):
+		self.backend.publish("channel", "first")
+		second_id = self.backend.publish("channel", "second")
+		self.assertEqual(self.backend.last_id("channel"), second_id)
+		self.assertEqual(self.backend.read("channel", second_id - 1, 0), [(second_id, "second")])
+		self.assertEqual(self.backend.read("channel", second_id, 0), [])
+
+	def test_discarded_messages_are_reported(self):
+		for i in xrange(3):
+			last_id = self.backend.publish("channel", i)
+		self.assertEqual(self.backend.read("channel", last_id - 3, 0), None)
+		self.assertEqual(self.backend.read("channel", last_id + 1, 0), None)
+
+class LocalBackendTest(BackendTests, TestCase):
+
+	def setUp(self):
+		self.backend = LocalBackend(history_size=2)
+
+class CacheBackendTest(BackendTests, TestCase):
+
+	def setUp(self):
+		self.backend = CacheBackend(history_size=2, cache=get_cache("locmem://"), poll_interval=0.01)
+
+class PublishTest(TestCase):
+	"""Tests of publishing the sessions that start and end."""
+
+	def setUp(self):
+		self.saved_backend = pubsub._backend
+		self.backend = pubsub._backend = LocalBackend()
+		self.location = create_location()
+		create_workstations(self.location, 1)
+		self.workstation = Workstation.objects.trackable_by_mac(mac_address(0))
+
+	def tearDown(self):
+		pubsub._backend = self.saved_backend
+
+	def test_publishing_uses_no_queries(self):
+		session = Session.objects.start_session(self.workstation, create_os_type())
+		after_id = self.backend.last_id(_channel(self.location.pk))
+		self.assertEqual(count_queries(publish_started, [self.workstation], [session])[1], 0)
+		self.assertEqual(count_queries(publish_ended, [self.workstation])[1], 0)
+
+		messages = self.backend.read(_channel(self.location.pk), after_id, 0)
+		self.assertEqual([message['event'] for message_id, message in messages], ["session-started", "session-ended"])
+		self.assertTrue(messages[0][1]['session_start'])
@@ -0,0 +1,31 @@
+
+from django.test import TestCase
+
+from panoptes.core.models import Session, UsageRollup
+from panoptes.tests.utils import create_location, create_os_type, create_workstations
+
+import datetime
+
+class RebuildUsageRollupsTest(TestCase):
+	"""Tests that rebuilt rollups match those recorded as sessions end."""
+
+	def setUp(self):
+		self.location = create_location()
+		os_type = create_os_type()
+		workstations = create_workstations(self.location, 2)
+		for day in xrange(4):
+			for hour in (9, 10, 14):
+				for workstation in workstations:
+					start = datetime.datetime(2011, 3, 7 + day, hour, 5)
+					Session.objects.start_session(workstation, os_type, at=start)
+					Session.objects.end_session(workstation, at=start + datetime.timedelta(minutes=40))
+
+	def rollup_values(self):
+		return sorted(UsageRollup.objects.values_list('workstation', 'date', 'hour', 'end_date', 'end_hour',
+			'session_count', 'timed_session_count', 'total_seconds', 'app_use_count'))
+
+	def test_rebuild_matches_recorded(self):
+		recorded = self.rollup_values()
+		self.assertEqual(len(recorded), 2 * 4 * 3)
+		UsageRollup.objects.rebuild([self.location], batch_size=5)
+		self.assertEqual(self.rollup_values(), recorded)
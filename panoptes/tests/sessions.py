@@ -0,0 +1,135 @@
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from panoptes.core.models import DailyActivity, Location, Session
+from panoptes.management.commands import rebuild_daily_activity, rebuild_usage_rollups
+from panoptes.tests.utils import create_location, create_os_type, create_workstations
+import panoptes.core.models as core_models
+
+import datetime
+
+class EndSessionTest(TestCase):
+	"""Tests of ending a single session."""
+
+	def setUp(self):
+		self.location = create_location()
+		self.workstation = create_workstations(self.location, 1)[0]
+		Session.objects.start_session(self.workstation, create_os_type(), "start")
+
+	def open_session_count(self):
+		return Location.objects.get(pk=self.location.pk).open_session_count
+
+	def test_repeated_end_is_idempotent(self):
+		first = Session.objects.end_session(self.workstation, [], 0, "end")
+		second = Session.objects.end_session(self.workstation, [], 0, "end")
+		self.assertEqual(second.pk, first.pk)
+		self.assertEqual(second.end, first.end)
+		self.assertEqual(self.open_session_count(), 0)
+		self.assertEqual(DailyActivity.objects.get(location=self.location).sessions, 1)
+
+	def close_after_reading(self, event_id):
+		"""End the session with another report after the end has read it, but
+		before the end closes it, and return the result of the end."""
+		active_session_for_workstation = Session.objects.active_session_for_workstation
+		def close_first(workstation):
+			session = active_session_for_workstation(workstation)
+			Session.objects.filter(pk=session.pk).update(end=datetime.datetime.now(), end_event=event_id)
+			return session
+
+		Session.objects.active_session_for_workstation = close_first
+		try:
+			return Session.objects.end_session(self.workstation, [], 0, "end")
+		finally:
+			del Session.objects.active_session_for_workstation
+
+	def test_concurrent_repeat_returns_first_end(self):
+		session = self.close_after_reading("end")
+		self.assertEqual(session.end_event, "end")
+		self.assertEqual(Session.objects.filter(workstation=self.workstation).count(), 1)
+		self.assertEqual(DailyActivity.objects.filter(location=self.location).count(), 0)
+
+	def test_concurrent_end_is_not_counted_twice(self):
+		self.assertEqual(self.close_after_reading("other"), None)
+		self.assertEqual(Session.objects.get(workstation=self.workstation).end_event, "other")
+		self.assertEqual(self.open_session_count(), 1)
+
+class EndSessionsTest(TestCase):
+	"""Tests of ending many sessions at once."""
+
+	def setUp(self):
+		self.location = create_location()
+		self.os_type = create_os_type()
+		self.workstation = create_workstations(self.location, 1)[0]
+		Session.objects.start_session(self.workstation, self.os_type, "start")
+
+	def test_ends_session(self):
+		sessions = Session.objects.end_sessions([(self.workstation, [], 0, "end", None)])
+		self.assertEqual(sessions[0].end_event, "end")
+		self.assertEqual(Location.objects.get(pk=self.location.pk).open_session_count, 0)
+
+	def test_concurrent_end_is_not_counted_twice(self):
+
+		#  Close the session with another report after the batch has read it, but
+		#  before the batch closes it
+		bulk_update = core_models.bulk_update
+		def close_first(*args, **kwargs):
+			Session.objects.filter(workstation=self.workstation).update(end=datetime.datetime.now(), end_event="other")
+			return bulk_update(*args, **kwargs)
+
+		core_models.bulk_update = close_first
+		try:
+			sessions = Session.objects.end_sessions([(self.workstation, [], 0, "end", None)])
+		finally:
+			core_models.bulk_update = bulk_update
+
+		self.assertEqual(sessions, [None])
+		self.assertEqual(Session.objects.get(workstation=self.workstation).end_event, "other")
+		self.assertEqual(Location.objects.get(pk=self.location.pk).open_session_count, 1)
+
+class BackfillFallbackTest(TestCase):
+	"""Tests of filtering sessions recorded before their location and weekday were stored."""
+
+	def setUp(self):
+		self.location = create_location()
+		self.other_location = create_location("Other")
+		os_type = create_os_type()
+		self.closed, self.open = create_workstations(self.location, 2)
+		Session.objects.start_session(self.closed, os_type)
+		Session.objects.end_session(self.closed, [])
+		Session.objects.start_session(self.open, os_type)
+		self.weekday = Session.objects.get(workstation=self.closed).weekday
+
+		Session.objects.all().update(location=None, weekday=None)
+		Session.objects.clear_backfilled()
+
+	def tearDown(self):
+		Session.objects.clear_backfilled()
+
+	def filtered(self, location, weekdays=[]):
+		return list(Session.objects.filter_sessions(location=location, weekdays=weekdays))
+
+	def test_filters_by_workstation_location(self):
+		self.assertFalse(Session.objects.is_backfilled())
+		self.assertEqual(len(self.filtered(self.location)), 2)
+		self.assertEqual(self.filtered(self.other_location), [])
+		self.assertEqual([session.workstation for session in Session.objects.open_for_location(self.location)], [self.open])
+		self.assertEqual(Session.objects.open_for_location(self.other_location).count(), 0)
+
+	def test_filters_by_start_weekday(self):
+		other_weekday = self.weekday % 7 + 1
+		self.assertEqual(len(self.filtered(self.location, [self.weekday])), 2)
+		self.assertEqual(self.filtered(self.location, [other_weekday]), [])
+
+	def test_backfill_gives_same_results(self):
+		before = self.filtered(self.location, [self.weekday])
+		call_command('backfill_session_locations', verbosity=0)
+		call_command('backfill_weekdays', verbosity=0)
+		self.assertTrue(Session.objects.is_backfilled())
+		self.assertEqual(self.filtered(self.location, [self.weekday]), before)
+
+	def test_rebuild_requires_backfill(self):
+		#  Call the commands directly, since call_command exits on a CommandError
+		self.assertRaises(CommandError, rebuild_daily_activity.Command().handle, verbosity=0)
+		self.assertRaises(CommandError, rebuild_usage_rollups.Command().handle, verbosity=0, batch_size=1000)
@@ -0,0 +1,98 @@
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+from panoptes.core.models import OSType, Session, Workstation
+from panoptes.management.commands.drain_ingest_queue import Command
+from panoptes.tests.utils import create_location, create_workstations, mac_address
+from panoptes.tracking.batch import SessionEventBatch
+from panoptes.tracking.forms import SessionBatchForm
+import panoptes.settings as _settings
+import panoptes.tracking.spool as spool_module
+
+import datetime
+import os
+import shutil
+import tempfile
+
+class DrainIngestQueueTest(TestCase):
+	"""Tests of applying the events held in the ingest queue."""
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.spool = spool_module.EventSpool(os.path.join(self.directory, "queue.db"), 100)
+		self.saved_spool = spool_module._spool
+		spool_module._spool = self.spool
+
+		self.workstations = create_workstations(create_location(), 3)
+		for i in xrange(len(self.workstations)):
+			self.spool.append({
+				'type': SessionBatchForm.START_EVENT,
+				'mac': mac_address(i),
+				'os_type': _settings.OS_SLUG_WINDOWS,
+				'os_version': "7",
+				'user': "student",
+				'event_id': "start-%d" % i,
+				'at': datetime.datetime.now()})
+
+	def tearDown(self):
+		spool_module._spool = self.saved_spool
+		shutil.rmtree(self.directory)
+
+	def drain(self):
+		Command().handle_noargs(batch_size=10, interval=0, once=True, verbosity=0)
+
+	def test_applies_events(self):
+		self.drain()
+		self.assertEqual(len(self.spool), 0)
+		self.assertEqual(Session.objects.filter(end__isnull=True).count(), 3)
+
+	def test_failing_event_is_moved_aside(self):
+
+		#  Make any batch holding the second workstation's event fail
+		process = SessionEventBatch.process
+		poison = mac_address(1)
+		def fail_on_poison(batch):
+			if [event for event in batch.events if event['mac'] == poison]:
+				raise ValueError("poisoned event")
+			return process(batch)
+
+		SessionEventBatch.process = fail_on_poison
+		try:
+			self.drain()
+		finally:
+			SessionEventBatch.process = process
+
+		self.assertEqual(len(self.spool), 0)
+		failed = self.spool.failed(10)
+		self.assertEqual([event['mac'] for event_id, event, error in failed], [poison])
+		self.assertTrue("poisoned event" in failed[0][2])
+		self.assertEqual(Session.objects.filter(end__isnull=True).exclude(workstation=self.workstations[1]).count(), 2)
+
+	def test_failed_batch_clears_caches(self):
+
+		#  Fail every batch after it has filled the caches, as if its
+		#  transaction were rolled back when committing
+		process = SessionEventBatch.process
+		def fail_after_processing(batch):
+			process(batch)
+			raise ValueError("rolled back")
+
+		SessionEventBatch.process = fail_after_processing
+		try:
+			self.drain()
+		finally:
+			SessionEventBatch.process = process
+
+		self.assertEqual(len(self.spool.failed(10)), 3)
+		self.assertEqual(len(OSType.objects._os_types), 0)
+		self.assertEqual(len(Workstation.objects._mac_cache), 0)
+
+	def test_path_is_required(self):
+		spool_module._spool = None
+		path = _settings.INGEST_QUEUE_PATH
+		_settings.INGEST_QUEUE_PATH = None
+		try:
+			self.assertRaises(ImproperlyConfigured, spool_module.get_spool)
+		finally:
+			_settings.INGEST_QUEUE_PATH = path
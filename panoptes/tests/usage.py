@@ -0,0 +1,37 @@
+
+from django.test import TestCase
+
+from panoptes.core.models import Session
+from panoptes.tests.utils import count_queries, create_location, create_os_type, create_workstations
+from panoptes.tracking.usage import _build_current_usage
+
+class CurrentUsageTest(TestCase):
+	"""Tests of building the current usage of a location."""
+
+	def setUp(self):
+		self.location = create_location()
+		self.os_type = create_os_type()
+		Session.objects.is_backfilled()
+
+	def add_workstations(self, count, first=0):
+		workstations = create_workstations(self.location, count, first)
+		for workstation in workstations[::2]:
+			Session.objects.start_session(workstation, self.os_type)
+		return workstations
+
+	def test_query_count_is_constant(self):
+		self.add_workstations(2)
+		usage, few_queries = count_queries(_build_current_usage, self.location)
+		self.assertEqual(len(usage), 2)
+
+		self.add_workstations(20, first=2)
+		usage, many_queries = count_queries(_build_current_usage, self.location)
+		self.assertEqual(len(usage), 22)
+		self.assertEqual(few_queries, many_queries)
+		self.assertEqual(many_queries, 3)
+
+	def test_reports_open_sessions(self):
+		self.add_workstations(3)
+		usage = _build_current_usage(self.location)
+		self.assertEqual([bool(workstation['session_start']) for workstation in usage], [True, False, True])
+		self.assertEqual([len(workstation['mac_addresses']) for workstation in usage], [1, 1, 1])
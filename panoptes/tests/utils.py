@@ -0,0 +1,60 @@
+
+from django.conf import settings
+from django.db import connection
+
+from panoptes.core.models import Location, MACAddress, OSType, Workstation
+import panoptes.settings as _settings
+
+import datetime
+import time
+
+def mac_address(i):
+	"""Return the normalized MAC address of the i-th test workstation."""
+	return "00AA%08X" % i
+
+def create_location(name="Lab"):
+	"""Return a new Location instance that is open from 8 AM to 10 PM."""
+	return Location.objects.create(name=name,
+		earliest_opening=datetime.time(8), latest_closing=datetime.time(22),
+		timezone="America/New_York")
+
+def create_workstations(location, count, first=0):
+	"""Return a list of new tracked Workstation instances with a MAC address each.
+
+	Arguments:
+	location -- the Location instance of the workstations
+	count -- the number of workstations to create
+	first -- the index used for the MAC address of the first workstation
+
+	"""
+	workstations = []
+	for i in xrange(first, first + count):
+		workstation = Workstation.objects.create(name="ws-%d" % i, location=location)
+		MACAddress.objects.create(workstation=workstation, address=mac_address(i), nic="ethernet")
+		workstations.append(workstation)
+	return workstations
+
+def create_os_type():
+	"""Return the OSType instance used for test sessions."""
+	return OSType.objects.get_or_create(_settings.OS_SLUG_WINDOWS, None)
+
+def count_queries(function, *args, **kwargs):
+	"""Call the function and return its result and the number of queries it ran.
+
+	Django only records the queries run while DEBUG is on, so it is enabled
+	for the duration of the call.
+	"""
+	debug = settings.DEBUG
+	settings.DEBUG = True
+	connection.queries = []
+	try:
+		result = function(*args, **kwargs)
+		return result, len(connection.queries)
+	finally:
+		settings.DEBUG = debug
+
+def time_call(function, *args, **kwargs):
+	"""Call the function and return its result and its duration in seconds."""
+	started = time.time()
+	result = function(*args, **kwargs)
+	return result, time.time() - started
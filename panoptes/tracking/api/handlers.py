@@ -1,12 +1,14 @@
 
-from django.utils.feedgenerator import rfc3339_date
-
-from panoptes.core.models import Location, Session, Workstation
-from panoptes.core.utils.api import validate
-from panoptes.tracking.forms import CreateSessionForm, EndSessionForm
+from panoptes.core.models import DailyActivity, Location, Session
+from panoptes.core.utils.api import accepted, not_modified, validate
+from panoptes.tracking.batch import SessionEventBatch
+from panoptes.tracking.forms import CreateSessionForm, EndSessionForm, SessionBatchForm
 from panoptes.tracking.models import AccountFilter
+from panoptes.tracking.parsing import parse_datetime
+from panoptes.tracking.spool import SpoolFull, spool_end, spool_start
+from panoptes.tracking.usage import current_usage
+import panoptes.settings as _settings
 
-from dateutil.parser import parser as dateutil_parser
 from piston.handler import BaseHandler
 from piston.utils import rc
 
@@ -15,9 +17,14 @@ __all__ = [
 	"CurrentUsageHandler",
 	"LocationInfoHandler",
 	"LocationActivityHandler",
+	"SessionBatchHandler",
 	"SessionHandler"
 ]
 
+def _location_etag(location):
+	"""Return an ETag identifying the current version of the location's data."""
+	return '"%d-%d"' % (location.pk, location.version)
+
 class CurrentUsageHandler(BaseHandler):
 	"""Handler for getting detailed information about a location's current usage."""
 
@@ -40,6 +47,11 @@ class CurrentUsageHandler(BaseHandler):
 		            address   - the actual MAC address, in the form AA:BB:CC:DD:EE:FF
 		        session_start - an ISO 8601 string of the session start time with timezone
 
+		The usage is built with a fixed number of queries and cached for a few
+		seconds, or until a session starts or ends at the location.  The response
+		has an ETag derived from the location's version, and a request whose
+		If-None-Match header contains that ETag receives an HTTP 304 response.
+
 		If the location slug provided does not map to a valid location, an HTTP
 		400 bad request response is returned.
 
@@ -51,32 +63,12 @@ class CurrentUsageHandler(BaseHandler):
 			location = Location.objects.get(slug=location_slug)
 		except Location.DoesNotExist:
 			return rc.BAD_REQUEST
-
-		# Build a map of the workstations and their current usage
-		workstations = []
-		for workstation in Workstation.objects.all_for_location(location):
-
-			# Get the MAC information for the workstation
-			macs = []
-			for mac in workstation.mac_addresses.all():
-				macs.append({
-					'type':    mac.get_nic_display(),
-					'address': mac.address_with_separators(":")
-				})
-
-			# Provide a properly formatted session start time if one is in progress
-			start = Session.objects.active_session_for_workstation(workstation)
-			if start:
-				start = rfc3339_date(location.timezone.localize(start.start))
-
-			workstations.append({
-				'name': workstation.name,
-				'mac_addresses': macs,
-				'session_start': start
-			})
+		unchanged = not_modified(request, _location_etag(location))
+		if unchanged:
+			return unchanged
 
 		return {
-			'workstations': workstations
+			'workstations': current_usage(location)
 		}
 
 class LocationInfoHandler(BaseHandler):
@@ -93,6 +85,9 @@ class LocationInfoHandler(BaseHandler):
 			open_workstations  - The number of workstations currently available
 			total_workstations - The total number of workstations at the location
 
+		As with the current usage, a request whose If-None-Match header contains
+		the ETag of the location's version receives an HTTP 304 response.
+
 		If the location slug provided does not map to a valid location, an HTTP
 		400 bad request response is returned.
 
@@ -104,6 +99,9 @@ class LocationInfoHandler(BaseHandler):
 			location = Location.objects.get(slug=location_slug)
 		except Location.DoesNotExist:
 			return rc.BAD_REQUEST
+		unchanged = not_modified(request, _location_etag(location))
+		if unchanged:
+			return unchanged
 		return {
 			'name': location.name,
 			'open_workstations': location.open_workstation_count,
@@ -127,8 +125,13 @@ class LocationActivityHandler(BaseHandler):
 		after or before which sessions were logged, being the :param:start_dt
 		and :param:end_dt arguments.  Each of these must be a datetime string
 		formatted according to ISO 8601 (i.e., 1937-01-01T12:00:27.87+00:20).
-		These parameters can be used to specify a date window during which all
-		counted sessions must have occurred.
+		These parameters can be used to specify a window during which all counted
+		sessions must have occurred, with a session counted if it started at or
+		after the start datetime and ended at or before the end datetime.  Any
+		datetime given with a timezone is converted to the location's timezone.
+
+		As with the current usage, a request whose If-None-Match header contains
+		the ETag of the location's version receives an HTTP 304 response.
 
 		If the location slug provided does not map to a valid location, or if
 		either of the optional datetimes given is not properly formatted, an HTTP
@@ -148,25 +151,25 @@ class LocationActivityHandler(BaseHandler):
 			location = Location.objects.get(slug=location_slug)
 		except Location.DoesNotExist:
 			return rc.BAD_REQUEST
-		else:
-			filter_args = {'location': location}
-
-		parser = dateutil_parser()
-		if start_dt:
-			try:
-				filter_args['start_date'] = parser.parse(start_dt)
-			except ValueError:
-				return rc.BAD_REQUEST
-		if end_dt:
-			try:
-				filter_args['end_date'] = parser.parse(end_dt)
-			except ValueError:
-				return rc.BAD_REQUEST
+
+		window = []
+		for dt_string in (start_dt, end_dt):
+			dt = None
+			if dt_string:
+				dt = parse_datetime(dt_string)
+				if not dt:
+					return rc.BAD_REQUEST
+				if dt.tzinfo:
+					dt = dt.astimezone(location.timezone).replace(tzinfo=None)
+			window.append(dt)
+
+		unchanged = not_modified(request, _location_etag(location))
+		if unchanged:
+			return unchanged
 
 		# Return counts for the given sessions
-		sessions = Session.objects.filter_sessions(**filter_args)
 		return {
-			'total_users': sessions.count(),
+			'total_users': DailyActivity.objects.count_sessions(location, *window),
 		}
 
 class SessionHandler(BaseHandler):
@@ -191,10 +194,21 @@ class SessionHandler(BaseHandler):
 		user       - The optional name of the local workstation account
 		             reporting usage, or an arbitrary value. This value is used
 		             to control whether or not the session is tracked.
+
+		event_id   - An optional unique string of up to 36 characters, such as
+		             a UUID, generated by the client for this start. A start
+		             that is reported more than once with the same event ID
+		             only creates one session.
+
+		If the ingest queue is enabled, a valid start is queued and an HTTP 202
+		accepted response is returned, or an HTTP 503 response if the queue is
+		full.
 		"""
 		data = request.form.cleaned_data
 		if AccountFilter.objects.is_user_loggable(data['user'], data['workstation']):
-			session = Session.objects.start_session(data['workstation'], data['os'])
+			if _settings.INGEST_QUEUE_ENABLED:
+				return self._spool(spool_start, request)
+			session = Session.objects.start_session(data['workstation'], data['os'], data['event_id'])
 			return rc.CREATED if session else rc.BAD_REQUEST
 		else:
 			return rc.BAD_REQUEST
@@ -220,7 +234,55 @@ class SessionHandler(BaseHandler):
 
 		offset - A positive or negative integer representing the number of
 		         seconds that should be added to the session's reported end time.
+
+		event_id - An optional unique string of up to 36 characters, such as a
+		           UUID, generated by the client for this end. An end that is
+		           reported more than once with the same event ID only closes
+		           one session.
+
+		If the ingest queue is enabled, a valid end is queued and an HTTP 202
+		accepted response is returned, or an HTTP 503 response if the queue is
+		full.
 		"""
 		data = request.form.cleaned_data
-		session = Session.objects.end_session(data['workstation'], data['apps'], data['offset'])
+		if _settings.INGEST_QUEUE_ENABLED:
+			return self._spool(spool_end, request)
+		session = Session.objects.end_session(data['workstation'], data['apps'], data['offset'], data['event_id'])
 		return rc.ALL_OK if session else rc.BAD_REQUEST
+
+	def _spool(self, spool_event, request):
+		"""Queue the validated event using the given spool function."""
+		try:
+			spool_event(request.form.data['mac'], request.form.cleaned_data)
+		except SpoolFull:
+			return rc.THROTTLED
+		return accepted()
+
+class SessionBatchHandler(BaseHandler):
+	"""Handler for reporting many session starts and ends in one request."""
+
+	allowed_methods = ('POST',)
+
+	@validate(SessionBatchForm, 'POST')
+	def create(self, request):
+		"""
+		Start and end many sessions using the given POST data, whose single key
+		and its function are explained below.
+
+		events - A JSON list of objects describing session events in the order
+		         in which they occurred.  Each object must have a `type` key
+		         whose value is either "start" or "end".  A start event accepts
+		         the same keys as a POST to the sessions API, and an end event
+		         accepts the same keys as a PUT to it.
+
+		The events are applied using far fewer queries than reporting each event
+		individually would require.  The JSON response contains the result of
+		each event, in the order given, via the following key:
+
+		    statuses - a list of the HTTP status code that reporting each event
+		               individually would have returned
+		"""
+		batch = SessionEventBatch(request.form.cleaned_data['events'])
+		return {
+			'statuses': batch.process()
+		}
@@ -3,15 +3,18 @@ from django.conf.urls.defaults import include, patterns, url
 
 from panoptes.core.utils.api import CSRFExemptResource
 from panoptes.tracking.api.handlers import *
+from panoptes.tracking.api.views import current_usage_stream
 
 location_patterns = patterns('',
 	url(r'^activity/$', CSRFExemptResource(handler=LocationActivityHandler)),
 	url(r'^activity/from/(?P<start_dt>[^\/]+)/to/(?P<end_dt>[^\/]+)/$', CSRFExemptResource(handler=LocationActivityHandler)),
 	url(r'^current-usage/$', CSRFExemptResource(handler=CurrentUsageHandler)),
+	url(r'^current-usage/stream/$', current_usage_stream),
 	url(r'^info/$', CSRFExemptResource(handler=LocationInfoHandler))
 )
 
 urlpatterns = patterns('',
 	(r'^location/(?P<location_slug>[^\/]+)/', include(location_patterns)),
-	url(r'^sessions/$', CSRFExemptResource(handler=SessionHandler))
+	url(r'^sessions/$', CSRFExemptResource(handler=SessionHandler)),
+	url(r'^sessions/batch/$', CSRFExemptResource(handler=SessionBatchHandler))
 )
@@ -0,0 +1,44 @@
+
+from django.http import HttpResponse, HttpResponseBadRequest
+
+from panoptes.core.models import Location
+from panoptes.tracking.stream import iter_usage_events
+
+def current_usage_stream(request, location_slug=None):
+	"""Stream changes to the current usage of a location as server-sent events.
+
+	The stream begins with a `snapshot` event whose data has the same form as the
+	current usage API's response, followed by a `session-started` or
+	`session-ended` event whenever a session starts or ends at one of the
+	location's workstations.  The data of each of these events has the following
+	keys:
+
+	    name          - the display name of the workstation
+	    session_start - an ISO 8601 string of the session start time with
+	                    timezone, or null if the session ended
+
+	A client that reconnects with a Last-Event-ID header, or a `last_event_id`
+	query parameter, receives only the changes that it missed when possible.
+
+	If the location slug provided does not map to a valid location, an HTTP
+	400 bad request response is returned.
+
+	:param location_slug: a slug identifying a location
+	:type location_slug: str
+
+	"""
+	try:
+		location = Location.objects.get(slug=location_slug)
+	except Location.DoesNotExist:
+		return HttpResponseBadRequest("Bad Request", content_type="text/plain")
+
+	last_event_id = request.META.get('HTTP_LAST_EVENT_ID', request.GET.get('last_event_id', None))
+	try:
+		last_event_id = int(last_event_id)
+	except (TypeError, ValueError):
+		last_event_id = None
+
+	response = HttpResponse(iter_usage_events(location, last_event_id), content_type="text/event-stream")
+	response['Cache-Control'] = "no-cache"
+	response['X-Accel-Buffering'] = "no"
+	return response
@@ -0,0 +1,99 @@
+
+from panoptes.core.model_fields import normalize_mac_address
+from panoptes.core.models import OSType, Session, Workstation
+from panoptes.tracking.forms import SessionBatchForm
+from panoptes.tracking.models import AccountFilter
+
+class SessionEventBatch(object):
+	"""
+	A batch of session start and end events that is processed using set-based
+	queries rather than one series of queries per event.
+	"""
+
+	#  The HTTP status codes reported for each event
+	STATUS_STARTED = 201
+	STATUS_ENDED = 200
+	STATUS_REJECTED = 400
+
+	def __init__(self, events):
+		"""Create a batch from a list of cleaned event data.
+
+		Arguments:
+		events -- a list of dicts of cleaned event data as provided by the
+		          SessionBatchForm, with None used for any invalid events, and
+		          an optional `at` datetime of when each event was reported
+
+		"""
+		self.events = events
+		self._workstations = {}
+		self._os_types = {}
+
+	def _make_rounds(self, indexes):
+		"""
+		Split the given event indexes into ordered rounds in which each
+		workstation appears at most once, so that a workstation that reports
+		several events in one batch has them applied in the order reported.
+		"""
+		rounds = []
+		seen = {}
+		for i in indexes:
+			workstation = self._workstations[i]
+			round_number = seen.get(workstation.pk, 0)
+			seen[workstation.pk] = round_number + 1
+			if round_number == len(rounds):
+				rounds.append([])
+			rounds[round_number].append(i)
+		return rounds
+
+	def process(self):
+		"""Apply every event in the batch.
+
+		Returns: a list as long as the list of events of the HTTP status code of
+		         the result of each event
+
+		"""
+
+		statuses = [self.STATUS_REJECTED] * len(self.events)
+
+		#  Resolve the workstations of every event in one query
+		valid = [i for i, event in enumerate(self.events) if event]
+		workstations = Workstation.objects.trackable_by_macs([self.events[i]['mac'] for i in valid])
+		for i in valid:
+			workstation = workstations[normalize_mac_address(self.events[i]['mac'])]
+			if workstation:
+				self._workstations[i] = workstation
+		valid = [i for i in valid if i in self._workstations]
+
+		#  Determine the OS types and tracking eligibility of all starts at once
+		starts = [i for i in valid if self.events[i]['type'] == SessionBatchForm.START_EVENT]
+		os_types = OSType.objects.get_or_create_many(
+			[(self.events[i]['os_type'], self.events[i]['os_version']) for i in starts])
+		loggable = AccountFilter.objects.are_users_loggable(
+			[(self.events[i]['user'], self._workstations[i]) for i in starts])
+		for i, os_type, is_loggable in zip(starts, os_types, loggable):
+			if is_loggable:
+				self._os_types[i] = os_type
+		valid = [i for i in valid if self.events[i]['type'] == SessionBatchForm.END_EVENT or i in self._os_types]
+
+		for event_round in self._make_rounds(valid):
+			self._process_round(event_round, statuses)
+
+		return statuses
+
+	def _process_round(self, indexes, statuses):
+		"""Apply the events at the given indexes, updating their statuses."""
+
+		starts = [i for i in indexes if self.events[i]['type'] == SessionBatchForm.START_EVENT]
+		ends = [i for i in indexes if self.events[i]['type'] == SessionBatchForm.END_EVENT]
+
+		started = Session.objects.start_sessions(
+			[(self._workstations[i], self._os_types[i], self.events[i]['event_id'], self.events[i].get('at', None)) for i in starts])
+		for i, is_started in zip(starts, started):
+			if is_started:
+				statuses[i] = self.STATUS_STARTED
+
+		ended = Session.objects.end_sessions(
+			[(self._workstations[i], self.events[i]['apps'], self.events[i]['offset'], self.events[i]['event_id'], self.events[i].get('at', None)) for i in ends])
+		for i, session in zip(ends, ended):
+			if session:
+				statuses[i] = self.STATUS_ENDED
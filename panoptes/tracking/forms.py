@@ -1,19 +1,26 @@
 
 from django import forms
+from django.utils import simplejson as json
+from django.utils.translation import ugettext_lazy as _
 
-from panoptes.core.fields import WorkstationByMACAddressField
+from panoptes.core.fields import MACAddressField, WorkstationByMACAddressField
 from panoptes.core.models import OSType
+from panoptes.tracking.parsing import parse_app_durations
 import panoptes.settings as _settings
 
-from dateutil.parser import parser as dateutil_parser
+class StartEventForm(forms.Form):
+	"""A form used to validate the data describing the start of a session."""
 
-class CreateSessionForm(forms.Form):
-	"""A form used to validate POST data passed when creating a session."""
-
-	mac        = WorkstationByMACAddressField()
+	mac        = MACAddressField()
 	os_type    = forms.ChoiceField(choices=_settings.OS_CHOICES)
 	os_version = forms.CharField(required=False)
 	user       = forms.CharField(required=False)
+	event_id   = forms.CharField(required=False, max_length=36)
+
+class CreateSessionForm(StartEventForm):
+	"""A form used to validate POST data passed when creating a session."""
+
+	mac = WorkstationByMACAddressField()
 
 	def clean(self):
 		"""Normalize some of our passed data."""
@@ -29,20 +36,13 @@ class CreateSessionForm(forms.Form):
 
 		return self.cleaned_data
 
-class EndSessionForm(forms.Form):
-	"""A form used to validate PUT data passed when ending a session."""
-
-	mac    = WorkstationByMACAddressField()
-	apps   = forms.CharField(required=False)
-	offset = forms.IntegerField(required=False)
+class EndEventForm(forms.Form):
+	"""A form used to validate the data describing the end of a session."""
 
-	def _parse_datetime(self, dt_string):
-		"""Try to return the ISO 8601 datetime string as a datetime instance."""
-		parser = dateutil_parser()
-		try:
-			return parser.parse(dt_string)
-		except (AttributeError, ValueError):
-			return None
+	mac      = MACAddressField()
+	apps     = forms.CharField(required=False)
+	offset   = forms.IntegerField(required=False)
+	event_id = forms.CharField(required=False, max_length=36)
 
 	def clean_apps(self):
 		"""
@@ -52,24 +52,10 @@ class EndSessionForm(forms.Form):
 		The cleaned data for this field will be a string with information on each app
 		separated by a comma.  Each chunk of information will consist of the app name
 		and the start and end ISO 8601 datetime of its usage, with each of these data
-		separated by a # sign.
+		separated by a # sign.  The durations of any app reported more than once are
+		totalled, so that each app appears in the list only once.
 		"""
-
-		all_apps = []
-		for app in self.cleaned_data.get('apps', '').split(","):
-			try:
-				reported_name, start, end = app.split("#")
-			except ValueError:
-				pass
-			else:
-				try:
-					dt_delta = self._parse_datetime(end) - self._parse_datetime(start)
-				except TypeError:
-					duration = 0
-				else:
-					duration = dt_delta.seconds
-				all_apps.append((reported_name, duration))
-		return all_apps
+		return parse_app_durations(self.cleaned_data.get('apps', ''))
 
 	def clean_offset(self):
 		"""Make the offset value be a 0 if it is left blank."""
@@ -78,6 +64,11 @@ class EndSessionForm(forms.Form):
 			offset = 0
 		return offset
 
+class EndSessionForm(EndEventForm):
+	"""A form used to validate PUT data passed when ending a session."""
+
+	mac = WorkstationByMACAddressField()
+
 	def clean(self):
 		"""Normalize some of the passed data."""
 
@@ -86,4 +77,52 @@ class EndSessionForm(forms.Form):
 
 		return self.cleaned_data
 
+class SessionBatchForm(forms.Form):
+	"""A form used to validate POST data passed when reporting a batch of events."""
+
+	#  The names of the event types and the forms used to validate each event
+	START_EVENT = "start"
+	END_EVENT = "end"
+	EVENT_FORMS = {
+		START_EVENT: StartEventForm,
+		END_EVENT: EndEventForm
+	}
+
+	events = forms.CharField()
+
+	def clean_events(self):
+		"""
+		Decode the events string, which is a JSON list of objects, each of which
+		has a `type` key of either "start" or "end" and the other keys accepted
+		when starting or ending a single session.
+
+		The cleaned data for this field is a list as long as the list of events
+		given, containing the cleaned data of each event with its `type` added, or
+		None for any event that is not valid.  This allows one malformed event to
+		be rejected without rejecting the rest of its batch.
+		"""
 
+		try:
+			events = json.loads(self.cleaned_data.get('events', ''))
+		except ValueError:
+			raise forms.ValidationError(_("events must be a JSON list"))
+		if not isinstance(events, list):
+			raise forms.ValidationError(_("events must be a JSON list"))
+		if len(events) > _settings.SESSION_BATCH_MAX_EVENTS:
+			raise forms.ValidationError(_("a batch may contain at most %(max)d events") % {
+				'max': _settings.SESSION_BATCH_MAX_EVENTS})
+
+		cleaned_events = []
+		for event in events:
+			cleaned_event = None
+			try:
+				EventForm = self.EVENT_FORMS[event.get('type', None)]
+			except (AttributeError, KeyError, TypeError):
+				pass
+			else:
+				event_form = EventForm(event)
+				if event_form.is_valid():
+					cleaned_event = event_form.cleaned_data
+					cleaned_event['type'] = event['type']
+			cleaned_events.append(cleaned_event)
+		return cleaned_events
@@ -0,0 +1,68 @@
+
+import fnmatch
+import re
+
+class NameMatcher(object):
+	"""
+	A compiled list of account names, which may contain shell-style patterns such
+	as "lab-*" or regular expressions delimited by slashes such as "/svc_.*/".
+	All matching is case-insensitive.
+	"""
+
+	_GLOB_CHARACTERS = re.compile(r'[*?\[]')
+
+	def __init__(self, names):
+		"""Compile the given iterable of account names and patterns."""
+
+		exact = set()
+		patterns = []
+		for name in names:
+			#  Regular expressions are compiled as given, since lowercasing their
+			#  source would change escapes such as \D, and are matched without
+			#  regard to case by the compiled pattern
+			if len(name) > 2 and name.startswith("/") and name.endswith("/"):
+				try:
+					re.compile(name[1:-1])
+				except re.error:
+					exact.add(name.lower())
+				else:
+					patterns.append("(?:%s)\\Z" % name[1:-1])
+			elif self._GLOB_CHARACTERS.search(name):
+				patterns.append(fnmatch.translate(name.lower()))
+			else:
+				exact.add(name.lower())
+
+		self.names = frozenset(exact)
+		self.pattern = re.compile("|".join(patterns), re.IGNORECASE) if patterns else None
+
+	def __nonzero__(self):
+		return bool(self.names or self.pattern)
+
+	def matches(self, username):
+		"""Return True if the lowercase username is matched by a name or pattern."""
+		if username in self.names:
+			return True
+		return bool(self.pattern and self.pattern.match(username))
+
+class AccountMatcher(object):
+	"""The compiled include and exclude lists of every account filter at a location."""
+
+	def __init__(self, account_filters):
+		"""Compile the names of the given iterable of AccountFilter instances."""
+		includes = []
+		excludes = []
+		for account_filter in account_filters:
+			includes.extend(account_filter.include or [])
+			excludes.extend(account_filter.exclude or [])
+		self.includes = NameMatcher(includes)
+		self.excludes = NameMatcher(excludes)
+
+	def is_loggable(self, username):
+		"""Return True if a session reported by the user should be tracked."""
+		if username:
+			username = username.lower()
+			if self.excludes.matches(username):
+				return False
+			if self.includes and not self.includes.matches(username):
+				return False
+		return True
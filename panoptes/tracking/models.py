@@ -1,24 +1,65 @@
 
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import ugettext_lazy as _
 
-from panoptes.core.models import Location
+from panoptes.core.models import Location, MACAddress, OSType, ReportedApplication, Workstation
+from panoptes.core.signals import sessions_ended, sessions_started
+from panoptes.core.utils.cache import LRUCache
+from panoptes.tracking.matchers import AccountMatcher
 from panoptes.tracking.model_fields import AccountListField
+from panoptes.tracking.stream import publish_ended, publish_started
+from panoptes.tracking.usage import clear_current_usage
+import panoptes.settings as _settings
 
 class AccountFilterManager(models.Manager):
 	"""Custom manager for the AccountFilter model."""
 
-	def _lc_name_list(self, names):
-		"""Return a version of the given names list with every name in lowercase."""
-		return [name.lower() for name in names]
+	#  A cache of the compiled account filters of each location, keyed by the
+	#  location's primary key, which is cleared whenever a filter changes
+	_matchers = LRUCache(_settings.ACCOUNT_MATCHER_CACHE_SIZE, _settings.ACCOUNT_MATCHER_CACHE_TIMEOUT)
+
+	def matchers_for_locations(self, location_ids):
+		"""Return the compiled account filters for many locations.
+
+		The filters of any locations that are not cached are fetched with a single
+		query and compiled into an AccountMatcher instance for each location.
+
+		Arguments:
+		location_ids -- an iterable of the primary keys of Location instances
+
+		Returns: a dict mapping each location's primary key to an AccountMatcher
+
+		"""
+		matchers = {}
+		uncached = {}
+		for location_id in set(location_ids):
+			try:
+				matchers[location_id] = self._matchers[location_id]
+			except KeyError:
+				uncached[location_id] = []
+
+		if uncached:
+			for account_filter in self.filter(location__in=uncached.keys()):
+				uncached[account_filter.location_id].append(account_filter)
+			for location_id, account_filters in uncached.iteritems():
+				matchers[location_id] = self._matchers[location_id] = AccountMatcher(account_filters)
+
+		return matchers
+
+	def clear_matchers(self):
+		"""Discard the compiled account filters of every location."""
+		self._matchers.clear()
 
 	def is_user_loggable(self, username, workstation):
 		"""Return True if the user at the workstation should be tracked.
 
 		This works by making a master exclude and include list from the lists of all
-		account filters set up for the location of the workstation.  Precedence is
-		given to the include filter, so if an include list exists and the user is in
-		it, they will be tracked, even if they appear in the exclude list.
+		account filters set up for the location of the workstation.  A user who
+		matches the exclude list is not tracked, and if an include list exists, only
+		users who match it are tracked.  Either list can contain shell-style
+		patterns, such as "lab-*", or regular expressions delimited by slashes, such
+		as "/svc_.*/".  The compiled lists of each location are cached.
 
 		Arguments:
 		username -- a string of the logged-in user's name
@@ -30,18 +71,23 @@ class AccountFilterManager(models.Manager):
 
 		if not workstation:
 			return False
-		if username:
-			username = username.lower()
-			all_excludes = []
-			all_includes = []
-			for account_filter in self.filter(location=workstation.location):
-				all_excludes.extend(account_filter.exclude or [])
-				all_includes.extend(account_filter.include or [])
-			if username in self._lc_name_list(all_excludes):
-				return False
-			if all_includes and username not in self._lc_name_list(all_includes):
-				return False
-		return True
+		return self.matchers_for_locations([workstation.location_id])[workstation.location_id].is_loggable(username)
+
+	def are_users_loggable(self, users):
+		"""Return whether each user at each workstation should be tracked.
+
+		This applies the same rules as `is_user_loggable`, but fetches the account
+		filters for the locations of every workstation with at most one query.
+
+		Arguments:
+		users -- a list of two-tuples of the form (username, workstation)
+
+		Returns: a list of booleans as long as `users`
+
+		"""
+		matchers = self.matchers_for_locations([workstation.location_id for username, workstation in users if workstation])
+		return [bool(workstation) and matchers[workstation.location_id].is_loggable(username)
+				for username, workstation in users]
 
 class AccountFilter(models.Model):
 	"""
@@ -78,3 +124,52 @@ class AccountFilter(models.Model):
 		return self._join_user_names(self.exclude)
 	exclude_users.short_description = _("exclude users")
 
+def _clear_account_matchers(sender, **kwargs):
+	"""Clear the compiled account filters when any account filter changes."""
+	AccountFilter.objects.clear_matchers()
+post_save.connect(_clear_account_matchers, sender=AccountFilter)
+post_delete.connect(_clear_account_matchers, sender=AccountFilter)
+
+def clear_process_caches():
+	"""Discard every model instance cached by the current process.
+
+	The caches of MAC addresses, OS types, application names and account filters
+	are normally kept current by signals, but must be cleared whenever the rows
+	they hold may have been discarded without one, such as when a transaction
+	that created them is rolled back or the database is flushed.
+	"""
+	Workstation.objects.clear_mac_cache()
+	OSType.objects.clear_cache()
+	ReportedApplication.objects.clear_indexes()
+	AccountFilter.objects.clear_matchers()
+
+def _clear_session_usage(sender, workstations, **kwargs):
+	"""Clear the current usage of the locations at which sessions changed."""
+	clear_current_usage([workstation.location_id for workstation in workstations])
+sessions_started.connect(_clear_session_usage)
+sessions_ended.connect(_clear_session_usage)
+
+def _publish_started(sender, workstations, sessions, **kwargs):
+	"""Publish the sessions that started to the usage streams of their locations."""
+	publish_started(workstations, sessions)
+sessions_started.connect(_publish_started)
+
+def _publish_ended(sender, workstations, **kwargs):
+	"""Publish the sessions that ended to the usage streams of their locations."""
+	publish_ended(workstations)
+sessions_ended.connect(_publish_ended)
+
+def _clear_workstation_usage(sender, instance, **kwargs):
+	"""Clear the current usage of a location whose workstation changed."""
+	clear_current_usage([instance.location_id])
+post_save.connect(_clear_workstation_usage, sender=Workstation)
+post_delete.connect(_clear_workstation_usage, sender=Workstation)
+
+def _clear_mac_address_usage(sender, instance, **kwargs):
+	"""Clear the current usage of a location whose MAC addresses changed."""
+	try:
+		clear_current_usage([instance.workstation.location_id])
+	except Workstation.DoesNotExist:
+		pass
+post_save.connect(_clear_mac_address_usage, sender=MACAddress)
+post_delete.connect(_clear_mac_address_usage, sender=MACAddress)
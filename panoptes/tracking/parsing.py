@@ -0,0 +1,83 @@
+
+from panoptes.core.utils.dates import total_seconds
+
+from dateutil.parser import parse as dateutil_parse
+
+import datetime
+import re
+
+#  A match for the ISO 8601 datetimes sent by the Panoptes clients
+_ISO_DATETIME_MATCH = re.compile(r'(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)(?:\.(\d{1,6}))?$')
+
+#  A search for each app record in an apps string, which must be delimited by
+#  commas and contain exactly three fields separated by # signs
+_APP_RECORD_SEARCH = re.compile(r'(?:^|,)([^,#]*)#([^,#]*)#([^,#]*)(?=,|$)')
+
+def parse_datetime(dt_string):
+	"""Try to return the ISO 8601 datetime string as a datetime instance.
+
+	The format sent by the Panoptes clients is parsed directly, and any other
+	format is left to dateutil.
+
+	Arguments:
+	dt_string -- a string representation of a datetime
+
+	Returns: a datetime instance, or None if the string could not be parsed
+
+	"""
+	match = _ISO_DATETIME_MATCH.match(dt_string)
+	if match:
+		year, month, day, hour, minute, second, fraction = match.groups()
+		try:
+			return datetime.datetime(int(year), int(month), int(day),
+				int(hour), int(minute), int(second),
+				int(fraction.ljust(6, "0")) if fraction else 0)
+		except ValueError:
+			return None
+	try:
+		return dateutil_parse(dt_string)
+	except (AttributeError, ValueError, OverflowError):
+		return None
+
+def iter_app_records(apps):
+	"""Yield the records of application usage in an apps string.
+
+	Each record in the string consists of the app name and the start and end
+	ISO 8601 datetimes of its usage separated by # signs, with the records
+	separated by commas.  Any record without exactly three fields is skipped.
+
+	Arguments:
+	apps -- the apps string sent when ending a session
+
+	Yields: a three-tuple of the form (reported_name, start, end), with the start
+	        and end given as strings
+
+	"""
+	for match in _APP_RECORD_SEARCH.finditer(apps):
+		yield match.groups()
+
+def parse_app_durations(apps):
+	"""Return the total number of seconds for which each app in the string was used.
+
+	An app whose start or end cannot be parsed, or whose end precedes its start,
+	is given a duration of zero for that record, so that its use is still logged.
+
+	Arguments:
+	apps -- the apps string sent when ending a session
+
+	Returns: a list of two-tuples of the form (reported_name, duration), with
+	         one tuple for each app in the order in which it was first reported
+
+	"""
+	durations = {}
+	names = []
+	for reported_name, start, end in iter_app_records(apps):
+		try:
+			duration = max(total_seconds(parse_datetime(end) - parse_datetime(start)), 0)
+		except TypeError:
+			duration = 0
+		if reported_name not in durations:
+			durations[reported_name] = 0
+			names.append(reported_name)
+		durations[reported_name] += duration
+	return [(reported_name, durations[reported_name]) for reported_name in names]
@@ -0,0 +1,192 @@
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import simplejson as json
+
+from panoptes.tracking.forms import SessionBatchForm
+import panoptes.settings as _settings
+
+import datetime
+import sqlite3
+import threading
+import uuid
+
+class SpoolFull(Exception):
+	"""Raised when an event is added to a spool that holds its maximum number of events."""
+	pass
+
+class EventSpool(object):
+	"""
+	A durable first-in, first-out queue of tracking events, stored in an SQLite
+	database using write-ahead logging so that events can be added by many
+	request-handling processes while a single worker process removes them.
+
+	Events are only removed once they have been applied, so any events held
+	when a worker stops unexpectedly are applied again when it restarts.  An
+	event that cannot be applied is moved to a table of failed events, where it
+	is kept for inspection without holding up the events behind it.
+	"""
+
+	_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+	def __init__(self, path, max_events):
+		"""Create a spool.
+
+		Arguments:
+		path -- the path to the SQLite database file holding the events
+		max_events -- the number of held events beyond which no more are added
+
+		"""
+		self.path = path
+		self.max_events = max_events
+		self._local = threading.local()
+
+	def _connection(self):
+		"""Return the SQLite connection used by the current thread."""
+		connection = getattr(self._local, 'connection', None)
+		if not connection:
+			connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+			connection.execute("PRAGMA journal_mode=WAL")
+			connection.execute("PRAGMA synchronous=FULL")
+			connection.execute("CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, event TEXT NOT NULL)")
+			connection.execute("CREATE TABLE IF NOT EXISTS failed_events (id INTEGER PRIMARY KEY, event TEXT NOT NULL, error TEXT NOT NULL, failed_at TEXT NOT NULL)")
+			self._local.connection = connection
+		return connection
+
+	def __len__(self):
+		return self._connection().execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+	def _encode(self, event):
+		"""Return the event dict as a JSON string."""
+		event = dict(event)
+		event['at'] = event['at'].strftime(self._DATETIME_FORMAT)
+		return json.dumps(event)
+
+	def _decode(self, data):
+		"""Return the JSON string as an event dict."""
+		event = json.loads(data)
+		event['at'] = datetime.datetime.strptime(event['at'], self._DATETIME_FORMAT)
+		return event
+
+	def append(self, event):
+		"""Add an event to the end of the spool.
+
+		If the spool already holds its maximum number of events, a SpoolFull
+		exception is raised.  The number of held events is estimated from the
+		range of their IDs, so that it can be found without counting them.
+
+		Arguments:
+		event -- a dict of event data with an `at` datetime
+
+		"""
+		connection = self._connection()
+		connection.execute("BEGIN IMMEDIATE")
+		try:
+			held = connection.execute("SELECT MAX(id) - MIN(id) + 1 FROM events").fetchone()[0] or 0
+			if held >= self.max_events:
+				raise SpoolFull
+			connection.execute("INSERT INTO events (event) VALUES (?)", (self._encode(event),))
+		except:
+			connection.execute("ROLLBACK")
+			raise
+		else:
+			connection.execute("COMMIT")
+
+	def peek(self, limit):
+		"""Return the oldest events in the spool without removing them.
+
+		Arguments:
+		limit -- the maximum number of events to return
+
+		Returns: a list of two-tuples of the form (event_id, event)
+
+		"""
+		rows = self._connection().execute("SELECT id, event FROM events ORDER BY id LIMIT ?", (limit,))
+		return [(row_id, self._decode(data)) for row_id, data in rows]
+
+	def remove(self, ids):
+		"""Remove the events with the given spool IDs, as returned by `peek`."""
+		if ids:
+			self._connection().execute("DELETE FROM events WHERE id IN (%s)" % ", ".join(["?"] * len(ids)), ids)
+
+	def fail(self, event_id, error):
+		"""Move an event that could not be applied to the table of failed events.
+
+		Arguments:
+		event_id -- the spool ID of the event, as returned by `peek`
+		error -- a string describing why the event could not be applied
+
+		"""
+		connection = self._connection()
+		connection.execute("BEGIN IMMEDIATE")
+		try:
+			connection.execute("INSERT INTO failed_events (id, event, error, failed_at) SELECT id, event, ?, ? FROM events WHERE id = ?",
+				(error, datetime.datetime.now().strftime(self._DATETIME_FORMAT), event_id))
+			connection.execute("DELETE FROM events WHERE id = ?", (event_id,))
+		except:
+			connection.execute("ROLLBACK")
+			raise
+		else:
+			connection.execute("COMMIT")
+
+	def failed(self, limit):
+		"""Return the oldest failed events.
+
+		Arguments:
+		limit -- the maximum number of failed events to return
+
+		Returns: a list of three-tuples of the form (event_id, event, error)
+
+		"""
+		rows = self._connection().execute("SELECT id, event, error FROM failed_events ORDER BY id LIMIT ?", (limit,))
+		return [(row_id, self._decode(data), error) for row_id, data, error in rows]
+
+_spool = None
+
+def get_spool():
+	"""Return the EventSpool configured by the ingest queue settings.
+
+	Because the queued events must survive a restart, the path to the spool's
+	database has no default, and an ImproperlyConfigured exception is raised
+	if it has not been set.
+	"""
+	global _spool
+	if not _spool:
+		if not _settings.INGEST_QUEUE_PATH:
+			raise ImproperlyConfigured("PANOPTES_INGEST_QUEUE_PATH must be set to a persistent path to queue session events")
+		_spool = EventSpool(_settings.INGEST_QUEUE_PATH, _settings.INGEST_QUEUE_MAX_EVENTS)
+	return _spool
+
+def spool_start(mac, data):
+	"""Add the start of a session to the spool.
+
+	Arguments:
+	mac -- the reported MAC address of the workstation
+	data -- the cleaned data of a CreateSessionForm
+
+	"""
+	get_spool().append({
+		'type': SessionBatchForm.START_EVENT,
+		'mac': mac,
+		'os_type': data['os_type'],
+		'os_version': data['os_version'],
+		'user': data['user'],
+		'event_id': data['event_id'] or uuid.uuid4().hex,
+		'at': datetime.datetime.now()
+	})
+
+def spool_end(mac, data):
+	"""Add the end of a session to the spool.
+
+	Arguments:
+	mac -- the reported MAC address of the workstation
+	data -- the cleaned data of an EndSessionForm
+
+	"""
+	get_spool().append({
+		'type': SessionBatchForm.END_EVENT,
+		'mac': mac,
+		'apps': data['apps'],
+		'offset': data['offset'],
+		'event_id': data['event_id'] or uuid.uuid4().hex,
+		'at': datetime.datetime.now()
+	})
@@ -0,0 +1,114 @@
+
+from django.utils import simplejson as json
+from django.utils.feedgenerator import rfc3339_date
+
+from panoptes.core.models import Location, Workstation
+from panoptes.core.pubsub import get_backend
+from panoptes.tracking.usage import current_usage
+import panoptes.settings as _settings
+
+import time
+
+#  The names of the events sent to subscribers of a location's usage stream
+SNAPSHOT_EVENT = "snapshot"
+STARTED_EVENT = "session-started"
+ENDED_EVENT = "session-ended"
+
+def _channel(location_id):
+	"""Return the name of the channel carrying a location's usage changes."""
+	return "panoptes:location:%d:usage" % location_id
+
+def _publish(event, workstations, starts):
+	"""Publish a usage change for each of the workstations.
+
+	The location of each workstation is only needed to localize the start of
+	its session, and is read from the workstation when it was fetched along
+	with it, as it is by the MAC address cache.  Only the locations that were
+	not are fetched, with a single query.
+
+	Arguments:
+	event -- the name of the event
+	workstations -- a list of Workstation instances
+	starts -- a list as long as `workstations` of naive datetimes of when each
+	          workstation's session started, or None
+
+	"""
+	backend = get_backend()
+	location_cache = Workstation._meta.get_field('location').get_cache_name()
+	missing = set([workstation.location_id for workstation, start in zip(workstations, starts)
+		if start and not hasattr(workstation, location_cache)])
+	locations = {}
+	if missing:
+		locations = Location.objects.in_bulk(list(missing))
+
+	for workstation, start in zip(workstations, starts):
+		if not workstation.location_id:
+			continue
+		if start:
+			location = getattr(workstation, location_cache, None) or locations.get(workstation.location_id, None)
+			if not location:
+				continue
+			start = rfc3339_date(location.timezone.localize(start))
+		backend.publish(_channel(workstation.location_id), {
+			'event': event,
+			'name': workstation.name,
+			'session_start': start
+		})
+
+def publish_started(workstations, sessions):
+	"""Publish the start of each session at its workstation."""
+	_publish(STARTED_EVENT, workstations, [session.start for session in sessions])
+
+def publish_ended(workstations):
+	"""Publish the end of the session at each workstation."""
+	_publish(ENDED_EVENT, workstations, [None] * len(workstations))
+
+def _format_event(event, data, event_id=None):
+	"""Return the event formatted as a server-sent event."""
+	lines = []
+	if event_id is not None:
+		lines.append("id: %d" % event_id)
+	lines.append("event: %s" % event)
+	lines.append("data: %s" % json.dumps(data))
+	return "\n".join(lines) + "\n\n"
+
+def iter_usage_events(location, last_event_id=None):
+	"""Yield the server-sent events describing changes to a location's usage.
+
+	The stream begins with a snapshot of the location's current usage, unless it
+	resumes after `last_event_id` and every change since then is still held, in
+	which case only those changes are sent.  A snapshot is also sent whenever
+	changes are missed.  A comment is sent as a heartbeat whenever no change
+	occurs for a while, and the stream ends after a fixed duration so that the
+	client reconnects with the ID of the last event that it received.
+
+	Arguments:
+	location -- a Location instance
+	last_event_id -- the optional integer ID of the last event received
+
+	Yields: strings of server-sent events
+
+	"""
+	backend = get_backend()
+	channel = _channel(location.pk)
+	stop_at = time.time() + _settings.STREAM_MAX_DURATION
+
+	yield "retry: %d\n\n" % (_settings.STREAM_RETRY_INTERVAL * 1000)
+
+	after_id = last_event_id
+	if after_id is None or backend.read(channel, after_id, 0) is None:
+		after_id = backend.last_id(channel)
+		yield _format_event(SNAPSHOT_EVENT, {'workstations': current_usage(location)}, after_id)
+
+	while time.time() < stop_at:
+		messages = backend.read(channel, after_id, min(_settings.STREAM_HEARTBEAT_INTERVAL, stop_at - time.time()))
+		if messages is None:
+			after_id = backend.last_id(channel)
+			yield _format_event(SNAPSHOT_EVENT, {'workstations': current_usage(location)}, after_id)
+		elif messages:
+			for message_id, message in messages:
+				data = dict(message)
+				yield _format_event(data.pop('event'), data, message_id)
+				after_id = message_id
+		else:
+			yield ": heartbeat\n\n"
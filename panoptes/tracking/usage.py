@@ -0,0 +1,76 @@
+
+from django.core.cache import cache
+from django.utils.feedgenerator import rfc3339_date
+
+from panoptes.core.models import MACAddress, Session, Workstation
+import panoptes.settings as _settings
+
+def _snapshot_key(location_id):
+	"""Return the cache key of the current usage snapshot of a location."""
+	return "panoptes:current-usage:%d" % location_id
+
+def _build_current_usage(location):
+	"""Return the current usage of the location using three queries.
+
+	The location's workstations, their MAC addresses and their open sessions are
+	each fetched with a single query, rather than with a query per workstation.
+	"""
+	workstations = list(Workstation.objects.all_for_location(location))
+	workstation_ids = [workstation.pk for workstation in workstations]
+
+	macs = {}
+	if workstation_ids:
+		for mac in MACAddress.objects.filter(workstation__in=workstation_ids).order_by('pk'):
+			macs.setdefault(mac.workstation_id, []).append({
+				'type':    mac.get_nic_display(),
+				'address': mac.address_with_separators(":")
+			})
+
+	#  Use the most recent open session of each workstation
+	starts = {}
+	open_sessions = Session.objects.open_for_location(location).order_by('start')
+	for workstation_id, start in open_sessions.values_list('workstation', 'start'):
+		starts[workstation_id] = start
+
+	usage = []
+	for workstation in workstations:
+		start = starts.get(workstation.pk, None)
+		if start:
+			start = rfc3339_date(location.timezone.localize(start))
+		usage.append({
+			'name': workstation.name,
+			'mac_addresses': macs.get(workstation.pk, []),
+			'session_start': start
+		})
+	return usage
+
+def current_usage(location):
+	"""Return the current usage of each of the location's workstations.
+
+	The usage is cached as a snapshot of the location for a few seconds, and the
+	snapshot is discarded whenever a session starts or ends at the location.
+
+	Arguments:
+	location -- a Location instance
+
+	Returns: a list of dicts with `name`, `mac_addresses` and `session_start`
+	         keys for each of the location's tracked workstations
+
+	"""
+	key = _snapshot_key(location.pk)
+	usage = cache.get(key)
+	if usage is None:
+		usage = _build_current_usage(location)
+		cache.set(key, usage, _settings.CURRENT_USAGE_CACHE_TIMEOUT)
+	return usage
+
+def clear_current_usage(location_ids):
+	"""Discard the current usage snapshots of the given locations.
+
+	Arguments:
+	location_ids -- an iterable of the primary keys of Location instances
+
+	"""
+	keys = [_snapshot_key(location_id) for location_id in set(location_ids)]
+	if keys:
+		cache.delete_many(keys)